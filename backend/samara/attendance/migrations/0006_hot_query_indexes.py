@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_alter_securityguardattendance_status'),
+        ('employees', '0013_employee_image'),
+        ('projects', '0003_location_is_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='securityguardattendance',
+            index=models.Index(fields=['shift', 'status'], name='guard_att_shift_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shiftattendance',
+            index=models.Index(fields=['date', 'location', 'shift'], name='shift_att_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shiftattendance',
+            index=models.Index(fields=['created_by', 'date'], name='shift_att_creator_date_idx'),
+        ),
+    ]
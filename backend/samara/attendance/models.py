@@ -24,6 +24,10 @@ class ShiftAttendance(models.Model):
 
     class Meta:
         unique_together = ("location", "shift", "date")
+        indexes = [
+            models.Index(fields=["date", "location", "shift"], name="shift_att_date_idx"),
+            models.Index(fields=["created_by", "date"], name="shift_att_creator_date_idx"),
+        ]
         verbose_name = _("حضور وردية")
         verbose_name_plural = _("حضور الورديات")
 
@@ -66,6 +70,9 @@ class SecurityGuardAttendance(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(fields=["shift", "status"], name="guard_att_shift_status_idx"),
+        ]
         verbose_name = _("تسجيل حضور")
         verbose_name_plural = _("تسجيلات الحضور")
 
@@ -1,3 +1,157 @@
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from employees.models import Employee, SecurityGuard, Shift
+from projects.models import Project, Location
+from samara.testing import Endpoint, QueryBudgetTestCase
+from users.models import User
+from .models import ShiftAttendance, SecurityGuardAttendance
+from .views import MAX_ATTENDANCE_RANGE_DAYS
+
+
+class RecordShiftAttendanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("supervisor", "password", role=User.RoleChoices.SUPERVISOR)
+        Employee.objects.create(employee_id="1", name="supervisor", phone="0500000000", national_id="1",
+                                created_by=cls.user, user=cls.user)
+        project = Project.objects.create(name="project")
+        cls.locations = Location.objects.bulk_create(
+            [Location(name=f"location {i}", project=project) for i in range(2)]
+        )
+        cls.guards = SecurityGuard.objects.bulk_create(
+            [SecurityGuard(name=f"guard {i}", employee_id=i) for i in range(60)]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def record(self, location, guards, day="2025-10-01", **extra_records):
+        records = {str(guard.id): {"status": SecurityGuardAttendance.AttendanceStatus.PRESENT} for guard in guards}
+        records.update(extra_records)
+        payload = {"location": location.id, "shift": Shift.ShiftChoices.FIRST, "date": day, "records": records}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("record-shift-attendance"), payload, format="json")
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_is_independent_of_shift_size(self):
+        response, small_count = self.record(self.locations[0], self.guards[:5])
+        self.assertEqual(response.status_code, 201)
+
+        # another day, so its DailyStats row is created too
+        response, large_count = self.record(self.locations[1], self.guards, day="2025-10-02")
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(SecurityGuardAttendance.objects.count(), 65)
+
+    def test_invalid_guards_write_nothing(self):
+        response, _ = self.record(self.locations[0], self.guards[:3], **{"999999": {"status": "حاضر"},
+                                                                          str(self.guards[3].id): {"status": "?"}})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["records"]), {"999999", str(self.guards[3].id)})
+        self.assertFalse(ShiftAttendance.objects.exists())
+        self.assertFalse(SecurityGuardAttendance.objects.exists())
+
+    def test_records_must_be_keyed_by_guard(self):
+        for records in ([{"status": "حاضر"}], "حاضر"):
+            payload = {"location": self.locations[0].id, "shift": Shift.ShiftChoices.FIRST, "date": "2025-10-01",
+                       "records": records}
+            response = self.client.post(reverse("record-shift-attendance"), payload, format="json")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("records", response.json())
+        self.assertFalse(ShiftAttendance.objects.exists())
+
+    def test_reading_a_shift_is_independent_of_its_size(self):
+        counts = []
+        for location, guards in ((self.locations[0], self.guards[:5]), (self.locations[1], self.guards)):
+            self.record(location, guards)
+            attendance = ShiftAttendance.objects.get(location=location)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse("get-shift-attendance"), {"shift_id": attendance.id})
+            self.assertEqual(len(response.json()["records"]), len(guards))
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_recording_twice_conflicts(self):
+        self.record(self.locations[0], self.guards[:3])
+        response, _ = self.record(self.locations[0], self.guards[:3])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(SecurityGuardAttendance.objects.count(), 3)
+
+
+class ProjectAttendancesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("moderator", "password")
+        employee = Employee.objects.create(employee_id="1", name="moderator", phone="0500000000", national_id="1",
+                                           created_by=cls.user, user=cls.user)
+        cls.project = Project.objects.create(name="project")
+        locations = Location.objects.bulk_create(
+            [Location(name=f"location {i}", project=cls.project) for i in range(20)]
+        )
+        first_shift = Shift.objects.get(name=Shift.ShiftChoices.FIRST)
+        cls.attendance = ShiftAttendance.objects.create(location=locations[0], shift=first_shift, date="2025-10-02",
+                                                        created_by=employee)
+
+    def get(self, **params):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse("get-project-attendances"), {"project": self.project.id, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_single_date(self):
+        data, queries = self.get(date="2025-10-02")
+
+        self.assertEqual(data["date"], "2025-10-02")
+        self.assertEqual(len(data["attendances"]), 20)
+        self.assertEqual(data["attendances"][0]["shifts"][Shift.ShiftChoices.FIRST],
+                         {"id": self.attendance.id, "has_attendance": True})
+        self.assertEqual(data["attendances"][1]["shifts"][Shift.ShiftChoices.FIRST],
+                         {"id": None, "has_attendance": False})
+        self.assertLessEqual(queries, 5)
+
+    def test_date_range(self):
+        data, queries = self.get(**{"from": "2025-10-01", "to": "2025-10-07"})
+
+        self.assertEqual([day["date"] for day in data["days"]][:2], ["2025-10-01", "2025-10-02"])
+        self.assertEqual(len(data["days"]), 7)
+        self.assertTrue(data["days"][1]["attendances"][0]["shifts"][Shift.ShiftChoices.FIRST]["has_attendance"])
+        self.assertFalse(data["days"][0]["attendances"][0]["shifts"][Shift.ShiftChoices.FIRST]["has_attendance"])
+        self.assertLessEqual(queries, 5)
+
+    def test_range_limit_counts_both_ends(self):
+        data, _ = self.get(**{"from": "2025-10-01", "to": "2025-10-31"})
+        self.assertEqual(len(data["days"]), MAX_ATTENDANCE_RANGE_DAYS)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse("get-project-attendances"),
+                              {"project": self.project.id, "from": "2025-10-01", "to": "2025-11-01"})
+        self.assertEqual(response.status_code, 400)
+
 
-# Create your tests here.
+class AttendanceQueryBudgetTests(QueryBudgetTestCase):
+    endpoints = (
+        Endpoint("shift-attendance-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("shift-attendance-detail", args=lambda data: [data["shift_attendances"][0].id]),
+        Endpoint("security-guard-attendance-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("security-guard-attendance-detail", args=lambda data: [data["guard_attendances"][0].id]),
+        Endpoint("get-project-attendances",
+                 params=lambda data: {"project": data["projects"][0].id, "date": data["visits"][0].date}),
+        Endpoint("get-project-attendances",
+                 params=lambda data: {"project": data["projects"][0].id, "from": data["visits"][0].date,
+                                      "to": data["visits"][0].date + timedelta(days=6)}),
+        Endpoint("get-shift-attendance", params=lambda data: {"shift_id": data["shift_attendances"][0].id}),
+    )
@@ -1,6 +1,8 @@
 from django.conf import settings
+from django.db import transaction
 from django.db.utils import IntegrityError
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status, viewsets
@@ -8,76 +10,157 @@ from django.utils.translation import gettext_lazy as _
 
 from collections import Counter
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from datetime import timedelta
 
 from projects.models import Location, Project
+from samara.instrumentation import query_budget
+from samara.rest_framework_utils.streaming import StreamingListMixin
 from employees.models import SecurityGuard, Shift
 from .models import ShiftAttendance, SecurityGuardAttendance
 from .serializers import ShiftAttendanceSerializer, SecurityGuardAttendanceSerializer
 
+MAX_ATTENDANCE_RANGE_DAYS = 31
 
-class ShiftAttendanceViewSet(viewsets.ModelViewSet):
+
+class ShiftAttendanceViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = ShiftAttendance.objects.all()
     serializer_class = ShiftAttendanceSerializer
+    query_budget = {"list": 3, "retrieve": 2}
 
 
-class SecurityGuardAttendanceViewSet(viewsets.ModelViewSet):
+class SecurityGuardAttendanceViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = SecurityGuardAttendance.objects.all()
     serializer_class = SecurityGuardAttendanceSerializer
+    query_budget = {"list": 3, "retrieve": 2}
 
 
+def build_attendance_matrix(locations, attendances_index: dict, day) -> list:
+    all_shifts = [*Shift.ShiftChoices]
+    project_attendances = []
+    for location in locations:
+        location_data = {"location": location.name, "shifts": {}}
+        for shift_name in all_shifts:
+            shift_attendance_id = attendances_index.get((location.id, shift_name, day))
+            location_data["shifts"][shift_name] = {"id": shift_attendance_id,
+                                                   "has_attendance": shift_attendance_id is not None}
+        project_attendances.append(location_data)
+    return project_attendances
+
+
+@query_budget(4)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_project_attendances(request):
+    """
+    Location × shift attendance matrix of a project, either for a single ``date``
+    or for every day of a ``from`` → ``to`` range.
+    """
     project = request.query_params.get('project')
     date = request.query_params.get('date')
+    from_date = parse_date(request.query_params.get('from') or date or "")
+    to_date = parse_date(request.query_params.get('to') or date or "")
 
     project = get_object_or_404(Project, pk=project)
     is_active = request.query_params.get('is_active', None)
 
+    if not from_date or not to_date or from_date > to_date:
+        return Response({"detail": _("تاريخ غير صالح")}, status=status.HTTP_400_BAD_REQUEST)
+    if (to_date - from_date).days + 1 > MAX_ATTENDANCE_RANGE_DAYS:  # both ends included
+        return Response({"detail": _("الفترة المطلوبة طويلة جدًا")}, status=status.HTTP_400_BAD_REQUEST)
+
     locations = project.locations.all()
     if is_active == 'active':
         locations = locations.filter(is_active=True)
+    locations = list(locations)
+
+    attendances = ShiftAttendance.objects.filter(
+        location__in=[location.id for location in locations],
+        date__range=(from_date, to_date),
+    ).values_list("location_id", "shift__name", "date", "id")
+    attendances_index = {(location_id, shift_name, day): pk for location_id, shift_name, day, pk in attendances}
+
+    if date:
+        data = {"project": project.name, "date": date,
+                "attendances": build_attendance_matrix(locations, attendances_index, from_date)}
+        return Response(data)
+
+    days = []
+    day = from_date
+    while day <= to_date:
+        days.append({"date": day.isoformat(),
+                     "attendances": build_attendance_matrix(locations, attendances_index, day)})
+        day += timedelta(days=1)
+
+    data = {"project": project.name, "from": from_date.isoformat(), "to": to_date.isoformat(), "days": days}
+    return Response(data)
 
-    project_attendances = []
-    all_shifts = [*Shift.ShiftChoices]
-    for location in locations:
-        location_data = {"location": location.name, "shifts": {}}
-        for shift_name in all_shifts:
-            shift_attendance = ShiftAttendance.objects.filter(location=location, date=date,
-                                                              shift__name=shift_name).first()
-            location_data["shifts"][shift_name] = {"id": shift_attendance.id if shift_attendance else None,
-                                                   "has_attendance": True if shift_attendance else False}
-        project_attendances.append(location_data)
-
-    data = {"project": project.name, "date": date, "attendances": project_attendances}
 
-    return Response(data)
+def validate_attendance_records(records: dict) -> tuple[dict, dict]:
+    """
+    Resolves the guards of the submitted records in a single query.
+    Returns the guards keyed by the submitted id and the per-guard errors.
+    """
+    statuses = SecurityGuardAttendance.AttendanceStatus.values
+    guard_ids = {}
+    errors = {}
+    for record_id, record in records.items():
+        if not str(record_id).isdigit():
+            errors[record_id] = _("رقم حارس غير صالح")
+        elif not isinstance(record, dict) or record.get("status") not in statuses:
+            errors[record_id] = _("حالة الحضور غير صالحة")
+        else:
+            guard_ids[record_id] = int(record_id)
+
+    guards = SecurityGuard.objects.in_bulk(guard_ids.values())
+    for record_id, guard_id in guard_ids.items():
+        if guard_id not in guards:
+            errors[record_id] = _("رجل أمن غير موجود")
+
+    return {record_id: guards[guard_id] for record_id, guard_id in guard_ids.items() if guard_id in guards}, errors
+
+
+def save_shift_attendance(data, employee) -> ShiftAttendance:
+    """
+    Stores the attendance sheet of a location's shift. Raises Http404 for an unknown location or
+    shift, ValidationError for invalid records and IntegrityError if the shift is recorded already.
+    """
+    location = get_object_or_404(Location, id=data['location'])
+    shift = get_object_or_404(Shift, name=data['shift'])
+    records = data.get('records') or {}
+    if not isinstance(records, dict):
+        raise ValidationError({"records": _("يجب إرسال سجلات الحضور كقاموس برقم الحارس")})
+
+    guards, errors = validate_attendance_records(records)
+    if errors:
+        raise ValidationError({"records": errors})
+
+    with transaction.atomic():
+        shift_attendance = ShiftAttendance.objects.create(location=location, shift=shift, date=data["date"],
+                                                          created_by=employee)
+        SecurityGuardAttendance.objects.bulk_create(
+            [SecurityGuardAttendance(security_guard=guard, shift=shift_attendance,
+                                     status=records[record_id]["status"],
+                                     notes=records[record_id].get("notes", ""))
+             for record_id, guard in guards.items()]
+        )
+    return shift_attendance
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def record_shift_attendance(request):
-    data = request.data
-    user = request.user
-
-    location = Location.objects.get(id=data['location'])
-    shift = Shift.objects.get(name=data['shift'])
-    records = data['records']
-
     try:
-        shift_attendance = ShiftAttendance.objects.create(location=location, shift=shift, date=data["date"],
-                                                          created_by=user.employee_profile)
+        save_shift_attendance(request.data, request.user.employee_profile)
+    except ValidationError as e:
+        return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
     except IntegrityError:
         return Response({"detail": _("تم تسجيل حضور هذه الوردية لهذا اليوم")}, status=status.HTTP_409_CONFLICT)
 
-    for record in records:
-        guard = SecurityGuard.objects.get(id=record)
-        SecurityGuardAttendance.objects.create(security_guard=guard, shift=shift_attendance,
-                                               status=records[record]["status"], notes=records[record].get("notes", ""))
-
     return Response(data={}, status=status.HTTP_201_CREATED)
 
 
+@query_budget(5)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_shift_attendance(request):
@@ -88,13 +171,13 @@ def get_shift_attendance(request):
     shift_id = request.query_params.get('shift_id')
 
     if shift_id:
-        shift_attendance = get_object_or_404(ShiftAttendance, pk=shift_id)
+        shift_attendance = get_object_or_404(ShiftAttendance.objects.select_related("created_by"), pk=shift_id)
     else:
         shift_attendance = get_object_or_404(
-            ShiftAttendance, date=date, location=location, shift__name=shift
+            ShiftAttendance.objects.select_related("created_by"), date=date, location=location, shift__name=shift
         )
 
-    guards = shift_attendance.security_guards.all()
+    guards = shift_attendance.security_guards.select_related("security_guard")
 
     # Count attendance statuses
     status_counts = Counter(guard.status for guard in guards)
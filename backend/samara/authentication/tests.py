@@ -1,3 +1,7 @@
-from django.test import TestCase
+from samara.testing import Endpoint, QueryBudgetTestCase
 
-# Create your tests here.
+
+class AuthenticationQueryBudgetTests(QueryBudgetTestCase):
+    endpoints = (
+        Endpoint("authenticated_user", user=lambda data: data["users"][0]),
+    )
@@ -9,6 +9,7 @@ from django.middleware.csrf import get_token
 
 from datetime import timedelta
 
+from samara.instrumentation import query_budget
 from users.models import User
 from users.serializers import UserSerializer
 
@@ -137,6 +138,7 @@ class LogoutView(APIView):
         return response
 
 
+@query_budget(4)
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_authenticated_user(request):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Employee, SecurityGuard, SecurityGuardLocationShift
+from .models import Employee, SecurityGuard, SecurityGuardLocationShift, ReportExport
 
 
 class SecurityGuardLocationShiftInline(admin.TabularInline):
@@ -14,3 +14,9 @@ class SecurityGuardAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Employee)
+
+
+@admin.register(ReportExport)
+class ReportExportAdmin(admin.ModelAdmin):
+    list_display = ["month", "format", "status", "progress", "created_by", "created_at"]
+    list_filter = ["status", "format"]
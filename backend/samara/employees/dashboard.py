@@ -0,0 +1,125 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+
+from attendance.models import ShiftAttendance, SecurityGuardAttendance
+from projects.models import Location, Project
+from users.models import User
+from visits.models import DailyStats
+from .models import Employee, SecurityGuard
+
+PERIODS = (DailyStats.Period.MORNING, DailyStats.Period.EVENING)
+VISIT_METRICS = (DailyStats.Metric.COMPLETED, DailyStats.Metric.SCHEDULED)
+
+
+def _period_counts(row: dict, period: str) -> dict:
+    completed = row.get((period, DailyStats.Metric.COMPLETED), 0)
+    scheduled = row.get((period, DailyStats.Metric.SCHEDULED), 0)
+    return {"total": completed + scheduled, "completed": completed, "scheduled": scheduled}
+
+
+def _visits_by_supervisor(day) -> dict:
+    """
+    Reads the day's visit counters from the DailyStats rollup.
+    Returns {employee id (``None`` for unassigned visits): {(period, metric): count}}.
+    """
+    rows = DailyStats.objects.filter(date=day, metric__in=VISIT_METRICS).values_list(
+        "supervisor", "period", "metric", "count")
+
+    supervisors = defaultdict(dict)
+    for supervisor, period, metric, count in rows:
+        supervisors[supervisor][(period, metric)] = count
+    return supervisors
+
+
+def get_moderator_home_stats(day) -> dict:
+    """Moderator dashboard figures for the given day, computed in a constant number of queries."""
+    guards_counts = SecurityGuard.objects.aggregate(active=Count("id", filter=Q(is_active=True)),
+                                                    inactive=Count("id", filter=Q(is_active=False)))
+    supervisors = list(Employee.objects.filter(user__role=User.RoleChoices.SUPERVISOR).values("id", "name"))
+
+    visits_rows = _visits_by_supervisor(day)
+    totals = Counter()
+    for row in visits_rows.values():
+        totals.update(row)
+
+    data = {
+        "general": {
+            "projects_count": Project.objects.count(),
+            "locations_count": Location.objects.count(),
+            "security_guards_count": guards_counts,
+            "supervisors_count": len(supervisors),
+        },
+        "today_visits": {period.value: _period_counts(totals, period) for period in PERIODS},
+        "supervisors": [],
+        "attendance": None,
+        "shifts_count": None
+    }
+
+    for s in supervisors:
+        row = visits_rows.get(s["id"], {})
+        data["supervisors"].append(
+            {"name": s["name"],
+             "id": s["id"],
+             "morning": _period_counts(row, "morning"),
+             "evening": _period_counts(row, "evening")}
+        )
+
+    guards = SecurityGuardAttendance.objects.filter(shift__date=day).order_by()
+    status_counts = dict(guards.values_list("status").annotate(count=Count("id")))
+
+    data["attendance"] = [
+        {"name": " الحضور", "value": status_counts.get("حاضر", 0), "color": "#4ade80"},  # green
+        {"name": " التأخير", "value": status_counts.get("متأخر", 0), "color": "#facc15"},  # yellow
+        {"name": " الغياب", "value": status_counts.get("غائب", 0), "color": "#f87171"},  # red
+        {"name": " الراحة", "value": status_counts.get("راحة", 0), "color": "#60a5fa"},  # blue
+    ]
+
+    shift_counts = dict(guards.values_list("shift__shift__name").annotate(count=Count("id")))
+
+    data["shifts"] = [
+        {"name": " الأولى", "value": shift_counts.get("الوردية الأولى", 0), "color": "#3b82f6"},  # blue
+        {"name": " الثانية", "value": shift_counts.get("الوردية الثانية", 0), "color": "#06b6d4"},  # cyan
+        {"name": " الثالثة", "value": shift_counts.get("الوردية الثالثة", 0), "color": "#a855f7"},  # purple
+    ]
+
+    data["shifts_count"] = ShiftAttendance.objects.filter(date=day).count()
+
+    return data
+
+
+def get_supervisor_home_stats(user: User, today) -> dict:
+    """Supervisor dashboard figures for today and yesterday, read from the DailyStats rollup."""
+    yesterday = today - timedelta(days=1)
+
+    stats = DailyStats.objects.filter(date__in=(today, yesterday))
+    if user.role == User.RoleChoices.SUPERVISOR:
+        stats = stats.filter(supervisor=user.employee_profile)
+
+    counts = {
+        (row["date"], row["period"], row["metric"]): row["total"]
+        for row in stats.values("date", "period", "metric").annotate(total=Sum("count"))
+    }
+
+    def day_stats(day):
+        return {
+            "scheduled": {period.value: counts.get((day, period, DailyStats.Metric.SCHEDULED), 0)
+                          for period in PERIODS},
+            "completed": {period.value: counts.get((day, period, DailyStats.Metric.COMPLETED), 0)
+                          for period in PERIODS},
+            "violations": counts.get((day, DailyStats.Period.DAY, DailyStats.Metric.VIOLATIONS), 0),
+            "attendance_records": counts.get((day, DailyStats.Period.DAY, DailyStats.Metric.ATTENDANCE_RECORDS),
+                                             0),
+        }
+
+    guards_counts = SecurityGuard.objects.aggregate(active=Count("id", filter=Q(is_active=True)),
+                                                    inactive=Count("id", filter=Q(is_active=False)))
+
+    return {
+        "general": {"projects_count": Project.objects.count(),
+                    "locations_count": Location.objects.filter(is_active=True).count(),
+                    "guards_count": guards_counts, },
+        "today": day_stats(today),
+        "yesterday": day_stats(yesterday),
+    }
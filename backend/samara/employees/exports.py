@@ -0,0 +1,183 @@
+import csv
+import io
+import logging
+import tempfile
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from openpyxl import Workbook
+
+from attendance.models import SecurityGuardAttendance
+from samara.background import run_after_commit
+from visits.models import DailyStats, Visit, Violation
+from .models import ReportExport
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+PROGRESS_EVERY = 1000
+
+
+def month_range(month):
+    first_day = month.replace(day=1)
+    next_month = (first_day + timedelta(days=32)).replace(day=1)
+    return first_day, next_month - timedelta(days=1)
+
+
+def local_datetime(value):
+    # spreadsheets have no time zones
+    return value and timezone.localtime(value, settings.SAUDI_TZ).replace(tzinfo=None)
+
+
+def export_sheets(first_day, last_day) -> list:
+    """(title, header, queryset of value rows, row formatter) of every sheet of a month's report."""
+    periods = dict(Visit.Period.choices)
+    metric_sum = {f"total_{metric}": Sum("count", filter=Q(metric=metric)) for metric in DailyStats.Metric.values}
+
+    return [
+        (
+            "ملخص المشرفين",
+            ["الرقم الوظيفي", "المشرف", "زيارات مجدولة", "زيارات مكتملة", "المخالفات", "سجلات الحضور"],
+            DailyStats.objects.filter(date__range=(first_day, last_day), supervisor__isnull=False)
+            .values_list("supervisor__employee_id", "supervisor__name")
+            .annotate(**metric_sum).order_by("supervisor__name"),
+            lambda row: [*row[:2], *(count or 0 for count in row[2:])],
+        ),
+        (
+            "الزيارات",
+            ["يوم المناوبة", "الفترة", "تاريخ الزيارة", "وقت الزيارة", "المشرف", "المشروع", "الموقع", "الحالة",
+             "تاريخ استكمال التقرير"],
+            Visit.objects.filter(duty_date__range=(first_day, last_day))
+            .values_list("duty_date", "period", "date", "time", "employee__name", "location__project__name",
+                         "location__name", "status", "completed_at")
+            .order_by("duty_date", "employee__name", "date", "time", "id"),
+            lambda row: [row[0], str(periods[row[1]]), *row[2:8], local_datetime(row[8])],
+        ),
+        (
+            "المخالفات",
+            ["التاريخ", "الوقت", "المشرف", "المشروع", "الموقع", "الرقم الوظيفي للحارس", "الحارس", "نوع المخالفة",
+             "الخطورة", "مؤكدة من المراقبة"],
+            Violation.objects.filter(date__range=(first_day, last_day))
+            .values_list("date", "time", "created_by__name", "location__project__name", "location__name",
+                         "security_guard__employee_id", "security_guard__name", "violation_type", "severity",
+                         "confirmed_by_monitoring")
+            .order_by("date", "time", "id"),
+            lambda row: [*row[:9], "نعم" if row[9] else "لا"],
+        ),
+        (
+            "الحضور",
+            ["التاريخ", "المشروع", "الموقع", "الوردية", "الرقم الوظيفي للحارس", "الحارس", "الحالة", "ملاحظات",
+             "سُجل بواسطة"],
+            SecurityGuardAttendance.objects.filter(shift__date__range=(first_day, last_day))
+            .values_list("shift__date", "shift__location__project__name", "shift__location__name",
+                         "shift__shift__name", "security_guard__employee_id", "security_guard__name", "status",
+                         "notes", "shift__created_by__name")
+            .order_by("shift__date", "shift__location_id", "shift__shift_id", "id"),
+            list,
+        ),
+    ]
+
+
+def sheet_rows(queryset, format_row, on_row):
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        on_row()
+        yield format_row(row)
+
+
+def write_xlsx(path, sheets, on_row):
+    # write-only: rows go straight to the file instead of being kept as cells
+    workbook = Workbook(write_only=True)
+    for title, header, queryset, format_row in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.sheet_view.rightToLeft = True
+        sheet.append(header)
+        for row in sheet_rows(queryset, format_row, on_row):
+            sheet.append(row)
+    workbook.save(path)
+
+
+def write_csv(path, sheets, on_row):
+    """One CSV per sheet, zipped."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for title, header, queryset, format_row in sheets:
+            with archive.open(f"{title}.csv", "w") as raw, \
+                    io.TextIOWrapper(raw, encoding="utf-8-sig", newline="") as text:  # BOM for Excel
+                writer = csv.writer(text)
+                writer.writerow(header)
+                writer.writerows(sheet_rows(queryset, format_row, on_row))
+
+
+WRITERS = {
+    ReportExport.Format.XLSX: (write_xlsx, "xlsx"),
+    ReportExport.Format.CSV: (write_csv, "zip"),
+}
+
+
+def run_export(export_id):
+    # claimed only while pending: a row failed as stale meanwhile is left alone
+    if not ReportExport.objects.filter(pk=export_id, status=ReportExport.Status.PENDING).update(
+            status=ReportExport.Status.RUNNING, updated_at=timezone.now()):
+        return
+    export = ReportExport.objects.get(pk=export_id)
+
+    try:
+        sheets = export_sheets(*month_range(export.month))
+        total = sum(queryset.count() for _, _, queryset, _ in sheets) or 1
+        written = 0
+
+        def on_row():
+            nonlocal written
+            written += 1
+            if written % PROGRESS_EVERY == 0:
+                ReportExport.objects.filter(pk=export.pk).update(progress=min(99, written * 100 // total),
+                                                                 rows_written=written, updated_at=timezone.now())
+
+        write, extension = WRITERS[export.format]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / f"report-{export.month:%Y-%m}.{extension}"
+            write(path, sheets, on_row)
+            with path.open("rb") as file:
+                export.file.save(path.name, File(file), save=False)
+
+        export.status = ReportExport.Status.COMPLETED
+        export.progress = 100
+        export.rows_written = written
+    except Exception as e:
+        logger.exception("Report export %s failed", export_id)
+        export.status = ReportExport.Status.FAILED
+        export.error = str(e)
+    export.finished_at = timezone.now()
+    export.save(update_fields=["status", "progress", "rows_written", "file", "error", "finished_at", "updated_at"])
+
+
+def fail_if_stale(export) -> bool:
+    """
+    Marks the export failed once it's been pending or running without progress for REPORT_EXPORT_STALE_MINUTES:
+    its worker thread went away with its process (a restarted or killed gunicorn worker). The loaded row is
+    checked first, so polling an export that is progressing writes nothing.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(minutes=settings.REPORT_EXPORT_STALE_MINUTES)
+    unfinished = [ReportExport.Status.PENDING, ReportExport.Status.RUNNING]
+    if export.status not in unfinished or export.updated_at >= cutoff:
+        return False
+
+    # the worker may have moved it along since it was loaded
+    failed = ReportExport.objects.filter(pk=export.pk, status__in=unfinished, updated_at__lt=cutoff).update(
+        status=ReportExport.Status.FAILED, error=_("توقف التصدير قبل اكتماله، يرجى إعادة المحاولة"),
+        finished_at=now, updated_at=now)
+    export.refresh_from_db()
+    return bool(failed)
+
+
+def start_export(export):
+    """Queues the export once the row creating it is committed."""
+    # their own queue (one thread by default): exports wait for each other instead of competing with the
+    # requests for the database
+    run_after_commit(run_export, export.pk, queue="exports")
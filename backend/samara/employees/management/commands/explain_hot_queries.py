@@ -0,0 +1,110 @@
+import re
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from attendance.models import ShiftAttendance, SecurityGuardAttendance
+from employees.models import Employee, Shift
+from projects.models import Location
+from users.models import User
+from visits.models import DailyStats, Visit, Violation
+
+# plan lines reading a whole table instead of an index (SQLite / PostgreSQL)
+FULL_SCAN_PATTERN = re.compile(r"\bSCAN (?!.*\bUSING\b.*\bINDEX\b)|Seq Scan")
+
+
+def hot_queries(day, supervisor, location):
+    """The querysets issued by the dashboards, list endpoints and DailyStats maintenance."""
+    month_start = day.replace(day=1)
+    month_end = month_start + timedelta(days=31)
+    shift = Shift.ShiftChoices.FIRST
+
+    return {
+        # dashboards
+        "moderator: daily stats of the day": DailyStats.objects.filter(
+            date=day, metric__in=(DailyStats.Metric.SCHEDULED, DailyStats.Metric.COMPLETED)),
+        "moderator: attendance by status": SecurityGuardAttendance.objects.filter(shift__date=day).order_by()
+        .values("status").annotate(count=Count("id")),
+        "moderator: attendance by shift": SecurityGuardAttendance.objects.filter(shift__date=day).order_by()
+        .values("shift__shift__name").annotate(count=Count("id")),
+        "moderator: recorded shifts": ShiftAttendance.objects.filter(date=day),
+        "supervisor: daily stats": DailyStats.objects.filter(date__in=(day, day - timedelta(days=1)),
+                                                             supervisor=supervisor),
+
+        # daily stats maintenance
+        "stats: visits of a supervisor's day": Visit.objects.filter(duty_date=day, employee=supervisor).order_by()
+        .values("period", "status").annotate(count=Count("id")),
+        "stats: violations of a supervisor's day": Violation.objects.filter(date=day, created_by=supervisor),
+        "stats: attendance of a supervisor's day": ShiftAttendance.objects.filter(date=day, created_by=supervisor),
+        "stats: rebuild violations": Violation.objects.filter(date__range=(month_start, month_end)).order_by()
+        .values("date", "created_by").annotate(count=Count("id")),
+
+        # visits
+        "visits: list by period": Visit.objects.filter(duty_date__range=(month_start, month_end),
+                                                       period=Visit.Period.EVENING),
+        "visits: list by date": Visit.objects.filter(date__range=(month_start, month_end)),
+        "visits: list of a supervisor": Visit.objects.filter(date__range=(month_start, month_end),
+                                                             employee=supervisor),
+        "visits: duplicate check": Visit.objects.filter(employee=supervisor, location=location, date=day,
+                                                        time="10:00"),
+        "visits: monthly record": Visit.objects.filter(duty_date__range=(month_start, month_end),
+                                                       employee=supervisor, period=Visit.Period.MORNING)
+        .values("duty_date").annotate(count=Count("id")).order_by(),
+        "visits: daily record": Visit.objects.filter(duty_date=day, period=Visit.Period.MORNING,
+                                                     employee=supervisor),
+
+        # violations
+        "violations: list": Violation.objects.all()[:10],
+        "violations: list of a supervisor": Violation.objects.filter(created_by=supervisor)[:10],
+        "violations: monthly record": Violation.objects.filter(date__range=(month_start, month_end),
+                                                               created_by=supervisor)
+        .values("date").annotate(count=Count("id")).order_by(),
+
+        # attendance
+        "attendance: project matrix": ShiftAttendance.objects.filter(location__in=[location],
+                                                                     date__range=(month_start, month_end)),
+        "attendance: shift lookup": ShiftAttendance.objects.filter(date=day, location=location, shift__name=shift),
+        "attendance: guards of a shift": SecurityGuardAttendance.objects.filter(shift_id=1),
+    }
+
+
+class Command(BaseCommand):
+    help = "Print the query plan of every dashboard/list query and flag the ones falling back to full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the plan of every query, "
+                                                                         "not only the full scans.")
+        parser.add_argument("--fail-on-scan", action="store_true", help="Exit with an error if any query "
+                                                                        "falls back to a full table scan.")
+
+    def handle(self, *args, **options):
+        day = datetime.today().astimezone(settings.SAUDI_TZ).date()
+        supervisor = (Employee.objects.filter(user__role=User.RoleChoices.SUPERVISOR).first()
+                      or Employee(pk=0))
+        location = Location.objects.first() or Location(pk=0)
+
+        self.stdout.write(f"Database: {connection.vendor}\n")
+
+        queries = hot_queries(day, supervisor, location)
+        scans = []
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            full_scans = [line for line in plan.splitlines() if FULL_SCAN_PATTERN.search(line)]
+
+            if full_scans:
+                scans.append(name)
+                self.stdout.write(self.style.WARNING(f"[FULL SCAN] {name}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[OK]        {name}"))
+
+            if full_scans or options["verbose_plans"]:
+                self.stdout.write(f"    {queryset.query}")
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        self.stdout.write(f"\n{len(scans)} of {len(queries)} queries use full scans")
+        if scans and options["fail_on_scan"]:
+            raise CommandError("Full table scans found: " + ", ".join(scans))
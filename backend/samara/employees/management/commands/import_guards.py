@@ -0,0 +1,313 @@
+import json
+import time
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from employees.models import SecurityGuard, SecurityGuardLocationShift, Shift
+from projects.models import Location
+from samara.rest_framework_utils import response_cache
+
+# the roster sheet: a title row, a header row, then one row per guard and shift
+COLUMNS = ["index", "name", "employee_id", "project", "location", "shift"]
+SHEET_SKIP_ROWS = 2
+
+# an optional column, found by its header, that (de)activates the guards; without it is_active is left alone
+ACTIVE_HEADERS = {"نشط", "فعال", "active"}
+ACTIVE_VALUES = {"نعم": True, "نشط": True, "فعال": True, "1": True, "yes": True, "true": True,
+                 "لا": False, "غير نشط": False, "غير فعال": False, "0": False, "no": False, "false": False}
+
+# the sheet writes the shifts freely ("الاولى", "الثانيه", ...)
+SHIFT_KEYWORDS = {
+    "ول": Shift.ShiftChoices.FIRST,
+    "ثان": Shift.ShiftChoices.SECOND,
+    "ثال": Shift.ShiftChoices.THIRD,
+}
+REST_DAYS = "راحات"
+
+
+def match_shift(value):
+    for keyword, shift in SHIFT_KEYWORDS.items():
+        if keyword in value:
+            return shift
+    return None
+
+
+def clean(value):
+    if value is None or pd.isna(value):
+        return ""
+    return " ".join(str(value).split())
+
+
+def parse_employee_id(value):
+    try:
+        number = float(clean(value))
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def parse_active(value):
+    """True / False for the active column, None if blank (left alone), or the unknown value as is."""
+    value = clean(value)
+    return ACTIVE_VALUES.get(value.lower(), value or None)
+
+
+def read_sheet(path, sheet, skip_rows) -> list:
+    """
+    Rows of the roster sheet (xlsx / xls / csv) as dicts with their line in the file. ``active`` is the
+    value of the active column, None for every row if the header has none.
+    """
+    # from the header row, when there is one, to find the active column
+    first_row = max(skip_rows - 1, 0)
+    options = dict(header=None, skiprows=first_row, dtype=str)
+    if path.suffix.lower() == ".csv":
+        frame = pd.read_csv(path, **options)
+    else:
+        frame = pd.read_excel(path, sheet_name=sheet, **options)
+
+    active_column = None
+    if skip_rows:
+        headers = [clean(title).lower() for title in frame.iloc[0]]
+        active_column = next((i for i, title in enumerate(headers) if title in ACTIVE_HEADERS), None)
+        frame = frame.iloc[1:]
+    active = frame.iloc[:, active_column] if active_column is not None else pd.Series(None, index=frame.index)
+
+    frame = frame.iloc[:, :len(COLUMNS)].set_axis(COLUMNS, axis=1).dropna(how="all", subset=COLUMNS[1:])
+    return [
+        {"line": line + first_row + 1, "employee_id": parse_employee_id(row.employee_id), "name": clean(row.name),
+         "project": clean(row.project), "location": clean(row.location), "shift": clean(row.shift),
+         "active": parse_active(active[line])}
+        for line, row in zip(frame.index, frame.itertuples(index=False))
+    ]
+
+
+def read_json(path) -> list:
+    """
+    ``{"<employee id>": {"locations": [<location id>], "shifts": [<shift id>]}}`` of existing guards, with an
+    optional ``"is_active"``. Guards with several locations or shifts can't be paired and are reported instead.
+    """
+    with path.open(encoding="utf-8") as file:
+        data = json.load(file)
+
+    return [
+        {"line": employee_id, "employee_id": parse_employee_id(employee_id), "name": "",
+         "location_id": entry["locations"][0] if len(entry["locations"]) == 1 else None,
+         "shift_id": entry["shifts"][0] if len(entry["shifts"]) == 1 else None,
+         "ambiguous": len(entry["locations"]) > 1 or len(entry["shifts"]) > 1, "active": entry.get("is_active")}
+        for employee_id, entry in data.items()
+    ]
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = ("Imports security guards and their location shifts from the roster sheet (xlsx / xls / csv) "
+            "or from a JSON map of employee ids to location and shift ids. Guards, locations and shifts are "
+            "resolved from maps loaded with one query each and written with batched upserts; --dry-run only "
+            "prints what would change. The guards keep their active state unless the sheet has an active "
+            "column (headed نشط) or the JSON entries an is_active.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Roster sheet or JSON file.")
+        parser.add_argument("--sheet", default=0, help="Sheet name or index (xlsx / xls).")
+        parser.add_argument("--skip-rows", type=int, default=SHEET_SKIP_ROWS,
+                            help="Rows above the first guard (the title and the header).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per INSERT.")
+        parser.add_argument("--replace", action="store_true",
+                            help="Remove the location shifts of the imported guards that the file doesn't list.")
+        parser.add_argument("--skip-invalid", action="store_true",
+                            help="Import the valid rows even if some rows can't be resolved.")
+        parser.add_argument("--dry-run", action="store_true", help="Print the changes without writing them.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"File not found: {path}")
+
+        started = time.monotonic()
+        if path.suffix.lower() == ".json":
+            rows = read_json(path)
+        else:
+            sheet = options["sheet"]
+            rows = read_sheet(path, int(sheet) if str(sheet).isdigit() else sheet, options["skip_rows"])
+        read_seconds = time.monotonic() - started
+
+        plan = self.plan(rows)
+        for line, error in plan["errors"]:
+            self.stderr.write(f"{line}: {error}")
+        if plan["errors"] and not options["skip_invalid"] and not options["dry_run"]:
+            raise CommandError(f"{len(plan['errors'])} rows can't be imported; fix them or pass --skip-invalid.")
+
+        self.report(plan, options)
+        if options["dry_run"]:
+            self.stdout.write("Dry run, nothing written.")
+        else:
+            self.write(plan, options)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(rows)} rows in {elapsed:.2f}s ({len(rows) / elapsed if elapsed else 0:.0f} rows/s, "
+            f"{read_seconds:.2f}s reading the file)"))
+
+    def plan(self, rows) -> dict:
+        """Resolves the rows against the database and works out what has to be written."""
+        guards = {employee_id: (pk, name, is_active) for employee_id, pk, name, is_active in
+                  SecurityGuard.objects.values_list("employee_id", "id", "name", "is_active")}
+        locations_by_name = {}
+        location_ids = set()
+        for pk, project, name in Location.objects.values_list("id", "project__name", "name"):
+            locations_by_name[(clean(project), clean(name))] = pk
+            location_ids.add(pk)
+        shifts = dict(Shift.objects.values_list("name", "id"))
+        shift_ids = set(shifts.values())
+
+        errors = []
+        failed = set()  # guards with rows that couldn't be resolved keep their location shifts
+        names = {}  # employee id -> name in the file
+        active = {}  # employee id -> is_active, for the rows that set it
+        assignments = set()  # (employee id, location id, shift id)
+
+        def fail(row, error):
+            errors.append((row["line"], error))
+            failed.add(row["employee_id"])
+
+        for row in rows:
+            employee_id = row["employee_id"]
+            if employee_id is None:
+                fail(row, "invalid employee id")
+                continue
+            if row["name"]:
+                names[employee_id] = row["name"]
+            elif employee_id not in guards:
+                fail(row, f"guard {employee_id} doesn't exist")
+                continue
+            else:
+                names.setdefault(employee_id, guards[employee_id][1])
+            if row["active"] is not None:
+                if not isinstance(row["active"], bool):
+                    fail(row, f"invalid active value '{row['active']}'")
+                    continue
+                active[employee_id] = row["active"]
+
+            if "location_id" in row:  # JSON
+                if row["ambiguous"]:
+                    fail(row, "several locations or shifts, assign them manually")
+                    continue
+                if row["location_id"] is None:
+                    continue
+                location, shift = row["location_id"], row["shift_id"]
+                if location not in location_ids:
+                    fail(row, f"location {location} doesn't exist")
+                    continue
+                if shift not in shift_ids:
+                    fail(row, f"shift {shift} doesn't exist")
+                    continue
+            else:
+                if not row["shift"] or row["shift"] == REST_DAYS:
+                    continue
+                location = locations_by_name.get((row["project"], row["location"]))
+                if location is None:
+                    fail(row, f"location '{row['location']}' of project '{row['project']}' doesn't exist")
+                    continue
+                shift = shifts.get(match_shift(row["shift"]))
+                if shift is None:
+                    fail(row, f"unknown shift '{row['shift']}'")
+                    continue
+            assignments.add((employee_id, location, shift))
+
+        new_guards = [employee_id for employee_id in names if employee_id not in guards]
+        changed_guards = [employee_id for employee_id, name in names.items() if employee_id in guards
+                          and (guards[employee_id][1] != name or active.get(employee_id, guards[employee_id][2])
+                               != guards[employee_id][2])]
+
+        existing = {}
+        imported_guard_ids = {guards[employee_id][0] for employee_id in names if employee_id in guards}
+        for pk, guard, location, shift in SecurityGuardLocationShift.objects.values_list(
+                "id", "guard_id", "location_id", "shift_id"):
+            if guard in imported_guard_ids:
+                existing[(guard, location, shift)] = pk
+
+        guard_ids = {employee_id: values[0] for employee_id, values in guards.items()}
+        failed_guard_ids = {guard_ids[employee_id] for employee_id in failed if employee_id in guard_ids}
+        listed = {(guard_ids.get(employee_id), location, shift) for employee_id, location, shift in assignments}
+        return {
+            "errors": errors,
+            "names": names,
+            "new_guards": new_guards,
+            "changed_guards": changed_guards,
+            "old_names": {employee_id: guards[employee_id][1] for employee_id in changed_guards},
+            "active": active,
+            "reactivated": [employee_id for employee_id in changed_guards
+                            if active.get(employee_id) is True and not guards[employee_id][2]],
+            "deactivated": [employee_id for employee_id in changed_guards
+                            if active.get(employee_id) is False and guards[employee_id][2]],
+            "new_assignments": sorted(assignment for assignment in assignments
+                                      if (guard_ids.get(assignment[0]),) + assignment[1:] not in existing),
+            "kept_assignments": len(existing.keys() & listed),
+            "stale_assignments": [pk for key, pk in existing.items()
+                                  if key not in listed and key[0] not in failed_guard_ids],
+        }
+
+    def report(self, plan, options):
+        verbose = options["verbosity"] > 1
+        self.stdout.write(f"Guards: {len(plan['new_guards'])} new, {len(plan['changed_guards'])} updated, "
+                          f"{len(plan['names']) - len(plan['new_guards']) - len(plan['changed_guards'])} unchanged; "
+                          f"{len(plan['reactivated'])} reactivated, {len(plan['deactivated'])} deactivated")
+        if verbose:
+            for employee_id in plan["new_guards"]:
+                self.stdout.write(f"  + {employee_id} {plan['names'][employee_id]}")
+            for employee_id in plan["changed_guards"]:
+                self.stdout.write(f"  ~ {employee_id} {plan['old_names'][employee_id]} -> {plan['names'][employee_id]}")
+            for employee_id in plan["reactivated"]:
+                self.stdout.write(f"  ↑ {employee_id} reactivated")
+            for employee_id in plan["deactivated"]:
+                self.stdout.write(f"  ↓ {employee_id} deactivated")
+
+        stale = len(plan["stale_assignments"])
+        self.stdout.write(f"Location shifts: {len(plan['new_assignments'])} new, {plan['kept_assignments']} existing, "
+                          f"{stale} not in the file" + (" (removed)" if options["replace"] else ""))
+        if verbose:
+            for employee_id, location, shift in plan["new_assignments"]:
+                self.stdout.write(f"  + guard {employee_id}: location {location}, shift {shift}")
+
+    def write(self, plan, options):
+        batch_size = options["batch_size"]
+        now = timezone.now()
+
+        active = plan["active"]
+
+        with transaction.atomic():
+            # is_active is only written for the guards whose row sets it, so a deactivation made in the app stays
+            upserts = {True: [], False: []}
+            for employee_id in plan["new_guards"] + plan["changed_guards"]:
+                upserts[employee_id in active].append(SecurityGuard(
+                    employee_id=employee_id, name=plan["names"][employee_id],
+                    is_active=active.get(employee_id, True), updated_at=now))
+            for sets_active, guards in upserts.items():
+                update_fields = ["name", "is_active", "updated_at"] if sets_active else ["name", "updated_at"]
+                for batch in chunks(guards, batch_size):
+                    SecurityGuard.objects.bulk_create(batch, update_conflicts=True, unique_fields=["employee_id"],
+                                                      update_fields=update_fields)
+
+            # the ids of the guards created above
+            guard_ids = dict(SecurityGuard.objects.values_list("employee_id", "id"))
+            # the table has no other columns: a conflicting row is already there
+            assignments = [SecurityGuardLocationShift(guard_id=guard_ids[employee_id], location_id=location,
+                                                      shift_id=shift)
+                           for employee_id, location, shift in plan["new_assignments"]]
+            for batch in chunks(assignments, batch_size):
+                SecurityGuardLocationShift.objects.bulk_create(batch, ignore_conflicts=True)
+
+            if options["replace"]:
+                for batch in chunks(plan["stale_assignments"], batch_size):
+                    SecurityGuardLocationShift.objects.filter(id__in=batch).delete()
+
+            # bulk_create doesn't send post_save
+            response_cache.invalidate(response_cache.GUARDS, response_cache.LOCATION_SHIFTS)
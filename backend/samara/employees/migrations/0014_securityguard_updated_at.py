@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0013_employee_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securityguard',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='اخر تعديل'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-18 20:49
+
+import django.db.models.deletion
+import samara.files
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0014_securityguard_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='الشهر')),
+                ('format', models.CharField(choices=[('xlsx', 'Excel'), ('csv', 'CSV (ملف مضغوط)')], default='xlsx', max_length=10, verbose_name='الصيغة')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('running', 'جاري التصدير'), ('completed', 'مكتمل'), ('failed', 'فشل')], default='pending', max_length=10, verbose_name='الحالة')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='نسبة الإنجاز')),
+                ('rows_written', models.PositiveIntegerField(default=0, verbose_name='عدد الصفوف')),
+                ('file', models.FileField(blank=True, null=True, storage=samara.files.PrivateFileStorage('REPORT_EXPORT_DIR'), upload_to='exports/', verbose_name='الملف')),
+                ('error', models.TextField(blank=True, verbose_name='الخطأ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الانتهاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخر تحديث')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_exports', to=settings.AUTH_USER_MODEL, verbose_name='أُنشئ بواسطة')),
+            ],
+            options={
+                'verbose_name': 'تصدير تقرير',
+                'verbose_name_plural': 'تصدير التقارير',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from users.models import User
 from projects.models import Location
+from samara.files import PrivateFileStorage
 
 
 class Employee(models.Model):
@@ -84,11 +85,6 @@ class Employee(models.Model):
     def __str__(self):
         return f"{self.name} ({self.employee_id})"
 
-    def delete(self, using=None, keep_parents=False):
-        if self.image:
-            self.image.delete()
-        return super().delete(using, keep_parents)
-
 
 class Shift(models.Model):
     class ShiftChoices(models.TextChoices):
@@ -110,6 +106,7 @@ class SecurityGuard(models.Model):
     )
 
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("اخر تعديل"))
 
     def __str__(self):
         return f"{self.employee_id} - {self.name}"
@@ -137,3 +134,42 @@ class SecurityGuardLocationShift(models.Model):
 
     def __str__(self):
         return f"{self.guard.name} - {self.location.name} - {self.shift.name}"
+
+
+class ReportExport(models.Model):
+    """A monthly workbook of all supervisors' visits, violations and attendance, built in the background."""
+
+    class Format(models.TextChoices):
+        XLSX = "xlsx", _("Excel")
+        CSV = "csv", _("CSV (ملف مضغوط)")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("في الانتظار")
+        RUNNING = "running", _("جاري التصدير")
+        COMPLETED = "completed", _("مكتمل")
+        FAILED = "failed", _("فشل")
+
+    month = models.DateField(verbose_name=_("الشهر"))
+    format = models.CharField(max_length=10, choices=Format.choices, default=Format.XLSX,
+                              verbose_name=_("الصيغة"))
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING,
+                              verbose_name=_("الحالة"))
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name=_("نسبة الإنجاز"))
+    rows_written = models.PositiveIntegerField(default=0, verbose_name=_("عدد الصفوف"))
+    file = models.FileField(upload_to="exports/", storage=PrivateFileStorage("REPORT_EXPORT_DIR"), blank=True,
+                            null=True, verbose_name=_("الملف"))
+    error = models.TextField(blank=True, verbose_name=_("الخطأ"))
+
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="report_exports",
+                                   verbose_name=_("أُنشئ بواسطة"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("تاريخ الإنشاء"))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("تاريخ الانتهاء"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("آخر تحديث"))
+
+    class Meta:
+        verbose_name = _("تصدير تقرير")
+        verbose_name_plural = _("تصدير التقارير")
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.month.strftime('%Y-%m')} ({self.format}) - {self.status}"
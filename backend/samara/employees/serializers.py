@@ -1,10 +1,12 @@
 from django.db import IntegrityError
+from django.db.models import Prefetch
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
 from rest_framework.validators import UniqueTogetherValidator
 
 from users.models import User
-from .models import Employee, SecurityGuard, SecurityGuardLocationShift, Shift
+from .models import Employee, SecurityGuard, SecurityGuardLocationShift, Shift, ReportExport
 
 
 class EmployeeReadSerializer(serializers.ModelSerializer):
@@ -77,6 +79,12 @@ class SecurityGuardSerializer(serializers.ModelSerializer):
         model = SecurityGuard
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related(Prefetch(
+            "location_shifts",
+            queryset=SecurityGuardLocationShift.objects.select_related("location__project", "shift")))
+
     def get_location_shifts(self, obj: SecurityGuard):
         return [{"location": f"{loc.location.project.name} - {loc.location.name}", "shift": loc.shift.name} for loc in
                 obj.location_shifts.all()]
@@ -135,3 +143,23 @@ class LocationShiftSerializer(serializers.ModelSerializer):
             raise ValidationError(
                 {"non_field_errors": "هذا الحارس لديه نفس الوردية في نفس الموقع بالفعل."}
             )
+
+
+class ReportExportSerializer(serializers.ModelSerializer):
+    month = serializers.DateField(input_formats=["%Y-%m", "iso-8601"], format="%Y-%m")
+    file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportExport
+        exclude = ["created_by"]
+        read_only_fields = ["status", "progress", "rows_written", "error", "created_at", "finished_at",
+                            "updated_at"]
+
+    def validate_month(self, value):
+        return value.replace(day=1)
+
+    def get_file(self, obj: ReportExport):
+        """The authenticated download URL; the file itself has no public one."""
+        if obj.status != ReportExport.Status.COMPLETED or not obj.file:
+            return None
+        return reverse("report-export-download", args=[obj.pk], request=self.context.get("request"))
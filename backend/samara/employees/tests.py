@@ -1,3 +1,438 @@
+import io
+import tempfile
+import zipfile
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+from rest_framework.test import APIClient
+
+from attendance.models import ShiftAttendance, SecurityGuardAttendance
+from projects.models import Project, Location
+from samara.rest_framework_utils import response_cache
+from samara.testing import Endpoint, QueryBudgetTestCase
+from users.models import User
+from visits.daily_stats import rebuild_daily_stats
+from visits.models import Visit, Violation
+from . import exports
+from .models import Employee, ReportExport, SecurityGuard, SecurityGuardLocationShift, Shift
+
+
+def create_employees(count, role, created_by, prefix="emp"):
+    users = User.objects.bulk_create(
+        [User(username=f"{prefix}{i}", role=role) for i in range(count)]
+    )
+    return Employee.objects.bulk_create(
+        [Employee(employee_id=f"{prefix}{i}", name=f"{prefix} {i}", phone="0500000000",
+                  national_id=f"{prefix}-{i}", created_by=created_by, user=user)
+         for i, user in enumerate(users)]
+    )
+
+
+class ModeratorHomeStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.today().astimezone(settings.SAUDI_TZ).date()
+        cls.moderator = User.objects.create_user("moderator", "password", role=User.RoleChoices.SYS_USER)
+        create_employees(1, User.RoleChoices.SYS_USER, cls.moderator, prefix="moderator")
+
+        project = Project.objects.create(name="project")
+        cls.location = Location.objects.create(name="location", project=project)
+        cls.guard = SecurityGuard.objects.create(name="guard", employee_id=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.moderator)
+
+    def add_supervisors(self, count, prefix):
+        supervisors = create_employees(count, User.RoleChoices.SUPERVISOR, self.moderator, prefix=prefix)
+        Visit.objects.bulk_create(
+            [Visit(location=self.location, employee=s, date=self.today, time=time(10, 0), purpose="-",
+                   status=Visit.VisitStatus.COMPLETED) for s in supervisors] +
+            [Visit(location=self.location, employee=s, date=self.today + timedelta(days=1), time=time(2, 0),
+                   purpose="-") for s in supervisors]
+        )
+        rebuild_daily_stats(self.today, self.today)
+        return supervisors
+
+    def get_stats(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("moderator-home-stats"))
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_stats_content(self):
+        supervisors = self.add_supervisors(2, "sup")
+        shift_attendance = ShiftAttendance.objects.create(location=self.location, date=self.today,
+                                                          shift=Shift.objects.get(name=Shift.ShiftChoices.FIRST),
+                                                          created_by=supervisors[0])
+        SecurityGuardAttendance.objects.create(security_guard=self.guard, shift=shift_attendance,
+                                               status=SecurityGuardAttendance.AttendanceStatus.LATE)
+
+        data, _ = self.get_stats()
+
+        self.assertEqual(data["general"], {"projects_count": 1, "locations_count": 1,
+                                           "security_guards_count": {"active": 1, "inactive": 0},
+                                           "supervisors_count": 2})
+        self.assertEqual(data["today_visits"], {"morning": {"total": 2, "completed": 2, "scheduled": 0},
+                                                "evening": {"total": 2, "completed": 0, "scheduled": 2}})
+        self.assertEqual(data["supervisors"][0], {"name": supervisors[0].name, "id": supervisors[0].id,
+                                                  "morning": {"total": 1, "completed": 1, "scheduled": 0},
+                                                  "evening": {"total": 1, "completed": 0, "scheduled": 1}})
+        self.assertEqual([item["value"] for item in data["attendance"]], [0, 1, 0, 0])
+        self.assertEqual([item["value"] for item in data["shifts"]], [1, 0, 0])
+        self.assertEqual(data["shifts_count"], 1)
+
+    def test_query_count_is_independent_of_supervisors(self):
+        self.add_supervisors(5, "small")
+        _, small_count = self.get_stats()
+
+        self.add_supervisors(495, "large")
+        data, large_count = self.get_stats()
+
+        self.assertEqual(len(data["supervisors"]), 500)
+        self.assertEqual(small_count, large_count)
+
+
+class SupervisorHomeStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.today().astimezone(settings.SAUDI_TZ).date()
+        admin = User.objects.create_user("admin", "password", role=User.RoleChoices.ADMIN)
+        cls.supervisor, cls.other = create_employees(2, User.RoleChoices.SUPERVISOR, admin, prefix="sup")
+
+        project = Project.objects.create(name="project")
+        location = Location.objects.create(name="location", project=project)
+        for employee in (cls.supervisor, cls.other):
+            Visit.objects.create(location=location, employee=employee, date=cls.today, time=time(22, 0), purpose="-")
+        Visit.objects.create(location=location, employee=cls.supervisor, date=cls.today - timedelta(days=1),
+                             time=time(12, 0), purpose="-", status=Visit.VisitStatus.COMPLETED)
+        ShiftAttendance.objects.create(location=location, date=cls.today, created_by=cls.supervisor,
+                                       shift=Shift.objects.get(name=Shift.ShiftChoices.FIRST))
+
+    def get_stats(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(reverse("get-supervisor-home-stats"))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_supervisor_sees_own_counts(self):
+        data = self.get_stats(self.supervisor.user)
+
+        self.assertEqual(data["today"], {"scheduled": {"morning": 0, "evening": 1},
+                                         "completed": {"morning": 0, "evening": 0},
+                                         "violations": 0, "attendance_records": 1})
+        self.assertEqual(data["yesterday"]["completed"], {"morning": 1, "evening": 0})
+
+    def test_admin_sees_all_supervisors(self):
+        data = self.get_stats(User.objects.get(username="admin"))
+
+        self.assertEqual(data["today"]["scheduled"], {"morning": 0, "evening": 2})
+        self.assertEqual(data["general"]["guards_count"], {"active": 0, "inactive": 0})
+
+
+class SupervisorMonthlyRecordTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user("admin", "password", role=User.RoleChoices.ADMIN)
+        [cls.supervisor] = create_employees(1, User.RoleChoices.SUPERVISOR, admin, prefix="sup")
+        project = Project.objects.create(name="project")
+        location = Location.objects.create(name="location", project=project)
+
+        visits = (
+            (date(2025, 9, 30), time(22, 0)),  # previous month
+            (date(2025, 10, 1), time(3, 0)),  # evening of September 30th
+            (date(2025, 10, 1), time(23, 0)),
+            (date(2025, 10, 2), time(2, 0)),  # evening of October 1st
+            (date(2025, 10, 31), time(10, 0)),
+            (date(2025, 11, 1), time(4, 0)),  # evening of October 31st
+            (date(2025, 11, 1), time(22, 0)),  # next month
+        )
+        for visit_date, visit_time in visits:
+            Visit.objects.create(location=location, employee=cls.supervisor, date=visit_date, time=visit_time,
+                                 purpose="-")
+        for day in (date(2025, 10, 2), date(2025, 11, 1)):
+            Violation.objects.create(location=location, details="-", date=day, created_by=cls.supervisor,
+                                     violation_type=Violation.ViolationType.LATE,
+                                     severity=Violation.SeverityLevel.LOW)
+
+    def get_record(self, period):
+        client = APIClient()
+        client.force_authenticate(self.supervisor.user)
+        response = client.get(reverse("supervisor-monthly-records"),
+                              {"date": "2025-10-15", "supervisor": self.supervisor.id, "period": period})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_evening_visits_are_grouped_by_duty_day(self):
+        # November 1st's violation stays out of the 1st of October
+        self.assertEqual(self.get_record("evening"), {"1": {"completed": 0, "scheduled": 2},
+                                                      "2": {"completed": 0, "scheduled": 0, "violations": 1},
+                                                      "31": {"completed": 0, "scheduled": 1}})
+
+    def test_morning_visits(self):
+        self.assertEqual(self.get_record("morning"), {"2": {"completed": 0, "scheduled": 0, "violations": 1},
+                                                      "31": {"completed": 0, "scheduled": 1}})
+
+
+class ExplainHotQueriesTests(TestCase):
+    def test_no_hot_query_falls_back_to_a_full_scan(self):
+        call_command("explain_hot_queries", "--fail-on-scan", stdout=StringIO())
+
+
+class ReportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", "password", role=User.RoleChoices.ADMIN)
+        [cls.supervisor] = create_employees(1, User.RoleChoices.SUPERVISOR, cls.admin, prefix="sup")
+        location = Location.objects.create(name="location", project=Project.objects.create(name="project"))
+        guard = SecurityGuard.objects.create(name="guard", employee_id=1)
+
+        for day, visit_time in ((1, time(3, 0)), (1, time(10, 0)), (15, time(22, 0)), (31, time(12, 0))):
+            Visit.objects.create(location=location, employee=cls.supervisor, date=date(2025, 10, day),
+                                 time=visit_time, purpose="-")
+        Violation.objects.create(location=location, details="-", date=date(2025, 10, 2), created_by=cls.supervisor,
+                                 violation_type=Violation.ViolationType.LATE, severity=Violation.SeverityLevel.LOW)
+        shift = ShiftAttendance.objects.create(location=location, date=date(2025, 10, 3), created_by=cls.supervisor,
+                                               shift=Shift.objects.get(name=Shift.ShiftChoices.FIRST))
+        SecurityGuardAttendance.objects.create(security_guard=guard, shift=shift,
+                                               status=SecurityGuardAttendance.AttendanceStatus.PRESENT)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = self.settings(MEDIA_ROOT=f"{media.name}/media", REPORT_EXPORT_DIR=f"{media.name}/exports")
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def export(self, export_format):
+        export = ReportExport.objects.create(month=date(2025, 10, 1), format=export_format, created_by=self.admin)
+        exports.run_export(export.id)
+        export.refresh_from_db()
+        self.assertEqual(export.status, ReportExport.Status.COMPLETED, export.error)
+        return export
+
+    def test_xlsx_workbook(self):
+        export = self.export(ReportExport.Format.XLSX)
+
+        workbook = load_workbook(export.file.path, read_only=True)
+        rows = {sheet.title: list(sheet.values) for sheet in workbook.worksheets}
+        self.assertEqual(list(rows), ["ملخص المشرفين", "الزيارات", "المخالفات", "الحضور"])
+        self.assertEqual(rows["ملخص المشرفين"][1], ("sup0", "sup 0", 3, 0, 1, 1))
+        # the 3AM visit of the 1st belongs to September 30th
+        self.assertEqual(len(rows["الزيارات"]), 4)
+        self.assertEqual(rows["الحضور"][1][-5:], (1, "guard", "حاضر", None, "sup 0"))
+        self.assertEqual((export.progress, export.rows_written), (100, 6))
+
+    def test_csv_archive(self):
+        export = self.export(ReportExport.Format.CSV)
+
+        with zipfile.ZipFile(export.file.path) as archive:
+            self.assertEqual(len(archive.namelist()), 4)
+            violations = archive.read("المخالفات.csv").decode("utf-8-sig").splitlines()
+        self.assertEqual(len(violations), 2)
+        self.assertTrue(violations[1].startswith("2025-10-02,"))
+
+    def test_api_queues_and_polls(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        with self.settings(BACKGROUND_TASKS_EAGER=True), self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = client.post(reverse("report-export-list"), {"month": "2025-10", "format": "csv"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], ReportExport.Status.PENDING)
+        self.assertEqual(len(callbacks), 1)
+
+        data = client.get(reverse("report-export-detail", args=[response.json()["id"]])).json()
+        self.assertEqual((data["month"], data["status"], data["progress"]), ("2025-10", "completed", 100))
+
+        download = client.get(data["file"])
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('filename="report-2025-10.zip"', download["Content-Disposition"])
+        self.assertTrue(zipfile.is_zipfile(io.BytesIO(b"".join(download.streaming_content))))
+        export = ReportExport.objects.get(pk=data["id"])
+        self.assertFalse(export.file.path.startswith(str(settings.MEDIA_ROOT)))
+
+    def test_downloads_are_the_owners_only(self):
+        export = self.export(ReportExport.Format.CSV)
+        other = User.objects.create_user("other", "password", role=User.RoleChoices.ADMIN)
+        client = APIClient()
+
+        self.assertEqual(client.get(reverse("report-export-download", args=[export.id])).status_code, 401)
+        client.force_authenticate(other)
+        self.assertEqual(client.get(reverse("report-export-download", args=[export.id])).status_code, 404)
+        client.force_authenticate(self.supervisor.user)
+        self.assertEqual(client.get(reverse("report-export-download", args=[export.id])).status_code, 403)
+
+    def test_stale_exports_fail_when_polled(self):
+        stale = ReportExport.objects.create(month=date(2025, 10, 1), created_by=self.admin)
+        fresh = ReportExport.objects.create(month=date(2025, 9, 1), created_by=self.admin)
+        ReportExport.objects.filter(pk=stale.pk).update(
+            status=ReportExport.Status.RUNNING,
+            updated_at=timezone.now() - timedelta(minutes=settings.REPORT_EXPORT_STALE_MINUTES + 1))
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(reverse("report-export-list"))
+            self.assertEqual(client.get(reverse("report-export-detail", args=[fresh.id])).json()["status"], "pending")
+        self.assertFalse([query for query in ctx.captured_queries if query["sql"].startswith("UPDATE")])
+
+        self.assertEqual(client.get(reverse("report-export-detail", args=[stale.id])).json()["status"], "failed")
+        exports.run_export(stale.id)  # a worker picking it up late leaves it failed
+        self.assertEqual(ReportExport.objects.get(pk=stale.pk).status, ReportExport.Status.FAILED)
+
+    def test_supervisors_cannot_export(self):
+        client = APIClient()
+        client.force_authenticate(self.supervisor.user)
+        response = client.post(reverse("report-export-list"), {"month": "2025-10"})
+        self.assertEqual(response.status_code, 403)
+
+
+class ImportGuardsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        project = Project.objects.create(name="ابراج سمو")
+        cls.jeddah = Location.objects.create(name="جدة", project=project)
+        cls.makkah = Location.objects.create(name="مكة", project=project)
+        cls.first = Shift.objects.get(name=Shift.ShiftChoices.FIRST)
+        cls.second = Shift.objects.get(name=Shift.ShiftChoices.SECOND)
+        cls.guard = SecurityGuard.objects.create(name="old name", employee_id=100)
+        SecurityGuardLocationShift.objects.create(guard=cls.guard, location=cls.makkah, shift=cls.first)
+
+    def write_sheet(self, rows, extra_headers=()):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        workbook = Workbook()
+        workbook.active.append(["افراد مشاريع سمارا"])
+        workbook.active.append(["م", "الاسم", "الرقم الوظيفي", "المشروع", "اسم الفرع", "الورديه", *extra_headers])
+        for i, row in enumerate(rows, start=1):
+            workbook.active.append([i, *row])
+        path = f"{directory.name}/guards.xlsx"
+        workbook.save(path)
+        return path
+
+    def import_guards(self, path, *args):
+        stdout = StringIO()
+        call_command("import_guards", path, *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def assignments(self):
+        return set(SecurityGuardLocationShift.objects.values_list("guard__employee_id", "location__name",
+                                                                  "shift__name"))
+
+    def test_upserts_guards_and_location_shifts(self):
+        path = self.write_sheet([
+            ("new guard", 200, "ابراج سمو", "جدة", "الاولى"),
+            ("new name", 100, " ابراج  سمو", "جدة ", "الثانيه"),
+            ("resting guard", "300", "ابراج سمو", "جدة", "راحات"),
+        ])
+        guards_version = response_cache.namespace_versions([response_cache.GUARDS])
+
+        output = self.import_guards(path)
+        self.assertIn("Guards: 2 new, 1 updated, 0 unchanged", output)
+        self.assertIn("rows/s", output)
+        self.assertEqual(dict(SecurityGuard.objects.values_list("employee_id", "name")),
+                         {100: "new name", 200: "new guard", 300: "resting guard"})
+        self.assertEqual(self.assignments(), {(100, "مكة", self.first.name), (100, "جدة", self.second.name),
+                                              (200, "جدة", self.first.name)})
+        self.assertNotEqual(response_cache.namespace_versions([response_cache.GUARDS]), guards_version)
+
+        output = self.import_guards(path)
+        self.assertIn("Guards: 0 new, 0 updated, 3 unchanged", output)
+        self.assertIn("Location shifts: 0 new, 2 existing, 1 not in the file", output)
+
+    def test_queries_dont_grow_with_the_rows(self):
+        def queries(count, offset):
+            path = self.write_sheet([(f"guard {i}", i, "ابراج سمو", "جدة", "الاولى")
+                                     for i in range(offset, offset + count)])
+            with CaptureQueriesContext(connection) as context:
+                self.import_guards(path)
+            return len(context)
+
+        self.assertEqual(queries(3, 1000), queries(200, 2000))
+        self.assertEqual(SecurityGuardLocationShift.objects.filter(location=self.jeddah).count(), 203)
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write_sheet([("new guard", 200, "ابراج سمو", "جدة", "الاولى")])
+        output = self.import_guards(path, "--dry-run")
+        self.assertIn("Guards: 1 new", output)
+        self.assertFalse(SecurityGuard.objects.filter(employee_id=200).exists())
+
+    def test_unresolved_rows(self):
+        path = self.write_sheet([
+            ("new guard", 200, "ابراج سمو", "جدة", "الاولى"),
+            ("lost guard", 201, "ابراج سمو", "الرياض", "الاولى"),
+        ])
+        with self.assertRaises(CommandError):
+            self.import_guards(path)
+        self.assertFalse(SecurityGuard.objects.filter(employee_id=200).exists())
+
+        self.import_guards(path, "--skip-invalid")
+        self.assertEqual(self.assignments(), {(100, "مكة", self.first.name), (200, "جدة", self.first.name)})
+
+    def test_deactivated_guards_stay_inactive(self):
+        SecurityGuard.objects.filter(pk=self.guard.pk).update(is_active=False)
+
+        output = self.import_guards(self.write_sheet([("new name", 100, "ابراج سمو", "جدة", "الاولى")]))
+        self.assertIn("1 updated, 0 unchanged; 0 reactivated, 0 deactivated", output)
+        self.assertEqual(SecurityGuard.objects.filter(pk=self.guard.pk).values_list("name", "is_active").get(),
+                         ("new name", False))
+
+    def test_active_column(self):
+        SecurityGuard.objects.filter(pk=self.guard.pk).update(is_active=False)
+        path = self.write_sheet([("old name", 100, "ابراج سمو", "جدة", "الاولى", "نعم"),
+                                 ("new guard", 200, "ابراج سمو", "جدة", "الاولى", "لا"),
+                                 ("other guard", 201, "ابراج سمو", "جدة", "الاولى", None)], extra_headers=["نشط"])
+
+        output = self.import_guards(path)
+        self.assertIn("Guards: 2 new, 1 updated, 0 unchanged; 1 reactivated, 0 deactivated", output)
+        self.assertEqual(dict(SecurityGuard.objects.values_list("employee_id", "is_active")),
+                         {100: True, 200: False, 201: True})
+
+        with self.assertRaises(CommandError):
+            self.import_guards(self.write_sheet([("old name", 100, "ابراج سمو", "جدة", "الاولى", "?")],
+                                                extra_headers=["نشط"]))
+
+    def test_replace(self):
+        path = self.write_sheet([("old name", 100, "ابراج سمو", "جدة", "الاولى")])
+        self.import_guards(path, "--replace")
+        self.assertEqual(self.assignments(), {(100, "جدة", self.first.name)})
+
+
+def create_export(data):
+    return [ReportExport.objects.create(month=data["visits"][0].date.replace(day=1), created_by=data["admin"]).id]
+
 
-# Create your tests here.
+class EmployeeQueryBudgetTests(QueryBudgetTestCase):
+    endpoints = (
+        Endpoint("employee-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("employee-detail", args=lambda data: [data["employees"][0].id]),
+        Endpoint("employee-detailed", args=lambda data: [data["employees"][0].id]),
+        Endpoint("employee-form-data", args=lambda data: [data["employees"][0].id]),
+        Endpoint("security-guard-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("security-guard-list", params=lambda data: {"no_pagination": "true"}),
+        Endpoint("security-guard-detail", args=lambda data: [data["guards"][0].id]),
+        Endpoint("security-guard-detailed", args=lambda data: [data["guards"][0].id]),
+        Endpoint("security-guard-form-data", args=lambda data: [data["guards"][0].id]),
+        Endpoint("security-guard-location-shifts", args=lambda data: [data["guards"][0].id]),
+        Endpoint("location-shift-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("location-shift-detail", args=lambda data: [data["assignments"][0].id]),
+        Endpoint("report-export-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("report-export-detail", args=create_export),
+        Endpoint("get-supervisor-home-stats", user=lambda data: data["users"][0]),
+        Endpoint("moderator-home-stats"),
+        Endpoint("supervisor-monthly-records",
+                 params=lambda data: {"date": data["visits"][0].date, "supervisor": data["employees"][0].id,
+                                      "period": "morning"}),
+        Endpoint("supervisor-daily-records",
+                 params=lambda data: {"date": data["visits"][0].date, "supervisor": data["employees"][0].id}),
+    )
@@ -1,12 +1,13 @@
 from rest_framework.routers import DefaultRouter
 from .views import EmployeeViewSet, SecurityGuardViewSet, LocationShiftViewSet, SupervisorMonthlyRecord, \
-    SupervisorDailyRecord, multiple_delete, get_supervisor_home_stats, get_moderator_home_stats
+    SupervisorDailyRecord, ReportExportViewSet, get_supervisor_home_stats, get_moderator_home_stats
 from django.urls import path, include
 
 router = DefaultRouter()
 router.register('employees', EmployeeViewSet, basename='employee')
 router.register('security-guards', SecurityGuardViewSet, basename='security-guard')
 router.register('location-shifts', LocationShiftViewSet, basename='location-shift')
+router.register('report-exports', ReportExportViewSet, basename='report-export')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -14,5 +15,6 @@ urlpatterns = [
     path('get-moderator-home-stats/', get_moderator_home_stats, name="moderator-home-stats"),
     path('supervisor-monthly-records/', SupervisorMonthlyRecord.as_view(), name="supervisor-monthly-records"),
     path('supervisor-daily-records/', SupervisorDailyRecord.as_view(), name="supervisor-daily-records"),
-    path('multiple-delete/', multiple_delete, name="multiple-delete"),
+    # the old bulk delete route of the employees
+    path('multiple-delete/', EmployeeViewSet.as_view({"delete": "bulk_delete"}), name="multiple-delete"),
 ]
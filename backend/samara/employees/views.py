@@ -1,29 +1,35 @@
-from dateutil.relativedelta import relativedelta
 from rest_framework.response import Response
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, mixins
 from rest_framework.views import APIView
-from datetime import datetime, date, timedelta, time
+from datetime import datetime, date, timedelta
+from pathlib import Path
 from django.conf import settings
 from django.utils.dateparse import parse_date
-from django.http import JsonResponse
+from django.http import FileResponse, JsonResponse
 from django.db.models import Count, Q
-from collections import Counter
 
-from attendance.models import ShiftAttendance, SecurityGuardAttendance
+from attendance.models import ShiftAttendance
 from visits.models import Visit, Violation, filter_visits_by_period
 from visits.serializers import VisitReadSerializer, ViolationReadSerializer
+from samara.instrumentation import query_budget
+from samara.rest_framework_utils.bulk_delete import BulkDeleteMixin
+from samara.rest_framework_utils.conditional_get import ConditionalGetMixin
+from samara.rest_framework_utils.streaming import StreamingListMixin
+from samara.rest_framework_utils.response_cache import CachedListMixin, PROJECTS, LOCATIONS, GUARDS, \
+    LOCATION_SHIFTS
+from users.models import User
 from .serializers import EmployeeReadSerializer, EmployeeWriteSerializer, EmployeeListSerializer, \
-    SecurityGuardSerializer, LocationShiftSerializer
-from .models import Employee, SecurityGuard, SecurityGuardLocationShift
-from projects.models import Location, Project
+    SecurityGuardSerializer, LocationShiftSerializer, ReportExportSerializer
+from .models import Employee, SecurityGuard, SecurityGuardLocationShift, ReportExport
+from . import dashboard, exports
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from django.utils.translation import gettext_lazy as _
-from users.models import User
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(BulkDeleteMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()
+    query_budget = {"list": 3, "retrieve": 2, "detailed": 4, "form_data": 2}
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -72,12 +78,16 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             return Response({'detail': _('موظف غير موجود')}, status=status.HTTP_404_NOT_FOUND)
 
 
-class SecurityGuardViewSet(viewsets.ModelViewSet):
+class SecurityGuardViewSet(BulkDeleteMixin, ConditionalGetMixin, StreamingListMixin, CachedListMixin,
+                           viewsets.ModelViewSet):
     queryset = SecurityGuard.objects.all()
     serializer_class = SecurityGuardSerializer
+    cache_name = "security-guards"
+    cache_namespaces = (GUARDS, LOCATION_SHIFTS, LOCATIONS, PROJECTS)
+    query_budget = {"list": 5, "retrieve": 4, "detailed": 3, "form_data": 3, "location_shifts": 3}
 
     def get_queryset(self):
-        queryset = SecurityGuard.objects.all()
+        queryset = SecurityGuardSerializer.setup_eager_loading(SecurityGuard.objects.all())
 
         search = self.request.query_params.get('search', None)
         search_type = self.request.query_params.get('search_type', "name__icontains")
@@ -141,7 +151,7 @@ class SecurityGuardViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def detailed(self, request, pk=None):
         try:
-            guard = SecurityGuard.objects.get(pk=pk)
+            guard = SecurityGuardSerializer.setup_eager_loading(SecurityGuard.objects.all()).get(pk=pk)
             data = SecurityGuardSerializer(guard, context={"request": self.request}).data
             return Response(data)
         except Exception:
@@ -160,7 +170,7 @@ class SecurityGuardViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def form_data(self, request, pk=None):
         try:
-            guard = SecurityGuard.objects.get(id=pk)
+            guard = SecurityGuardSerializer.setup_eager_loading(SecurityGuard.objects.all()).get(id=pk)
             serializer = SecurityGuardSerializer(guard, context={"request": self.request}).data
             return Response(serializer)
         except Exception:
@@ -169,7 +179,7 @@ class SecurityGuardViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def location_shifts(self, request, pk=None):
         try:
-            guard = SecurityGuard.objects.get(id=pk)
+            guard = SecurityGuardSerializer.setup_eager_loading(SecurityGuard.objects.all()).get(id=pk)
             assignments = [
                 {"id": loc.id, "project": loc.location.project.name, "location": loc.location.name,
                  "shift": loc.shift.name} for loc
@@ -183,156 +193,66 @@ class SecurityGuardViewSet(viewsets.ModelViewSet):
 class LocationShiftViewSet(viewsets.ModelViewSet):
     queryset = SecurityGuardLocationShift.objects.all()
     serializer_class = LocationShiftSerializer
+    query_budget = {"list": 3, "retrieve": 2}
 
 
-@api_view(["DELETE"])
-def multiple_delete(request):
-    for emp_id in list(request.data):
-        emp = Employee.objects.filter(id=emp_id).first()
-        if emp:
-            emp.delete()
-    return Response()
-
+class ReportExportViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                          viewsets.GenericViewSet):
+    """Monthly report workbooks: POST queues one, GET polls its progress and ``download`` returns the file."""
+    serializer_class = ReportExportSerializer
+    query_budget = {"list": 3, "retrieve": 4, "download": 4}
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def get_moderator_home_stats(request):
-    date = datetime.today().astimezone(settings.SAUDI_TZ).date()
+    def get_queryset(self):
+        return ReportExport.objects.filter(created_by=self.request.user)
 
-    projects_count = Project.objects.count()
-    locations_count = Location.objects.count()
-    security_guards_count = SecurityGuard.objects.all()
-    supervisors = Employee.objects.filter(user__role=User.RoleChoices.SUPERVISOR)
-    supervisors_count = supervisors.count()
-
-    visits = Visit.objects.all()
-    morning_visits = filter_visits_by_period(visits, date, "morning")
-    evening_visits = filter_visits_by_period(visits, date, "evening")
-
-    data = {
-        "general": {
-            "projects_count": projects_count,
-            "locations_count": locations_count,
-            "security_guards_count": {"active": security_guards_count.filter(is_active=True).count(),
-                                      "inactive": security_guards_count.filter(is_active=False).count()},
-            "supervisors_count": supervisors_count,
-        },
-        "today_visits": {
-            "morning": {
-                "total": morning_visits.count(),
-                "completed": morning_visits.filter(status=Visit.VisitStatus.COMPLETED).count(),
-                "scheduled": morning_visits.filter(status=Visit.VisitStatus.SCHEDULED).count(),
-            },
-            "evening": {
-                "total": evening_visits.count(),
-                "completed": evening_visits.filter(status=Visit.VisitStatus.COMPLETED).count(),
-                "scheduled": evening_visits.filter(status=Visit.VisitStatus.SCHEDULED).count(),
-            }
-        },
-        "supervisors": [],
-        "attendance": None,
-        "shifts_count": None
-    }
-
-    for s in supervisors:
-        morning_visits = filter_visits_by_period(visits.filter(employee=s), date, "morning")
-        evening_visits = filter_visits_by_period(visits.filter(employee=s), date, "evening")
-        data["supervisors"].append(
-            {"name": s.name,
-             "id": s.id,
-             "morning": {
-                 "total": morning_visits.count(),
-                 "completed": morning_visits.filter(status=Visit.VisitStatus.COMPLETED).count(),
-                 "scheduled": morning_visits.filter(status=Visit.VisitStatus.SCHEDULED).count(),
-             },
-             "evening": {
-                 "total": evening_visits.count(),
-                 "completed": evening_visits.filter(status=Visit.VisitStatus.COMPLETED).count(),
-                 "scheduled": evening_visits.filter(status=Visit.VisitStatus.SCHEDULED).count(),
-             }
-             }
-        )
+    def retrieve(self, request, *args, **kwargs):
+        export = self.get_object()
+        # polling an export is what notices that its worker died
+        exports.fail_if_stale(export)
+        return Response(self.get_serializer(export).data)
 
-    guards = SecurityGuardAttendance.objects.filter(shift__date=date)
-    status_counts = Counter(guard.status for guard in guards)
+    def create(self, request, *args, **kwargs):
+        if request.user.role == User.RoleChoices.SUPERVISOR:
+            return Response({"detail": _("غير مسموح بتصدير تقارير جميع المشرفين")}, status=status.HTTP_403_FORBIDDEN)
 
-    data["attendance"] = [
-        {"name": " الحضور", "value": status_counts.get("حاضر", 0), "color": "#4ade80"},  # green
-        {"name": " التأخير", "value": status_counts.get("متأخر", 0), "color": "#facc15"},  # yellow
-        {"name": " الغياب", "value": status_counts.get("غائب", 0), "color": "#f87171"},  # red
-        {"name": " الراحة", "value": status_counts.get("راحة", 0), "color": "#60a5fa"},  # blue
-    ]
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        export = serializer.save(created_by=request.user)
+        exports.start_export(export)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
-    shift_counts = Counter(guard.shift.shift.name for guard in guards)
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        if request.user.role == User.RoleChoices.SUPERVISOR:
+            return Response({"detail": _("غير مسموح بتصدير تقارير جميع المشرفين")}, status=status.HTTP_403_FORBIDDEN)
 
-    data["shifts"] = [
-        {"name": " الأولى", "value": shift_counts.get("الوردية الأولى", 0), "color": "#3b82f6"},  # blue
-        {"name": " الثانية", "value": shift_counts.get("الوردية الثانية", 0), "color": "#06b6d4"},  # cyan
-        {"name": " الثالثة", "value": shift_counts.get("الوردية الثالثة", 0), "color": "#a855f7"},  # purple
-    ]
+        export = self.get_object()
+        if export.status != ReportExport.Status.COMPLETED or not export.file:
+            return Response({"detail": _("التقرير غير جاهز بعد")}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(export.file.open("rb"), as_attachment=True, filename=Path(export.file.name).name)
 
-    data["shifts_count"] = ShiftAttendance.objects.filter(date=date).count()
 
+@query_budget(9)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_moderator_home_stats(request):
+    date = datetime.today().astimezone(settings.SAUDI_TZ).date()
+    data = dashboard.get_moderator_home_stats(date)
     return Response(data, status=status.HTTP_200_OK)
 
 
+@query_budget(6)
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_supervisor_home_stats(request):
-    user: User = request.user
     today = datetime.today().astimezone(settings.SAUDI_TZ).date()
-    yesterday = today - relativedelta(days=1)
-
-    visits = Visit.objects.filter()
-    violations = Violation.objects.all()
-    attendance_records = ShiftAttendance.objects.all()
-    if user.role == User.RoleChoices.SUPERVISOR:
-        employee = user.employee_profile
-        visits = visits.filter(employee=employee)
-        violations = Violation.objects.filter(created_by=employee)
-        attendance_records = ShiftAttendance.objects.filter(created_by=employee)
-
-    security_guards_count = SecurityGuard.objects.all()
-
-    data = {
-        "general": {"projects_count": Project.objects.count(),
-                    "locations_count": Location.objects.filter(is_active=True).count(),
-                    "guards_count": {"active": security_guards_count.filter(is_active=True).count(),
-                                     "inactive": security_guards_count.filter(is_active=False).count()}, },
-        "today": {
-            "scheduled": {
-                "morning": filter_visits_by_period(visits.filter(status=Visit.VisitStatus.SCHEDULED), today,
-                                                   "morning").count(),
-                "evening": filter_visits_by_period(visits.filter(status=Visit.VisitStatus.SCHEDULED), today,
-                                                   "evening").count()},
-            "completed": {
-                "morning": filter_visits_by_period(visits.filter(status=Visit.VisitStatus.COMPLETED), today,
-                                                   "morning").count(),
-                "evening": filter_visits_by_period(visits.filter(status=Visit.VisitStatus.COMPLETED), today,
-                                                   "evening").count()},
-            "violations": violations.filter(date=today).count(),
-            "attendance_records": attendance_records.filter(date=today).count(),
-        },
-        "yesterday": {
-            "scheduled": {
-                "morning": filter_visits_by_period(visits.filter(status=Visit.VisitStatus.SCHEDULED), yesterday,
-                                                   "morning").count(),
-                "evening": filter_visits_by_period(visits.filter(status=Visit.VisitStatus.SCHEDULED), yesterday,
-                                                   "evening").count()},
-            "completed": {
-                "morning": filter_visits_by_period(visits.filter(status=Visit.VisitStatus.COMPLETED), yesterday,
-                                                   "morning").count(),
-                "evening": filter_visits_by_period(visits.filter(status=Visit.VisitStatus.COMPLETED), yesterday,
-                                                   "evening").count()},
-            "violations": violations.filter(date=yesterday).count(),
-            "attendance_records": attendance_records.filter(date=yesterday).count(),
-        },
-    }
-
+    data = dashboard.get_supervisor_home_stats(request.user, today)
     return Response(data, status=status.HTTP_200_OK)
 
 
 class SupervisorMonthlyRecord(APIView):
+    query_budget = 3
+
     def get(self, request):
         # Parse date from query params or default to today
         date_str = request.GET.get("date")
@@ -353,59 +273,32 @@ class SupervisorMonthlyRecord(APIView):
         else:
             next_month = first_day.replace(month=first_day.month + 1, day=1)
 
-        # set the last_day of the month in case of morning period,
-        # and include the first day in next month in case of evening
-
-        last_day = (next_month - timedelta(days=1)) if period == "morning" else next_month
+        last_day = next_month - timedelta(days=1)
 
+        # evening visits after midnight have the previous duty day, so the month's visits are its duty days
         queryset = Visit.objects.filter(
-            date__range=(first_day, last_day),
+            duty_date__range=(first_day, last_day),
             employee_id=supervisor,
         )
 
         # check the period for filtering
-        if period == "morning":
-            start_time = time(9, 0)
-            end_time = time(20, 59)
-            queryset = queryset.filter(
-                time__range=(start_time, end_time),
-            )
-        elif period == "evening":
-            start_time = time(21, 0)
-            end_time = time(8, 59)
-            queryset = queryset.filter(
-                Q(time__gte=start_time) | Q(time__lte=end_time),
-            )
+        if period in Visit.Period.values:
+            queryset = queryset.filter(period=period)
 
         # Merge data by day
         summary = {}
 
-        if period == "morning":
-            # Get completed visits count per day
-            visits_data = (
-                queryset
-                .values("date")
-                .annotate(scheduled=Count("id", filter=Q(status=Visit.VisitStatus.SCHEDULED)),
-                          completed=Count("id", filter=Q(status=Visit.VisitStatus.COMPLETED)))
-            )
-            for v in visits_data:
-                d = v["date"]
-                summary[d.day] = {"completed": v["completed"], "scheduled": v["scheduled"]}
-
-        else:
-            for v in queryset:
-                d = v.date
-                if v.time < time(9, 0):
-                    d = d - timedelta(days=1)
-                    # TOP IMPORTANT: skip if date converted to previous month
-                    if d.month != first_day.month:
-                        continue
-
-                summary.setdefault(d.day, {"completed": 0, "scheduled": 0})
-                if v.status == Visit.VisitStatus.SCHEDULED:
-                    summary[d.day]["scheduled"] += 1
-                else:
-                    summary[d.day]["completed"] += 1
+        # Get visits count per duty day
+        visits_data = (
+            queryset
+            .values("duty_date")
+            .annotate(scheduled=Count("id", filter=Q(status=Visit.VisitStatus.SCHEDULED)),
+                      completed=Count("id", filter=Q(status=Visit.VisitStatus.COMPLETED)))
+            .order_by()
+        )
+        for v in visits_data:
+            d = v["duty_date"]
+            summary[d.day] = {"completed": v["completed"], "scheduled": v["scheduled"]}
 
         # Get violations count per day
         violations_data = (
@@ -429,6 +322,8 @@ class SupervisorMonthlyRecord(APIView):
 
 
 class SupervisorDailyRecord(APIView):
+    query_budget = 4
+
     def get(self, request):
         selected_date = parse_date(request.GET.get("date", None))
         supervisor = request.GET.get("supervisor", None)
@@ -437,7 +332,7 @@ class SupervisorDailyRecord(APIView):
         if not selected_date or not supervisor:
             return JsonResponse({"error": "Invalid date"}, status=400)
 
-        queryset = Visit.objects.filter(employee_id=supervisor)
+        queryset = VisitReadSerializer.setup_eager_loading(Visit.objects.filter(employee_id=supervisor))
         if period is not None:
             visits = filter_visits_by_period(queryset, selected_date, period)
         else:
@@ -445,6 +340,7 @@ class SupervisorDailyRecord(APIView):
 
         violations = (
             Violation.objects
+            .select_related("location__project", "security_guard", "created_by")
             .filter(created_by_id=supervisor)
             # .annotate(local_date=TruncDate("created_at", tzinfo=settings.SAUDI_TZ))
             .filter(date=selected_date))
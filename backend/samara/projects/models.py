@@ -9,6 +9,8 @@ class Project(models.Model):
         help_text=_("أدخل اسم المشروع"),
     )
 
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("اخر تعديل"))
+
     class Meta:
         verbose_name = _("مشروع")
         verbose_name_plural = _("المشاريع")
@@ -1,7 +1,13 @@
+from django.db.models import Count, Prefetch
 from rest_framework import serializers
 from .models import Project, Location
 
 
+def prefetch_locations_with_guard_counts():
+    """The project's locations in one query, each annotated with its number of guard shifts."""
+    return Prefetch("locations", queryset=Location.objects.annotate(guards_count=Count("guard_shifts")))
+
+
 class ProjectSerializer(serializers.ModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name='project-detail')
 
@@ -18,11 +24,15 @@ class ProjectReadSerializer(serializers.ModelSerializer):
         model = Project
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related(prefetch_locations_with_guard_counts())
+
     def get_locations_count(self, obj: Project):
-        return obj.locations.count()
+        return len(obj.locations.all())
 
     def get_guards_total(self, obj: Project):
-        return sum(loc.guard_shifts.count() for loc in obj.locations.all())
+        return sum(loc.guards_count for loc in obj.locations.all())
 
 
 class ProjectListSerializer(serializers.ModelSerializer):
@@ -33,11 +43,15 @@ class ProjectListSerializer(serializers.ModelSerializer):
         model = Project
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related(prefetch_locations_with_guard_counts())
+
     def get_locations(self, obj: Project):
         return [{"name": loc.name, "id": loc.id} for loc in obj.locations.all()]
 
     def get_guards_count(self, obj: Project):
-        return [{"name": loc.name, "count": loc.guard_shifts.count()} for loc in obj.locations.all()]
+        return [{"name": loc.name, "count": loc.guards_count} for loc in obj.locations.all()]
 
 
 class LocationSerializer(serializers.ModelSerializer):
@@ -49,5 +63,9 @@ class LocationSerializer(serializers.ModelSerializer):
         model = Location
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("project")
+
     def get_display_name(self, obj):
         return f"{obj.project.name} - {obj.name}"
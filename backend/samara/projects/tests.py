@@ -1,3 +1,136 @@
-from django.test import TestCase
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from employees.models import SecurityGuard, SecurityGuardLocationShift, Shift
+from samara.rest_framework_utils.response_cache import CACHE_ALIAS, response_cache_stats
+from samara.testing import Endpoint, QueryBudgetTestCase
+from users.models import User
+from .models import Project, Location
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", "password", role=User.RoleChoices.ADMIN)
+        cls.moderator = User.objects.create_user("moderator", "password", role=User.RoleChoices.SYS_USER)
+        cls.project = Project.objects.create(name="project")
+        cls.location = Location.objects.create(name="location", project=cls.project)
+        cls.guard = SecurityGuard.objects.create(name="guard", employee_id=1)
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_repeated_list_is_served_from_cache(self):
+        first, first_queries = self.get(reverse("location-list"))
+        second, second_queries = self.get(reverse("location-list"))
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(second_queries, 0)
+        self.assertEqual(response_cache_stats()["locations"], {"hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_keyed_on_query_params_and_role(self):
+        self.get(reverse("location-list"), {"is_active": "active"})
+
+        self.assertEqual(self.get(reverse("location-list"), {"is_active": "inactive"})[0]["X-Cache"], "MISS")
+        self.client.force_authenticate(self.moderator)
+        self.assertEqual(self.get(reverse("location-list"), {"is_active": "active"})[0]["X-Cache"], "MISS")
+
+    def test_saving_a_dependency_invalidates(self):
+        self.get(reverse("project-list"))
+        self.location.name = "renamed"
+        self.location.save()
+
+        response, _ = self.get(reverse("project-list"))
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_unrelated_change_keeps_the_cache(self):
+        self.get(reverse("location-list"))
+        SecurityGuard.objects.create(name="other", employee_id=2)
+
+        self.assertEqual(self.get(reverse("location-list"))[0]["X-Cache"], "HIT")
+
+    def test_project_guards_follow_assignments(self):
+        url = reverse("project-guards")
+        response, _ = self.get(url, {"project": self.project.id})
+        self.assertEqual(response.json()["count"], 0)
+
+        SecurityGuardLocationShift.objects.create(guard=self.guard, location=self.location,
+                                                  shift=Shift.objects.get(name=Shift.ShiftChoices.FIRST))
+
+        response, _ = self.get(url, {"project": self.project.id})
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_stats_are_admin_only(self):
+        self.assertEqual(self.client.get(reverse("response-cache-stats")).status_code, 200)
+        self.client.force_authenticate(self.moderator)
+        self.assertEqual(self.client.get(reverse("response-cache-stats")).status_code, 403)
+
+
+class NoPaginationLimitTests(TestCase):
+    def test_unpaginated_lists_are_capped(self):
+        project = Project.objects.create(name="project")
+        Location.objects.bulk_create([Location(name=f"location {i}", project=project) for i in range(5)])
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("admin", "password", role=User.RoleChoices.ADMIN))
+
+        with self.settings(NO_PAGINATION_LIMIT=5, RESPONSE_CACHE_ENABLED=False):
+            self.assertEqual(len(client.get(reverse("location-list"), {"no_pagination": "true"}).json()), 5)
+        with self.settings(NO_PAGINATION_LIMIT=4, RESPONSE_CACHE_ENABLED=False):
+            self.assertEqual(client.get(reverse("location-list"), {"no_pagination": "true"}).status_code, 400)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class ProjectGuardCountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(name="project")
+        busy = Location.objects.create(name="busy", project=cls.project)
+        Location.objects.create(name="empty", project=cls.project)
+        shift = Shift.objects.get(name=Shift.ShiftChoices.FIRST)
+        SecurityGuardLocationShift.objects.bulk_create(
+            [SecurityGuardLocationShift(guard=SecurityGuard.objects.create(name=f"guard {i}", employee_id=i + 1),
+                                        location=busy, shift=shift) for i in range(3)])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("admin", "password", role=User.RoleChoices.ADMIN))
+
+    def test_list_details_counts_guards_per_location(self):
+        project = self.client.get(reverse("project-list"), {"list_details": "true"}).json()["data"][0]
+
+        self.assertCountEqual(project["guards_count"], [{"name": "busy", "count": 3}, {"name": "empty", "count": 0}])
+        self.assertCountEqual([location["name"] for location in project["locations"]], ["busy", "empty"])
+
+    def test_detailed_totals(self):
+        project = self.client.get(reverse("project-detailed", args=[self.project.id])).json()
+
+        self.assertEqual(project["locations_count"], 2)
+        self.assertEqual(project["guards_total"], 3)
+
+
+class ProjectQueryBudgetTests(QueryBudgetTestCase):
+    endpoints = (
+        Endpoint("project-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("project-list", params=lambda data: {"page_size": 1000, "list_details": "true"}),
+        Endpoint("project-detail", args=lambda data: [data["projects"][0].id]),
+        Endpoint("project-detailed", args=lambda data: [data["projects"][0].id]),
+        Endpoint("project-form-data", args=lambda data: [data["projects"][0].id]),
+        Endpoint("location-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("location-detail", args=lambda data: [data["locations"][0].id]),
+        Endpoint("project-guards", params=lambda data: {"project": data["projects"][0].id, "page_size": 1000}),
+    )
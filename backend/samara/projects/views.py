@@ -3,15 +3,22 @@ from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 
 from employees.models import SecurityGuardLocationShift
+from samara.instrumentation import query_budget
+from samara.rest_framework_utils.conditional_get import ConditionalGetMixin
 from samara.rest_framework_utils.custom_pagination import CustomPageNumberPagination
+from samara.rest_framework_utils.response_cache import CachedListMixin, cache_response, PROJECTS, LOCATIONS, \
+    GUARDS, LOCATION_SHIFTS
 from .models import Project, Location
 from .serializers import ProjectSerializer, LocationSerializer, ProjectListSerializer, ProjectReadSerializer
 from rest_framework.viewsets import ModelViewSet
 from django.utils.translation import gettext_lazy as _
 
 
-class ProjectViewSet(ModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, CachedListMixin, ModelViewSet):
     queryset = Project.objects.all()
+    cache_name = "projects"
+    cache_namespaces = (PROJECTS, LOCATIONS, LOCATION_SHIFTS)
+    query_budget = {"list": 5, "retrieve": 3, "detailed": 3, "form_data": 2}
 
     def get_serializer_class(self):
         list_details = self.request.query_params.get('list_details', False)
@@ -28,6 +35,9 @@ class ProjectViewSet(ModelViewSet):
         if search:
             queryset = queryset.filter(name__icontains=search)
 
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "setup_eager_loading"):
+            queryset = serializer_class.setup_eager_loading(queryset)
         return queryset
 
     @action(detail=True, methods=['get'])
@@ -42,19 +52,22 @@ class ProjectViewSet(ModelViewSet):
     @action(detail=True, methods=['get'])
     def detailed(self, request, pk=None):
         try:
-            project = Project.objects.get(pk=pk)
+            project = ProjectReadSerializer.setup_eager_loading(Project.objects.all()).get(pk=pk)
             data = ProjectReadSerializer(project, context={"request": self.request}).data
             return Response(data)
         except Exception:
             return Response({'detail': _('مشروع غير موجود')}, status=status.HTTP_404_NOT_FOUND)
 
 
-class LocationViewSet(ModelViewSet):
+class LocationViewSet(CachedListMixin, ModelViewSet):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
+    query_budget = {"list": 3, "retrieve": 2}
+    cache_name = "locations"
+    cache_namespaces = (LOCATIONS, PROJECTS)
 
     def get_queryset(self):
-        queryset = Location.objects.all()
+        queryset = LocationSerializer.setup_eager_loading(Location.objects.all())
 
         project_id = self.request.query_params.get('project_id')
 
@@ -81,7 +94,9 @@ class LocationViewSet(ModelViewSet):
             return Response({'detail': _('موقع غير موجود')}, status=status.HTTP_404_NOT_FOUND)
 
 
+@query_budget(4)
 @api_view(["GET"])
+@cache_response("project-guards", PROJECTS, LOCATIONS, GUARDS, LOCATION_SHIFTS)
 def get_project_guards(request):
     project_id = request.query_params.get('project', None)
     location = request.query_params.get('location', [])
@@ -92,7 +107,8 @@ def get_project_guards(request):
 
     try:
         project = Project.objects.get(pk=project_id)
-        location_shifts = SecurityGuardLocationShift.objects.filter(location__project_id=project.id)
+        location_shifts = SecurityGuardLocationShift.objects.filter(location__project_id=project.id) \
+            .select_related("guard", "location", "shift")
 
         if len(location) > 0:
             location_filters = location.split(',')
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class SamaraConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'samara'
+
+    def ready(self):
+        import samara.signals
+        from .sqlite import connect_sqlite_tuning
+        connect_sqlite_tuning()
+        from .instrumentation import install
+        install()
@@ -0,0 +1,47 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# queue -> its thread pool, created on first use; every queue runs in order on its own threads, so a long
+# export doesn't hold up the image variants
+_executors = {}
+_lock = threading.Lock()
+
+
+def _executor(queue) -> ThreadPoolExecutor:
+    with _lock:
+        if queue not in _executors:
+            workers = getattr(settings, "BACKGROUND_WORKERS", {}).get(queue, 1)
+            _executors[queue] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"background-{queue}")
+        return _executors[queue]
+
+
+def _run(function, args):
+    try:
+        function(*args)
+    except Exception:
+        logger.exception("Background task %s failed", function.__qualname__)
+    finally:
+        # the worker thread's own connection, never reused by a request
+        connection.close()
+
+
+def run_after_commit(function, *args, queue="default"):
+    """
+    Runs ``function(*args)`` on a worker thread of ``queue`` once the current transaction is committed
+    (right away outside of one), so the request neither waits for it nor holds its transaction open.
+    With BACKGROUND_TASKS_EAGER it runs in the committing thread instead, e.g. in tests.
+    """
+
+    def submit():
+        if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+            function(*args)
+        else:
+            _executor(queue).submit(_run, function, args)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,60 @@
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+from django.utils.deconstruct import deconstructible
+
+from .background import run_after_commit
+
+logger = logging.getLogger(__name__)
+
+
+@deconstructible
+class PrivateFileStorage(FileSystemStorage):
+    """
+    Files under the directory of the ``setting`` instead of MEDIA_ROOT, so no public URL reaches them:
+    they are served by views checking the user.
+    """
+
+    def __init__(self, setting):
+        self.setting = setting
+        super().__init__()
+
+    @property
+    def base_location(self):
+        return getattr(settings, self.setting)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError(f"{name} is private and has no URL")
+
+
+def stored_files(instance) -> list:
+    """(storage, name) of every file an instance references."""
+    files = []
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, FileField):
+            file = getattr(instance, field.attname)
+            if file:
+                files.append((file.storage, file.name))
+    return files
+
+
+def delete_files(files):
+    for storage, name in files:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning("Couldn't delete %s", name, exc_info=True)
+
+
+def delete_files_on_commit(files):
+    """Removes the files in the background once the transaction deleting their rows is committed."""
+    # file removal is slow on network storages and must not hold the request (or its transaction)
+    if files:
+        run_after_commit(delete_files, files)
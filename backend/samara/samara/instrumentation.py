@@ -0,0 +1,255 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of the histogram buckets
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+PERCENTILES = (50, 90, 95, 99)
+SAMPLES_KEPT = 1000  # per endpoint, for the percentiles
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(queries):
+    """Declares the most SQL queries a function view may issue; put it above ``@api_view``."""
+
+    def decorator(view):
+        view.query_budget = queries
+        return view
+
+    return decorator
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def recording(self):
+        """Context manager recording the queries of every database connection."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self.record_query))
+        return stack
+
+
+def current_metrics() -> RequestMetrics | None:
+    return getattr(_local, "metrics", None)
+
+
+def _timed_data(data_property):
+    """Adds the time spent in a serializer's ``.data`` (outermost serializer only) to the request's metrics."""
+
+    @wraps(data_property.fget)
+    def data(self):
+        metrics = current_metrics()
+        if metrics is None or metrics.serializing:
+            return data_property.fget(self)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return data_property.fget(self)
+        finally:
+            metrics.serialize += time.perf_counter() - started
+            metrics.serializing = False
+
+    return property(data)
+
+
+def install():
+    """Times the serializers; called once from ``SamaraConfig.ready``."""
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(serializer_class.data.fget, "__wrapped__", None):
+            serializer_class.data = _timed_data(serializer_class.data)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.over_budget = 0
+        self.samples = deque(maxlen=SAMPLES_KEPT)  # (total ms, db ms, serialize ms, queries)
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.query_histogram = [0] * (len(QUERY_BUCKETS) + 1)
+
+    def add(self, total, db, serialize, queries, over_budget):
+        self.requests += 1
+        self.over_budget += over_budget
+        self.samples.append((total, db, serialize, queries))
+        self.latency_histogram[bisect_left(LATENCY_BUCKETS_MS, total)] += 1
+        self.query_histogram[bisect_left(QUERY_BUCKETS, queries)] += 1
+
+
+def percentiles(values) -> dict:
+    values = sorted(values)
+    if not values:
+        return {}
+    summary = {f"p{p}": round(values[min(len(values) - 1, len(values) * p // 100)], 2) for p in PERCENTILES}
+    summary["max"] = round(values[-1], 2)
+    return summary
+
+
+def histogram(bounds, counts) -> dict:
+    labels = [f"<={bound}" for bound in bounds] + [f">{bounds[-1]}"]
+    return dict(zip(labels, counts))
+
+
+class MetricsStore:
+    """Per-process aggregates of the instrumented requests, by URL name."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.since = timezone.now()
+
+    def add(self, name, total, db, serialize, queries, over_budget):
+        with self.lock:
+            self.endpoints.setdefault(name, EndpointStats()).add(total, db, serialize, queries, over_budget)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            endpoints = {}
+            for name, stats in sorted(self.endpoints.items()):
+                total, db, serialize, queries = zip(*stats.samples)
+                endpoints[name] = {
+                    "requests": stats.requests,
+                    "over_budget": stats.over_budget,
+                    "total_ms": percentiles(total),
+                    "db_ms": percentiles(db),
+                    "serialize_ms": percentiles(serialize),
+                    "queries": percentiles(queries),
+                    "latency_histogram": histogram(LATENCY_BUCKETS_MS, stats.latency_histogram),
+                    "query_histogram": histogram(QUERY_BUCKETS, stats.query_histogram),
+                }
+            return {"process": os.getpid(), "since": self.since, "endpoints": endpoints}
+
+
+store = MetricsStore()
+
+
+def query_budget_of(request):
+    """``QUERY_BUDGETS[url name]``, else the view's ``query_budget`` (a dict per action for viewsets)."""
+    match = request.resolver_match
+    if match is None:
+        return None
+    budget = getattr(settings, "QUERY_BUDGETS", {}).get(match.view_name)
+    if budget is None:
+        budget = getattr(match.func, "query_budget", None)
+    if budget is None:
+        budget = getattr(getattr(match.func, "cls", None), "query_budget", None)
+    if isinstance(budget, dict):
+        action = (getattr(match.func, "actions", None) or {}).get(request.method.lower())
+        budget = budget.get(action)
+    return budget
+
+
+class InstrumentationMiddleware:
+    """
+    Counts the SQL queries and times the database, the serializers and the whole request, per
+    resolved URL name. The timings are sent in a ``Server-Timing`` header and aggregated for
+    ``/api/_metrics/``. Requests over their view's query budget are logged, and fail under the
+    test runner (``QUERY_BUDGETS_ENFORCED``).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "REQUEST_METRICS_ENABLED", True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+        started = time.perf_counter()
+        try:
+            with metrics.recording():
+                response = self.get_response(request)
+
+                # DRF responses are rendered by now: add the renderer to the serialization time
+                render_time = getattr(response, "_metrics_render_time", 0.0)
+                metrics.serialize += render_time
+        finally:
+            _local.metrics = None
+
+        if response.streaming:
+            # the rows are fetched and serialized while the body is sent
+            response.streaming_content = self.stream(request, response.streaming_content, metrics, started)
+        else:
+            self.finish(request, response, metrics, started)
+        return response
+
+    def process_template_response(self, request, response):
+        render = response.render
+
+        def timed_render():
+            render_started = time.perf_counter()
+            try:
+                return render()
+            finally:
+                response._metrics_render_time = time.perf_counter() - render_started
+
+        response.render = timed_render
+        return response
+
+    def stream(self, request, content, metrics, started):
+        _local.metrics = metrics
+        try:
+            with metrics.recording():
+                yield from content
+        finally:
+            _local.metrics = None
+            self.finish(request, None, metrics, started)
+
+    def finish(self, request, response, metrics, started):
+        total = time.perf_counter() - started
+        name = request.resolver_match.view_name if request.resolver_match else None
+
+        if response is not None:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={metrics.db * 1000:.1f};desc="{metrics.queries} queries"',
+                f"serialize;dur={metrics.serialize * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ])
+
+        if name is None:
+            return
+        budget = query_budget_of(request)
+        over_budget = budget is not None and metrics.queries > budget
+        store.add(name, total * 1000, metrics.db * 1000, metrics.serialize * 1000, metrics.queries, over_budget)
+
+        if over_budget:
+            message = f"{request.method} {name} issued {metrics.queries} queries, its budget is {budget}"
+            if getattr(settings, "QUERY_BUDGETS_ENFORCED", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
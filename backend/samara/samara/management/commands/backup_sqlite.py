@@ -0,0 +1,120 @@
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+BACKUP_PREFIX = "backup-"
+
+
+def backup_with_pages(source, target, pages, sleep):
+    """Copies `pages` pages per step and sleeps in between, so writers get the lock back."""
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst, pages=pages, sleep=sleep)
+
+
+def backup_with_vacuum(source, target):
+    """A single read transaction, which doesn't block writers when the source is in WAL mode."""
+    with closing(sqlite3.connect(source)) as src:
+        src.execute("VACUUM INTO ?", (str(target),))
+
+
+def verify_backup(path, source_tables):
+    with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as db:
+        result = db.execute("PRAGMA quick_check").fetchone()[0]
+        tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if result != "ok":
+        raise CommandError(f"Backup {path.name} failed the integrity check: {result}")
+    if missing := source_tables - tables:
+        raise CommandError(f"Backup {path.name} is missing tables: {', '.join(sorted(missing))}")
+
+
+def rotate_backups(directory, keep):
+    backups = sorted(directory.glob(f"{BACKUP_PREFIX}*.sqlite3"))
+    removed = backups[:-keep] if keep else []
+    for path in removed:
+        path.unlink()
+    return removed
+
+
+class Command(BaseCommand):
+    help = ("Online backup of the SQLite database that doesn't hold the database lock for the whole copy: "
+            "either copy a few pages per step with pauses (--method backup) or VACUUM INTO (--method vacuum, "
+            "preferred in WAL mode where a busy source would keep restarting a page copy). "
+            "Every backup is verified and the oldest ones beyond --keep are removed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", help="SQLite file to back up (default: the configured database).")
+        parser.add_argument("--output-dir", default=str(settings.BASE_DIR / "db" / "db_backup"))
+        parser.add_argument("--method", choices=("auto", "backup", "vacuum"), default="auto",
+                            help="auto: vacuum when the source is in WAL mode, paged backup otherwise.")
+        parser.add_argument("--pages", type=int, default=256, help="Pages copied per step (--method backup).")
+        parser.add_argument("--sleep", type=float, default=0.05, help="Seconds to pause between steps.")
+        parser.add_argument("--keep", type=int, default=24, help="Number of backups to keep (0 keeps all).")
+        parser.add_argument("--no-verify", action="store_false", dest="verify")
+        parser.add_argument("--interval", type=int, default=0,
+                            help="Repeat every N seconds instead of running once (for the backup container).")
+
+    def handle(self, *args, **options):
+        source = self.source_path(options["source"])
+        directory = Path(options["output_dir"])
+        directory.mkdir(parents=True, exist_ok=True)
+
+        if not options["interval"]:
+            self.backup(source, directory, options)
+            return
+
+        while True:
+            try:
+                self.backup(source, directory, options)
+            except (CommandError, sqlite3.Error) as e:
+                # a failed run must not stop the following ones
+                self.stderr.write(f"Backup failed: {e}")
+            time.sleep(options["interval"])
+
+    def source_path(self, source):
+        if not source:
+            database = connections["default"]
+            if database.vendor != "sqlite":
+                raise CommandError("The default database is not SQLite; use the database's own backup tools.")
+            source = database.settings_dict["NAME"]
+        source = Path(source)
+        if not source.is_file():
+            raise CommandError(f"SQLite database not found: {source}")
+        return source
+
+    def backup(self, source, directory, options):
+        with closing(sqlite3.connect(source)) as db:
+            journal_mode = db.execute("PRAGMA journal_mode").fetchone()[0]
+            tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+        method = options["method"]
+        if method == "auto":
+            method = "vacuum" if journal_mode == "wal" else "backup"
+
+        target = directory / f"{BACKUP_PREFIX}{datetime.now():%Y%m%d-%H%M%S-%f}.sqlite3"
+        partial = target.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+
+        started = time.monotonic()
+        try:
+            if method == "vacuum":
+                backup_with_vacuum(source, partial)
+            else:
+                backup_with_pages(source, partial, options["pages"], options["sleep"])
+            if options["verify"]:
+                verify_backup(partial, tables)
+        except Exception:
+            partial.unlink(missing_ok=True)
+            raise
+        partial.rename(target)
+        elapsed = time.monotonic() - started
+
+        size = target.stat().st_size / (1024 * 1024)
+        self.stdout.write(self.style.SUCCESS(f"{target.name}: {size:.1f}MB in {elapsed:.1f}s ({method})"))
+        for path in rotate_backups(directory, options["keep"]):
+            self.stdout.write(f"Removed {path.name}")
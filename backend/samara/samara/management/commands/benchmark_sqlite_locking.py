@@ -0,0 +1,139 @@
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.backends.signals import connection_created
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from attendance.views import record_shift_attendance
+from employees.models import Employee, SecurityGuard, Shift
+from employees.views import get_moderator_home_stats
+from projects.models import Project, Location
+from samara.sqlite import use_sqlite_database
+from users.models import User
+from visits.models import Visit
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+class Command(BaseCommand):
+    help = ("Measure lock contention on SQLite: writer threads record shift attendance while reader threads "
+            "load the moderator dashboard, once with the default journal and once with the tuned pragmas. "
+            "Runs against throw-away database files, the configured database is not touched.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=4, help="Threads recording shift attendance.")
+        parser.add_argument("--readers", type=int, default=8, help="Threads loading the dashboard.")
+        parser.add_argument("--guards", type=int, default=40, help="Guards per attendance record.")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds per round.")
+        parser.add_argument("--tuned-only", action="store_true", help="Skip the default-journal round.")
+
+    def handle(self, *args, **options):
+        # each round sets its own pragmas, whatever DB_SQLITE_TUNING says
+        connection_created.disconnect(dispatch_uid="samara.sqlite_tuning")
+
+        rounds = [True] if options["tuned_only"] else [False, True]
+        for tuned in rounds:
+            directory = Path(tempfile.mkdtemp(prefix="samara-bench-"))
+            try:
+                result = self.run_round(directory / "bench.sqlite3", tuned, options)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            self.report("tuned (WAL)" if tuned else "default journal", result, options["duration"])
+
+    def run_round(self, path, tuned, options):
+        with use_sqlite_database(path, tuned):
+            call_command("migrate", verbosity=0)
+            fixtures = self.seed(options["writers"], options["guards"])
+
+        results = {"write": [], "read": [], "errors": []}
+        deadline = time.monotonic() + options["duration"]
+        barrier = threading.Barrier(options["writers"] + options["readers"])
+        threads = [threading.Thread(target=self.writer, args=(path, tuned, i, fixtures, barrier, deadline, results))
+                   for i in range(options["writers"])]
+        threads += [threading.Thread(target=self.reader, args=(path, tuned, fixtures, barrier, deadline, results))
+                    for _ in range(options["readers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def seed(self, writers, guards_count):
+        admin = User.objects.create_user("bench-admin", "password", role=User.RoleChoices.ADMIN)
+        supervisor = User.objects.create_user("bench-supervisor", "password", role=User.RoleChoices.SUPERVISOR)
+        Employee.objects.create(employee_id="bench-1", name="supervisor", phone="0500000000",
+                                national_id="bench-1", created_by=admin, user=supervisor)
+        project = Project.objects.create(name="project")
+        locations = Location.objects.bulk_create([Location(name=f"location {i}", project=project)
+                                                  for i in range(writers)])
+        guards = SecurityGuard.objects.bulk_create([SecurityGuard(name=f"guard {i}", employee_id=i)
+                                                    for i in range(guards_count)])
+        Visit.objects.bulk_create([Visit(location=location, employee=supervisor.employee_profile, date=date.today(),
+                                         time=f"{10 + i % 12}:00", purpose="-")
+                                   for i, location in enumerate(locations * 10)])
+        return {"admin": admin, "supervisor": supervisor, "locations": [location.id for location in locations],
+                "guards": [guard.id for guard in guards], "shifts": list(Shift.objects.values_list("name", flat=True))}
+
+    def writer(self, path, tuned, index, fixtures, barrier, deadline, results):
+        factory = APIRequestFactory()
+        records = {str(guard): {"status": "حاضر"} for guard in fixtures["guards"]}
+        with use_sqlite_database(path, tuned):
+            barrier.wait()
+            n = 0
+            while time.monotonic() < deadline:
+                shifts = fixtures["shifts"]
+                data = {"location": fixtures["locations"][index], "shift": shifts[n % len(shifts)],
+                        "date": (date(2000, 1, 1) + timedelta(days=n // len(shifts))).isoformat(),
+                        "records": records}
+                request = factory.post("/api/attendance/record-shift-attendance/", data, format="json")
+                force_authenticate(request, user=fixtures["supervisor"])
+                self.timed(results, "write", lambda: record_shift_attendance(request))
+                n += 1
+
+    def reader(self, path, tuned, fixtures, barrier, deadline, results):
+        factory = APIRequestFactory()
+        with use_sqlite_database(path, tuned):
+            barrier.wait()
+            while time.monotonic() < deadline:
+                request = factory.get("/api/employees/get-moderator-home-stats/")
+                force_authenticate(request, user=fixtures["admin"])
+                self.timed(results, "read", lambda: get_moderator_home_stats(request))
+
+    @staticmethod
+    def timed(results, kind, call):
+        started = time.perf_counter()
+        try:
+            response = call()
+            failed = response.status_code >= 400
+        except Exception as e:  # "database is locked" surfaces as OperationalError
+            failed, response = True, e
+        elapsed = (time.perf_counter() - started) * 1000
+        if failed:
+            results["errors"].append(f"{kind}: {response}")
+        else:
+            results[kind].append(elapsed)
+
+    def report(self, title, results, duration):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for kind in ("write", "read"):
+            latencies = results[kind]
+            self.stdout.write(
+                f"  {kind:5} {len(latencies) / duration:8.1f} req/s   "
+                f"p50 {percentile(latencies, 50):7.1f}ms   p95 {percentile(latencies, 95):7.1f}ms   "
+                f"max {max(latencies, default=0):7.1f}ms")
+        errors = results["errors"]
+        style = self.style.ERROR if errors else self.style.SUCCESS
+        self.stdout.write(style(f"  {len(errors)} failed requests"))
+        for error in sorted(set(errors))[:5]:
+            self.stdout.write(f"    {error}")
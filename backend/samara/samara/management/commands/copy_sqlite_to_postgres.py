@@ -0,0 +1,108 @@
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from visits.daily_stats import rebuild_all_daily_stats
+
+SOURCE_ALIAS = "sqlite_source"
+
+
+def models_in_dependency_order():
+    """Concrete models (including auto-created m2m tables) ordered so FK targets come first."""
+    models = [m for m in apps.get_models(include_auto_created=True)
+              if m._meta.managed and not m._meta.proxy]
+
+    ordered, visited = [], set()
+
+    def visit(model):
+        if model in visited:
+            return
+        visited.add(model)
+        for field in model._meta.concrete_fields:
+            related = field.related_model
+            if field.is_relation and related is not None and related is not model and related in models:
+                visit(related)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+class Command(BaseCommand):
+    help = ("Copy every row of an existing SQLite database into the configured (PostgreSQL) default database, "
+            "in batches. The target must be migrated first; its existing rows are replaced.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Path to the SQLite database file to copy from.")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows read and inserted per batch.")
+        parser.add_argument("--no-input", action="store_false", dest="interactive",
+                            help="Do not ask for confirmation before replacing the target rows.")
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if not source.is_file():
+            raise CommandError(f"SQLite database not found: {source}")
+
+        target = connections["default"]
+        if target.vendor == "sqlite":
+            raise CommandError("The default database is SQLite; set DB_ENGINE=postgres to select the target.")
+
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings({
+            "default": connections.settings["default"],
+            SOURCE_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(source)},
+        })[SOURCE_ALIAS]
+
+        if options["interactive"]:
+            answer = input(f"All rows in {target.settings_dict['NAME']} will be replaced. Continue? [y/N] ")
+            if answer.lower() != "y":
+                raise CommandError("Aborted.")
+
+        models = models_in_dependency_order()
+        batch_size = options["batch_size"]
+        started = time.monotonic()
+        total = 0
+
+        with transaction.atomic(using="default"):
+            tables = [model._meta.db_table for model in models]
+            with target.cursor() as cursor:
+                for sql in target.ops.sql_flush(no_style(), tables, allow_cascade=True):
+                    cursor.execute(sql)
+
+            for model in models:
+                copied = self.copy_model(model, batch_size)
+                total += copied
+                self.stdout.write(f"{model._meta.label}: {copied} rows")
+
+            with target.cursor() as cursor:
+                for sql in target.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+            # bulk_create sends no signals, the copied rollup may also have been stale in the source
+            self.stdout.write(f"Rebuilt {rebuild_all_daily_stats()} daily stats rows")
+
+        elapsed = time.monotonic() - started
+        connections[SOURCE_ALIAS].close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {total} rows in {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f} rows/s)"))
+
+    def copy_model(self, model, batch_size):
+        manager = model._base_manager
+        rows = manager.using(SOURCE_ALIAS).order_by("pk").iterator(chunk_size=batch_size)
+
+        copied = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                manager.using("default").bulk_create(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            manager.using("default").bulk_create(batch)
+            copied += len(batch)
+        return copied
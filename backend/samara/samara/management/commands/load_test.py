@@ -0,0 +1,178 @@
+import itertools
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+
+from samara.instrumentation import percentiles
+
+QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class Client:
+    """A JWT-authenticated JSON client on urllib, one per thread (nothing is shared)."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, method, path, params=None, data=None):
+        url = f"{self.base_url}{path}" + (f"?{urlencode(params)}" if params else "")
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(url, data=body, method=method)
+        request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def login(self, username, password):
+        status, _, body = self.request("POST", "/api/auth/login/", data={"username": username, "password": password})
+        if status != 200:
+            raise CommandError(f"Login as {username} failed ({status}): {body[:200]!r}")
+        self.token = json.loads(body)["access"]
+        return self
+
+    def get_json(self, path, params=None):
+        status, _, body = self.request("GET", path, params)
+        if status != 200:
+            raise CommandError(f"GET {path} failed ({status}): {body[:200]!r}")
+        return json.loads(body)
+
+
+class Command(BaseCommand):
+    help = ("Load-test a running server (e.g. `gunicorn --workers=3 samara.wsgi`) with a mix of dashboard, list "
+            "and write requests, and report req/s and latency percentiles per endpoint. Logs in as an admin and a "
+            "supervisor, e.g. the ones created by `seed_scale --password ...`. The writes add rows: point it at a "
+            "throw-away database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--admin", default="scale-admin", help="Username of an admin.")
+        parser.add_argument("--supervisor", default="scale-sup0", help="Username of a supervisor with a profile.")
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--concurrency", type=int, default=8, help="Parallel clients.")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds.")
+        parser.add_argument("--scenario", choices=["all", "dashboard", "lists", "writes"], default="all")
+        parser.add_argument("--timeout", type=float, default=30, help="Seconds per request.")
+
+    def handle(self, *args, **options):
+        fixtures = self.discover(options)
+        requests = self.scenario(options["scenario"], fixtures)
+        results = {name: {"latencies": [], "queries": [], "errors": 0} for name, *_ in requests}
+        lock = threading.Lock()
+        sequence = itertools.count()  # unique dates for the writes
+
+        def worker(index, clients):
+            # every client starts at another point of the mix
+            for name, role, method, path, params, body in itertools.islice(itertools.cycle(requests), index, None):
+                if time.monotonic() >= deadline:
+                    return
+                data = body(next(sequence)) if body else None
+                started = time.perf_counter()
+                try:
+                    status, headers, _ = clients[role].request(method, path, params, data)
+                except OSError:
+                    status, headers = None, {}
+                elapsed = (time.perf_counter() - started) * 1000
+                queries = QUERIES.search(headers.get("Server-Timing") or "")
+                with lock:
+                    result = results[name]
+                    if status is None or status >= 400:
+                        result["errors"] += 1
+                    else:
+                        result["latencies"].append(elapsed)
+                        if queries:
+                            result["queries"].append(int(queries.group(1)))
+
+        clients = [{role: Client(options["url"], options["timeout"]).login(options[role], options["password"])
+                    for role in ("admin", "supervisor")} for _ in range(options["concurrency"])]
+        deadline = time.monotonic() + options["duration"]
+        started = time.monotonic()
+        threads = [threading.Thread(target=worker, args=(i, client)) for i, client in enumerate(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.report(results, time.monotonic() - started)
+
+    def discover(self, options):
+        """Ids the requests need, read through the API so the server's database is the one used."""
+        admin = Client(options["url"], options["timeout"]).login(options["admin"], options["password"])
+        supervisor = Client(options["url"], options["timeout"]).login(options["supervisor"], options["password"])
+
+        profile = supervisor.get_json("/api/auth/authenticated-user/").get("employee_profile")
+        if not profile:
+            raise CommandError(f"{options['supervisor']} has no employee profile")
+        locations = admin.get_json("/api/projects/locations/", {"page_size": 100})["data"]
+        guards = admin.get_json("/api/employees/security-guards/", {"page_size": 20})["data"]
+        if not locations or not guards:
+            raise CommandError("No locations or guards to test with, run seed_scale first")
+        return {"supervisor": profile["id"], "project": locations[0]["project"],
+                "locations": [location["id"] for location in locations], "guards": [guard["id"] for guard in guards]}
+
+    @staticmethod
+    def scenario(name, fixtures):
+        """(name, role, method, path, params, body) tuples; body(n) builds the JSON body of the nth write."""
+        locations, project = fixtures["locations"], fixtures["project"]
+        records = {str(guard): {"status": "حاضر"} for guard in fixtures["guards"]}
+
+        def write_date(n):
+            # far from the seeded days, a new date per request so nothing conflicts
+            return (date(2100, 1, 1) + timedelta(days=n)).isoformat()
+
+        def attendance(n):
+            return {"location": locations[n % len(locations)], "shift": "الوردية الأولى", "date": write_date(n),
+                    "records": records}
+
+        def visit(n):
+            return {"location": locations[n % len(locations)], "employee": fixtures["supervisor"],
+                    "date": write_date(n), "time": "10:00", "period": "morning", "purpose": "load test"}
+
+        dashboard = [
+            ("moderator home", "admin", "GET", "/api/employees/get-moderator-home-stats/", None, None),
+            ("supervisor home", "supervisor", "GET", "/api/employees/get-supervisor-home-stats/", None, None),
+            ("project attendances", "admin", "GET", "/api/attendance/get-project-attendances/",
+             {"project": project, "date": date.today().isoformat()}, None),
+        ]
+        lists = [
+            ("visits", "admin", "GET", "/api/visits/visits/", {"page_size": 50}, None),
+            ("visits (cursor)", "admin", "GET", "/api/visits/visits/", {"cursor": "", "page_size": 50}, None),
+            ("violations", "admin", "GET", "/api/visits/violations/", {"page_size": 50}, None),
+            ("security guards", "admin", "GET", "/api/employees/security-guards/", {"page_size": 50}, None),
+            ("guard roster", "admin", "GET", "/api/employees/security-guards/", {"no_pagination": "true"}, None),
+            ("projects", "admin", "GET", "/api/projects/projects/", {"list_details": "true"}, None),
+            ("project guards", "admin", "GET", "/api/projects/project-guards/", {"project": project, "page_size": 50},
+             None),
+        ]
+        writes = [
+            ("record attendance", "supervisor", "POST", "/api/attendance/record-shift-attendance/", None, attendance),
+            ("create visit", "admin", "POST", "/api/visits/visits/", None, visit),
+        ]
+        return {"dashboard": dashboard, "lists": lists, "writes": writes, "all": dashboard + lists + writes}[name]
+
+    def report(self, results, elapsed):
+        self.stdout.write(f"{'endpoint':22} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} "
+                          f"{'queries':>8} {'errors':>7}")
+        total = errors = 0
+        for name, result in results.items():
+            latencies = percentiles(result["latencies"]) or dict.fromkeys(("p50", "p95", "p99", "max"), 0)
+            queries = percentiles(result["queries"]).get("p50", "-")
+            total += len(result["latencies"])
+            errors += result["errors"]
+            self.stdout.write(
+                f"{name:22} {len(result['latencies']) / elapsed:8.1f} {latencies['p50']:6.1f}ms "
+                f"{latencies['p95']:6.1f}ms {latencies['p99']:6.1f}ms {latencies['max']:6.1f}ms {queries:>8} "
+                f"{result['errors']:7}")
+        style = self.style.ERROR if errors else self.style.SUCCESS
+        self.stdout.write(style(f"{total / elapsed:.1f} req/s over {elapsed:.1f}s, {errors} failed requests"))
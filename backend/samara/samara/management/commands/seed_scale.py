@@ -0,0 +1,55 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from samara.seeding import seed
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ("Bulk-create a synthetic data set of production-like volumes: projects, locations, guards and their "
+            "shift assignments, supervisors, visits (half of them completed with a report), violations and "
+            "attendance. Every seeded user gets --password, so `load_test` can log in as "
+            "<prefix>-admin and <prefix>-sup0.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="scale", help="Prefix of the seeded names, unique per run.")
+        parser.add_argument("--projects", type=int, default=20)
+        parser.add_argument("--locations", type=int, default=25, help="Locations per project.")
+        parser.add_argument("--guards", type=int, default=1500)
+        parser.add_argument("--guards-per-shift", type=int, default=3,
+                            help="Guards assigned to each shift of a location.")
+        parser.add_argument("--supervisors", type=int, default=30)
+        parser.add_argument("--visits", type=int, default=20000)
+        parser.add_argument("--violations", type=int, default=2000)
+        parser.add_argument("--attendance-days", type=int, default=30,
+                            help="Days of attendance recorded for every assigned shift.")
+        parser.add_argument("--start", type=date.fromisoformat, default=None,
+                            help="First day of the visits and attendance (YYYY-MM-DD), today by default.")
+        parser.add_argument("--password", default=None,
+                            help="Password of the seeded users; without it they can't log in.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"A data set prefixed {prefix!r} exists already, pass another --prefix")
+
+        started = time.perf_counter()
+        data = seed(prefix, projects=options["projects"], locations=options["locations"], guards=options["guards"],
+                    guards_per_shift=options["guards_per_shift"], supervisors=options["supervisors"],
+                    visits=options["visits"], violations=options["violations"],
+                    attendance_days=options["attendance_days"], start=options["start"],
+                    password=options["password"], batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+
+        rows = 0
+        for kind, created in data.items():
+            if isinstance(created, list):
+                rows += len(created)
+                self.stdout.write(f"  {kind:18} {len(created):8}")
+        self.stdout.write(self.style.SUCCESS(f"Seeded {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)"))
+        if options["password"]:
+            self.stdout.write(f"Log in as {data['admin'].username} or {data['users'][0].username}"
+                              if data["users"] else f"Log in as {data['admin'].username}")
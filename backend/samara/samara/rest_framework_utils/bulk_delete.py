@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from visits.signals import deferred_stats_refresh
+
+BULK_DELETE_BATCH_SIZE = 500
+
+
+def parse_ids(data):
+    """A list of ids, or ``{"ids": [...]}``; None when invalid."""
+    ids = data.get("ids") if isinstance(data, dict) else data
+    if not isinstance(ids, list):
+        return None
+    try:
+        return sorted({int(pk) for pk in ids})
+    except (TypeError, ValueError):
+        return None
+
+
+def bulk_delete(queryset, ids, batch_size=BULK_DELETE_BATCH_SIZE) -> int:
+    """
+    Deletes the rows of `queryset` with the given ids in one transaction, a batch of ids per
+    queryset delete. Cascades, stats and stored files are handled by the post_delete signals;
+    the stats are refreshed once per bucket and the files removed after commit.
+    Returns the number of rows of the queryset's model deleted.
+    """
+    label = queryset.model._meta.label
+    deleted = 0
+    with transaction.atomic(), deferred_stats_refresh():
+        for start in range(0, len(ids), batch_size):
+            _, per_model = queryset.filter(pk__in=ids[start:start + batch_size]).delete()
+            deleted += per_model.get(label, 0)
+    return deleted
+
+
+class BulkDeleteMixin:
+    """``DELETE <list url>/bulk-delete/`` with the ids to delete as the body."""
+    bulk_delete_batch_size = BULK_DELETE_BATCH_SIZE
+
+    def get_bulk_delete_queryset(self):
+        # not the filtered list queryset: the ids are the whole selection
+        return self.get_queryset().model.objects.all()
+
+    @action(detail=False, methods=["delete"], url_path="bulk-delete")
+    def bulk_delete(self, request, *args, **kwargs):
+        ids = parse_ids(request.data)
+        if ids is None:
+            return Response({"detail": _("قائمة معرفات غير صالحة")}, status=status.HTTP_400_BAD_REQUEST)
+
+        deleted = bulk_delete(self.get_bulk_delete_queryset(), ids, self.bulk_delete_batch_size)
+        return Response({"deleted": deleted})
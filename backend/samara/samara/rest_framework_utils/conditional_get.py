@@ -0,0 +1,68 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .response_cache import namespace_versions
+
+
+class ConditionalGetMixin:
+    """
+    ETag for ``list`` and ``retrieve``: the version of the filtered queryset (row count,
+    last id, last ``updated_at``) is checked with one aggregate query and a matching
+    ``If-None-Match`` gets ``304`` without serializing.
+
+    ``etag_namespaces`` lists the response cache namespaces of related models the
+    serialized data shows, defaults to ``cache_namespaces`` of cached viewsets.
+    ``get_etag_extra`` adds any other input of the data, e.g. today's date.
+
+    No Last-Modified is sent: neither deleted rows nor changed related rows move
+    the last ``updated_at``, so ``If-Modified-Since`` would answer with stale data.
+    """
+    modified_field = "updated_at"
+    etag_namespaces = None
+
+    def get_queryset_version(self, queryset) -> dict:
+        return queryset.order_by().aggregate(count=Count("pk"), last_id=Max("pk"),
+                                             last_modified=Max(self.modified_field))
+
+    def get_etag_extra(self) -> tuple:
+        return ()
+
+    def conditional_response(self, request, queryset, get_response):
+        version = self.get_queryset_version(queryset)
+        namespaces = self.etag_namespaces if self.etag_namespaces is not None else \
+            getattr(self, "cache_namespaces", ())
+
+        fingerprint = repr((request.get_full_path(), request.get_host(), getattr(request.user, "role", None),
+                            version, namespace_versions(namespaces), self.get_etag_extra()))
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+
+        not_modified = get_conditional_response(request._request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        response = get_response()
+        if response.status_code == 200:
+            response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(request, queryset, lambda: super(ConditionalGetMixin, self).list(
+            request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, ValidationError):
+            # a lookup value of the wrong type, as get_object() answers it
+            raise Http404
+        return self.conditional_response(request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(
+            request, *args, **kwargs))
@@ -1,18 +1,143 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TooManyRows(APIException):
+    status_code = 400
+    default_detail = _("عدد السجلات كبير جدًا، استخدم التصفح بالمؤشر (cursor)")
+    default_code = "too_many_rows"
+
+
+def keyset_filter(ordering, values, reverse=False) -> Q:
+    """Rows after `values` in `ordering` (before them when `reverse`): (a > x) | (a = x & b > y) | ..."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip("-")
+        descending = field.startswith("-") != reverse
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+        for previous, value in zip(ordering[:i], values):
+            step &= Q(**{previous.lstrip("-"): value})
+        condition |= step
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a unique ordering, e.g. ``("date", "time", "id")``: every page is a
+    single indexed range query, however deep, instead of OFFSET + COUNT.
+    The total is only counted when ``with_count=true`` is passed.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 10
+    max_page_size = 500
+
+    def __init__(self, ordering):
+        self.ordering = tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, row, reverse):
+        values = [getattr(row, field.lstrip("-")) for field in self.ordering]
+        # full isoformat: DjangoJSONEncoder would cut datetimes to milliseconds
+        raw = json.dumps({"v": values, "r": reverse}, default=lambda value: value.isoformat())
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, model):
+        cursor = self.request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values = [model._meta.get_field(field.lstrip("-")).to_python(value)
+                      for field, value in zip(self.ordering, position["v"], strict=True)]
+            return values, bool(position["r"])
+        except (TypeError, ValueError, KeyError, AttributeError, ValidationError):
+            raise NotFound(_("مؤشر صفحة غير صالح"))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count = queryset.count() if request.query_params.get("with_count", "").lower() == "true" else None
+
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(queryset.model)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, position, reverse))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next, has_previous = (position is not None, has_more) if reverse else (has_more, position is not None)
+        self.next_link = self.encode_cursor(rows[-1], False) if rows and has_next else None
+        self.previous_link = self.encode_cursor(rows[0], True) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'data': data,
+        })
 
 
 class CustomPageNumberPagination(PageNumberPagination):
+    """
+    Page numbers by default. Views declaring a unique ``keyset_ordering`` switch to
+    ``KeysetPagination`` when the request carries a ``cursor`` param (empty for the first page).
+    ``no_pagination=true`` returns a plain list, capped at ``NO_PAGINATION_LIMIT`` rows.
+    """
     page_size_query_param = 'page_size'
     page_size = 10
 
     def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        self.unpaginated = False
+
+        keyset_ordering = getattr(view, "keyset_ordering", None)
+        if keyset_ordering and KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination(keyset_ordering)
+            return self.keyset.paginate_queryset(queryset, request, view)
+
         no_pagination = request.query_params.get("no_pagination", None)
         if no_pagination and no_pagination.lower() == 'true':
-            return None
+            self.unpaginated = True
+            limit = getattr(settings, "NO_PAGINATION_LIMIT", 5000)
+            rows = list(queryset[:limit + 1])
+            if len(rows) > limit:
+                raise TooManyRows()
+            return rows
         return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        if self.unpaginated:
+            return Response(data)
+
         total_pages = self.page.paginator.num_pages
         return Response({
             'total_pages': total_pages,
@@ -0,0 +1,132 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+CACHE_ALIAS = "responses"
+
+# invalidation namespaces, bumped by the model signals in samara/signals.py
+PROJECTS = "projects"
+LOCATIONS = "locations"
+GUARDS = "guards"
+LOCATION_SHIFTS = "location_shifts"
+EMPLOYEES = "employees"
+IMAGES = "images"
+
+# endpoint name -> namespaces, filled by the cached views
+CACHED_ENDPOINTS = {}
+
+
+def _version_key(namespace):
+    return f"response-cache:version:{namespace}"
+
+
+def _stats_key(name, outcome):
+    return f"response-cache:stats:{name}:{outcome}"
+
+
+def namespace_versions(namespaces) -> list:
+    cache = caches[CACHE_ALIAS]
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # a lost version must not bring back the entries cached under an older one
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    """Drops every cached response depending on one of the namespaces."""
+
+    def bump():
+        caches[CACHE_ALIAS].set_many({_version_key(namespace): time.time_ns() for namespace in namespaces},
+                                     timeout=None)
+
+    bump()
+    # again once committed, in case a concurrent request cached the old rows in between
+    transaction.on_commit(bump)
+
+
+def _count(name, outcome):
+    cache = caches[CACHE_ALIAS]
+    key = _stats_key(name, outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted in between
+        pass
+
+
+def response_cache_stats() -> dict:
+    cache = caches[CACHE_ALIAS]
+    stats = {}
+    for name in CACHED_ENDPOINTS:
+        hits = cache.get(_stats_key(name, "hits"), 0)
+        misses = cache.get(_stats_key(name, "misses"), 0)
+        stats[name] = {"hits": hits, "misses": misses,
+                       "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None}
+    return stats
+
+
+def cached_response(request, name, namespaces, get_response):
+    """
+    Serves the response data cached for the request's query params, host and user role,
+    or builds it with `get_response()` and caches it if successful.
+    """
+    if not getattr(settings, "RESPONSE_CACHE_ENABLED", True):
+        return get_response()
+
+    cache = caches[CACHE_ALIAS]
+    params = sorted(request.query_params.lists())
+    fingerprint = repr((request.build_absolute_uri("/"), getattr(request.user, "role", None), params,
+                        namespace_versions(namespaces)))
+    key = f"response-cache:{name}:{hashlib.md5(fingerprint.encode()).hexdigest()}"
+
+    cached = cache.get(key)
+    if cached is not None:
+        _count(name, "hits")
+        response = Response(cached[0])
+        response["X-Cache"] = "HIT"
+        return response
+
+    response = get_response()
+    if response.status_code == 200 and not response.streaming:
+        cache.set(key, (response.data,), getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300))
+    _count(name, "misses")
+    response["X-Cache"] = "MISS"
+    return response
+
+
+def cache_response(name, *namespaces):
+    """Decorator for function views, applied below ``@api_view``."""
+    CACHED_ENDPOINTS[name] = namespaces
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return cached_response(request, name, namespaces, lambda: view(request, *args, **kwargs))
+
+        return wrapped
+
+    return decorator
+
+
+class CachedListMixin:
+    """Caches the ``list`` responses of a viewset; set ``cache_name`` and ``cache_namespaces``."""
+    cache_name = None
+    cache_namespaces = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_name:
+            CACHED_ENDPOINTS[cls.cache_name] = cls.cache_namespaces
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, self.cache_name, self.cache_namespaces,
+                               lambda: super(CachedListMixin, self).list(request, *args, **kwargs))
@@ -0,0 +1,38 @@
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 500
+
+
+def stream_json_list(queryset, serializer_class, context, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields the JSON array of the serialized queryset piece by piece: rows are fetched
+    `chunk_size` at a time and only one chunk is ever held in memory.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    yield "["
+    first = True
+    while chunk := list(islice(rows, chunk_size)):
+        items = serializer_class(chunk, many=True, context=context).data
+        encoded = ",".join(json.dumps(item, cls=JSONEncoder, ensure_ascii=False) for item in items)
+        yield encoded if first else "," + encoded
+        first = False
+    yield "]"
+
+
+class StreamingListMixin:
+    """``no_pagination=true`` lists are streamed instead of being rendered as one body."""
+    stream_chunk_size = STREAM_CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        no_pagination = request.query_params.get("no_pagination", "")
+        if no_pagination.lower() != "true":
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        content = stream_json_list(queryset, self.get_serializer_class(), self.get_serializer_context(),
+                                   self.stream_chunk_size)
+        return StreamingHttpResponse(content, content_type="application/json")
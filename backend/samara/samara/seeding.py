@@ -0,0 +1,105 @@
+from datetime import date, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+
+from attendance.models import SecurityGuardAttendance, ShiftAttendance
+from employees.models import Employee, SecurityGuard, SecurityGuardLocationShift, Shift
+from projects.models import Location, Project
+from users.models import User
+from visits.daily_stats import rebuild_daily_stats
+from visits.models import Visit, VisitReport, Violation
+
+VISIT_TIMES = (time(10, 0), time(14, 30), time(22, 0), time(2, 15))
+REPORT_FIELDS = ("guard_presence", "uniform_cleanliness", "attendance_records", "shift_handover", "lighting", "cameras",
+                 "security_vehicles", "radio_devices", "other")
+
+
+def seed(prefix="seed", *, projects=2, locations=10, guards=30, guards_per_shift=1, supervisors=3, visits=40,
+         violations=10, attendance_days=1, start=None, password=None, created_by=None, batch_size=500) -> dict:
+    """
+    Bulk-creates a data set of the given volumes (``locations`` per project, the rest in total) and returns the
+    created rows by kind. Every guard is assigned to a location and shift, ``guards_per_shift`` of them to each
+    (filling the shifts of a location, then the next location), half of the visits are completed with a report,
+    and the assigned shifts of the first ``attendance_days`` days have their attendance taken.
+    Names carry ``prefix`` so several sets can be seeded side by side.
+    """
+    start = start or date.today()
+    password = make_password(password)  # hashed once for every seeded user
+    shifts = list(Shift.objects.order_by("id"))
+
+    with transaction.atomic():
+        admin = created_by or User.objects.create(username=f"{prefix}-admin", role=User.RoleChoices.ADMIN,
+                                                  password=password)
+        users = User.objects.bulk_create(
+            [User(username=f"{prefix}-sup{i}", role=User.RoleChoices.SUPERVISOR, password=password)
+             for i in range(supervisors)], batch_size=batch_size)
+        employees = Employee.objects.bulk_create(
+            [Employee(employee_id=f"{prefix}-{i}", name=f"{prefix} supervisor {i}", phone="0500000000",
+                      national_id=f"{prefix}-{i}", created_by=admin, user=user) for i, user in enumerate(users)],
+            batch_size=batch_size)
+
+        project_rows = Project.objects.bulk_create(
+            [Project(name=f"{prefix} project {i}") for i in range(projects)], batch_size=batch_size)
+        location_rows = Location.objects.bulk_create(
+            [Location(name=f"{prefix} location {i}", project=project)
+             for project in project_rows for i in range(locations)], batch_size=batch_size)
+
+        first_id = (SecurityGuard.objects.aggregate(last=Max("employee_id"))["last"] or 0) + 1
+        guard_rows = SecurityGuard.objects.bulk_create(
+            [SecurityGuard(name=f"{prefix} guard {i}", employee_id=first_id + i) for i in range(guards)],
+            batch_size=batch_size)
+        assignments = SecurityGuardLocationShift.objects.bulk_create(
+            [SecurityGuardLocationShift(guard=guard, shift=shifts[slot % len(shifts)],
+                                        location=location_rows[slot // len(shifts) % len(location_rows)])
+             for slot, guard in ((i // guards_per_shift, guard) for i, guard in enumerate(guard_rows))]
+            if location_rows else [], batch_size=batch_size)
+
+        visit_rows = Visit.objects.bulk_create(
+            [Visit(location=location_rows[i % len(location_rows)], employee=employees[i % len(employees)],
+                   date=start + timedelta(days=i // (len(location_rows) * len(VISIT_TIMES))),
+                   time=VISIT_TIMES[i % len(VISIT_TIMES)], purpose="-",
+                   status=Visit.VisitStatus.COMPLETED if i % 2 == 0 else Visit.VisitStatus.SCHEDULED)
+             for i in range(visits)] if location_rows and employees else [], batch_size=batch_size)
+        reports = VisitReport.objects.bulk_create(
+            [VisitReport(visit=visit, **dict.fromkeys(REPORT_FIELDS, VisitReport.EvaluationChoices.GOOD))
+             for visit in visit_rows if visit.status == Visit.VisitStatus.COMPLETED], batch_size=batch_size)
+
+        violation_rows = []
+        for i in range(violations if assignments and employees else 0):
+            assignment = assignments[i % len(assignments)]
+            violation_rows.append(Violation(
+                location=assignment.location, security_guard=assignment.guard, created_by=employees[i % len(employees)],
+                date=start, time=VISIT_TIMES[i % len(VISIT_TIMES)], details="-",
+                violation_type=Violation.ViolationType.LATE, severity=Violation.SeverityLevel.LOW))
+        violation_rows = Violation.objects.bulk_create(violation_rows, batch_size=batch_size)
+
+        shift_attendances, guard_attendances = [], []
+        if employees:
+            taken = {(a.location_id, a.shift_id) for a in assignments}
+            shift_attendances = ShiftAttendance.objects.bulk_create(
+                [ShiftAttendance(location_id=location_id, shift_id=shift_id, date=start + timedelta(days=day),
+                                 created_by=employees[0])
+                 for day in range(attendance_days) for location_id, shift_id in sorted(taken)],
+                batch_size=batch_size)
+            by_shift = {}
+            for assignment in assignments:
+                by_shift.setdefault((assignment.location_id, assignment.shift_id), []).append(assignment.guard_id)
+            guard_attendances = SecurityGuardAttendance.objects.bulk_create(
+                [SecurityGuardAttendance(security_guard_id=guard_id, shift=attendance,
+                                         status=SecurityGuardAttendance.AttendanceStatus.PRESENT)
+                 for attendance in shift_attendances
+                 for guard_id in by_shift[(attendance.location_id, attendance.shift_id)]], batch_size=batch_size)
+
+        # bulk_create skips the signals keeping the dashboard counters
+        if visit_rows or shift_attendances:
+            last = max([visit.date for visit in visit_rows] + [start + timedelta(days=attendance_days)])
+            rebuild_daily_stats(start - timedelta(days=1), last)
+
+    return {
+        "admin": admin, "users": users, "employees": employees, "projects": project_rows,
+        "locations": location_rows, "guards": guard_rows, "assignments": assignments, "visits": visit_rows,
+        "reports": reports, "violations": violation_rows, "shift_attendances": shift_attendances,
+        "guard_attendances": guard_attendances,
+    }
@@ -1,4 +1,5 @@
 # for this project
+import os
 from datetime import timedelta
 
 import pytz
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
 
+    'samara.apps.SamaraConfig',
     'authentication.apps.AuthenticationConfig',
     'users.apps.UsersConfig',
     'employees.apps.EmployeesConfig',
@@ -45,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'samara.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -79,11 +82,71 @@ WSGI_APPLICATION = 'samara.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db/db.sqlite3',
+# SQLite by default (development / single node); set DB_ENGINE=postgres for production:
+#   DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT  - connection
+#   DB_CONN_MAX_AGE                                  - seconds to keep persistent connections (default 60)
+#   DB_POOL=true, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE - psycopg connection pool instead of persistent connections
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'samara'),
+            'USER': os.environ.get('DB_USER', 'samara'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+
+    if os.environ.get('DB_POOL', '').lower() == 'true':
+        # pooled connections replace persistent ones
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_SQLITE_PATH', BASE_DIR / 'db/db.sqlite3'),
+        }
     }
+
+# DB_SQLITE_TUNING=true: WAL journal and tuned pragmas on every SQLite connection (samara/sqlite.py),
+# write transactions take the lock up front so concurrent writers wait on busy_timeout instead of failing
+SQLITE_TUNING = DB_ENGINE != 'postgres' and os.environ.get('DB_SQLITE_TUNING', '').lower() == 'true'
+
+if SQLITE_TUNING:
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+# Cache
+# responses of the lookup endpoints (samara/rest_framework_utils/response_cache.py). Set RESPONSE_CACHE_LOCATION
+# to a directory shared by the workers: the local-memory fallback is per process, so an invalidation made by
+# one worker would not reach the others.
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['RESPONSE_CACHE_LOCATION'],
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    } if os.environ.get('RESPONSE_CACHE_LOCATION') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
 }
 
 # Password validation
@@ -131,6 +194,21 @@ MEDIA_URL = 'media/'
 STATIC_ROOT = BASE_DIR / 'static'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# chunked uploads are assembled here, outside MEDIA_ROOT so partial files are never served
+CHUNKED_UPLOAD_DIR = Path(os.environ.get('CHUNKED_UPLOAD_DIR', BASE_DIR / 'chunked_uploads'))
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 2 * 1024 * 1024))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', 50 * 1024 * 1024))
+# unfinished uploads older than this are removed by `manage.py purge_chunked_uploads`
+CHUNKED_UPLOAD_EXPIRY_HOURS = int(os.environ.get('CHUNKED_UPLOAD_EXPIRY_HOURS', 48))
+
+# threads per queue of samara.background.run_after_commit, one when not listed
+BACKGROUND_WORKERS = {"exports": int(os.environ.get('REPORT_EXPORT_WORKERS', 1))}
+
+# report exports are kept outside MEDIA_ROOT: they are only served to their owner by the download action
+REPORT_EXPORT_DIR = Path(os.environ.get('REPORT_EXPORT_DIR', BASE_DIR / 'report_exports'))
+# pending or running exports without progress for this long lost their worker and are marked failed
+REPORT_EXPORT_STALE_MINUTES = int(os.environ.get('REPORT_EXPORT_STALE_MINUTES', 60))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -150,6 +228,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'samara.rest_framework_utils.custom_pagination.CustomPageNumberPagination'
 }
 
+# request metrics (samara/instrumentation.py): Server-Timing headers and the aggregates of /api/_metrics/.
+# Views declare a query budget with `query_budget` (every query of the request, the JWT user lookup included);
+# QUERY_BUDGETS overrides it by URL name. Requests over budget are logged, and fail the tests (the test runner
+# sets QUERY_BUDGETS_ENFORCED).
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'true').lower() == 'true'
+QUERY_BUDGETS = {}
+QUERY_BUDGETS_ENFORCED = os.environ.get('QUERY_BUDGETS_ENFORCED', '').lower() == 'true'
+TEST_RUNNER = 'samara.test_runner.QueryBudgetTestRunner'
+
+# most rows a no_pagination=true list may return; larger lists have to use cursor pagination
+NO_PAGINATION_LIMIT = int(os.environ.get('NO_PAGINATION_LIMIT', 5000))
+
 # simple jwt:
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=3),
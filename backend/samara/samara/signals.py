@@ -0,0 +1,47 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from employees.models import Employee, ReportExport, SecurityGuard, SecurityGuardLocationShift
+from projects.models import Project, Location
+from samara.files import delete_files_on_commit, stored_files
+from samara.rest_framework_utils import response_cache
+from users.models import User
+from visits.models import ProcessedImage, VisitReport, Violation
+
+CACHE_NAMESPACES = {
+    Project: response_cache.PROJECTS,
+    Location: response_cache.LOCATIONS,
+    SecurityGuard: response_cache.GUARDS,
+    SecurityGuardLocationShift: response_cache.LOCATION_SHIFTS,
+    Employee: response_cache.EMPLOYEES,
+    User: response_cache.EMPLOYEES,  # the role decides who counts as a supervisor
+    ProcessedImage: response_cache.IMAGES,  # the variants are added in the background, after the upload
+}
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=SecurityGuard)
+@receiver(post_save, sender=SecurityGuardLocationShift)
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ProcessedImage)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=SecurityGuard)
+@receiver(post_delete, sender=SecurityGuardLocationShift)
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ProcessedImage)
+def invalidate_cached_responses(sender, **kwargs):
+    response_cache.invalidate(CACHE_NAMESPACES[sender])
+
+
+# sent for queryset and cascade deletes too, unlike Model.delete()
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=VisitReport)
+@receiver(post_delete, sender=Violation)
+@receiver(post_delete, sender=ReportExport)
+@receiver(post_delete, sender=ProcessedImage)
+def delete_stored_files(sender, instance, **kwargs):
+    delete_files_on_commit(stored_files(instance))
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+from django.db.backends.signals import connection_created
+
+# applied on every new connection to the default SQLite database when SQLITE_TUNING is on
+# (override single values through settings.SQLITE_PRAGMAS)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # readers no longer block on the writer (and vice versa)
+    "synchronous": "NORMAL",  # fsync on checkpoints only, safe in WAL mode
+    "busy_timeout": 5000,  # ms to wait for the write lock instead of failing with "database is locked"
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -20000,  # negative = KiB, ~20MB page cache per connection
+    "temp_store": "MEMORY",
+}
+
+
+def sqlite_pragmas() -> dict:
+    return {**SQLITE_PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+
+
+def apply_sqlite_pragmas(connection, pragmas=None):
+    for name, value in (pragmas or sqlite_pragmas()).items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor == "sqlite" and connection.alias == DEFAULT_DB_ALIAS:
+        apply_sqlite_pragmas(connection)
+
+
+def connect_sqlite_tuning():
+    if getattr(settings, "SQLITE_TUNING", False):
+        connection_created.connect(tune_sqlite_connection, dispatch_uid="samara.sqlite_tuning")
+
+
+@contextmanager
+def use_sqlite_database(path, tuned=False):
+    """
+    Points the current thread's default connection at another SQLite file,
+    so views and signals run unchanged against it (used by the benchmarks).
+    """
+    settings_dict = connections.configure_settings({
+        DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path),
+                           "OPTIONS": {"transaction_mode": "IMMEDIATE"} if tuned else {}},
+    })[DEFAULT_DB_ALIAS]
+
+    previous = connections[DEFAULT_DB_ALIAS]
+    connection = load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+    connections[DEFAULT_DB_ALIAS] = connection
+    if tuned:
+        connection.ensure_connection()
+        apply_sqlite_pragmas(connection)
+    try:
+        yield connection
+    finally:
+        connection.close()
+        connections[DEFAULT_DB_ALIAS] = previous
@@ -0,0 +1,71 @@
+import json
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.models import User
+from .instrumentation import query_budget_of
+from .seeding import seed
+
+# one child per parent in the small set and several in the large one (locations per project, guards per shift
+# and its attendance, ...), so that a query per parent row shows up as growth
+SMALL = {"projects": 2, "locations": 1, "guards": 6, "guards_per_shift": 1, "supervisors": 2, "visits": 8,
+         "violations": 4, "attendance_days": 1}
+LARGE = {"projects": 5, "locations": 40, "guards": 300, "guards_per_shift": 5, "supervisors": 10, "visits": 400,
+         "violations": 150, "attendance_days": 2}
+
+
+class Endpoint:
+    """
+    A GET endpoint called by the query budget tests. ``args`` and ``params`` build the URL args and
+    query params from the seeded rows; ``user`` picks the requesting user from them (the admin by default).
+    ``grows`` marks a known N+1: its test fails once the queries stop growing, so the mark gets removed.
+    """
+
+    def __init__(self, name, args=None, params=None, user=None, grows=False):
+        self.name = name
+        self.args = args or (lambda data: [])
+        self.params = params or (lambda data: {})
+        self.user = user or (lambda data: data["admin"])
+        self.grows = grows
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class QueryBudgetTestCase(TestCase):
+    """
+    Calls every endpoint of ``endpoints`` against a small and a large seeded data set: the number of
+    queries may not grow with the rows, and has to fit the query budget declared on the view.
+    """
+    endpoints = ()
+
+    def call(self, endpoint, data) -> int:
+        client = APIClient()
+        # a fresh instance: the seeded one has its relations cached, which would hide their queries
+        client.force_authenticate(User.objects.get(pk=endpoint.user(data).pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse(endpoint.name, args=endpoint.args(data)), endpoint.params(data))
+            if response.streaming:
+                json.loads(b"".join(response.streaming_content))
+        self.assertEqual(response.status_code, 200, f"{endpoint.name}: {getattr(response, 'data', '')}")
+        # a view still N+1 for some params can't declare a budget yet
+        if not any(other.grows for other in self.endpoints if other.name == endpoint.name):
+            self.assertIsNotNone(query_budget_of(response.wsgi_request), f"{endpoint.name} declares no query budget")
+        return len(ctx.captured_queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        if not self.endpoints:
+            self.skipTest("no endpoints")
+        data = seed("small", **SMALL)
+        small_counts = [self.call(endpoint, data) for endpoint in self.endpoints]
+        data = seed("large", **LARGE)
+
+        for endpoint, small in zip(self.endpoints, small_counts):
+            with self.subTest(endpoint.name, params=endpoint.params(data)):
+                large = self.call(endpoint, data)
+                if endpoint.grows:
+                    self.assertGreater(large, small, f"{endpoint.name} is no longer N+1, drop its `grows` mark")
+                else:
+                    self.assertEqual(small, large, f"{endpoint.name}: {small} queries, then {large} with more rows")
@@ -0,0 +1,229 @@
+import importlib
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing
+from datetime import date, time
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, TestCase
+from django.urls import URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+
+from employees.models import SecurityGuardLocationShift
+from projects.models import Location, Project
+from users.models import User
+from visits.models import Visit, VisitReport
+from .background import run_after_commit
+from .instrumentation import QueryBudgetExceeded, store
+from .testing import Endpoint, QueryBudgetTestCase
+from .sqlite import use_sqlite_database
+
+
+class SqliteTuningTests(TestCase):
+    def test_tuned_connection_uses_wal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with use_sqlite_database(Path(directory) / "db.sqlite3", tuned=True) as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode")
+                    self.assertEqual(cursor.fetchone()[0], "wal")
+                    cursor.execute("PRAGMA synchronous")
+                    self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_locking_benchmark_runs(self):
+        out = StringIO()
+        call_command("benchmark_sqlite_locking", "--duration", "0.5", "--writers", "1", "--readers", "1",
+                     "--guards", "5", "--tuned-only", stdout=out)
+        self.assertIn("tuned (WAL)", out.getvalue())
+        self.assertIn("0 failed requests", out.getvalue())
+
+
+class BackupSqliteTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = Path(directory.name) / "db.sqlite3"
+        self.backups = Path(directory.name) / "backups"
+        with closing(sqlite3.connect(self.source)) as db:
+            db.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)")
+            db.executemany("INSERT INTO item (name) VALUES (?)", [(f"item {i}",) for i in range(5000)])
+            db.commit()
+
+    def backup(self, *args):
+        call_command("backup_sqlite", "--source", str(self.source), "--output-dir", str(self.backups), *args,
+                     stdout=StringIO())
+        return sorted(self.backups.glob("backup-*.sqlite3"))
+
+    def test_paged_and_vacuum_backups_copy_every_row(self):
+        for method in ("backup", "vacuum"):
+            [path] = self.backup("--method", method, "--pages", "4", "--sleep", "0", "--keep", "1")
+            with closing(sqlite3.connect(path)) as db:
+                self.assertEqual(db.execute("SELECT COUNT(*) FROM item").fetchone()[0], 5000)
+
+    def test_old_backups_are_rotated(self):
+        for _ in range(4):
+            backups = self.backup("--keep", "3")
+        self.assertEqual(len(backups), 3)
+        self.assertFalse(list(self.backups.glob("*.partial")))
+
+
+class BackgroundTests(TestCase):
+    def test_runs_on_a_worker_after_commit(self):
+        ran = threading.Event()
+        threads = []
+
+        def task(value):
+            threads.append((threading.current_thread().name, value))
+            ran.set()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_after_commit(task, 1, queue="tests")
+            self.assertFalse(ran.is_set())
+
+        self.assertTrue(ran.wait(5))
+        self.assertEqual(threads, [("background-tests_0", 1)])
+
+    def test_failures_are_logged(self):
+        def task():
+            raise RuntimeError("broken")
+
+        done = threading.Event()
+        with self.assertLogs("samara.background", "ERROR") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                run_after_commit(task, queue="tests")
+                run_after_commit(done.set, queue="tests")  # the queue runs in order
+            self.assertTrue(done.wait(5))
+        self.assertIn("RuntimeError: broken", logs.output[0])
+
+
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", "password", role=User.RoleChoices.ADMIN)
+        location = Location.objects.create(name="location", project=Project.objects.create(name="project"))
+        Visit.objects.bulk_create([Visit(location=location, date=date(2025, 10, 1), time=time(10, 0), purpose="-")
+                                   for _ in range(3)])
+
+    def setUp(self):
+        store.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("visit-list"))
+
+        self.assertEqual(response.status_code, 200)
+        db, serialize, total = response["Server-Timing"].split(", ")
+        self.assertRegex(db, r'^db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertRegex(serialize, r"^serialize;dur=[\d.]+$")
+        self.assertRegex(total, r"^total;dur=[\d.]+$")
+
+    def test_metrics_are_aggregated_by_url_name(self):
+        for _ in range(3):
+            self.client.get(reverse("visit-list"))
+        # a streamed list is recorded once its body is sent
+        b"".join(self.client.get(reverse("visit-list"), {"no_pagination": "true"}).streaming_content)
+
+        metrics = self.client.get(reverse("request-metrics")).json()
+        visits = metrics["endpoints"]["visit-list"]
+        self.assertEqual(visits["requests"], 4)
+        self.assertEqual(visits["over_budget"], 0)
+        self.assertEqual(set(visits["total_ms"]), {"p50", "p90", "p95", "p99", "max"})
+        self.assertGreater(visits["serialize_ms"]["max"], 0)
+        self.assertEqual(sum(visits["latency_histogram"].values()), 4)
+        self.assertEqual(sum(visits["query_histogram"].values()), 4)
+
+        self.assertEqual(self.client.delete(reverse("request-metrics")).status_code, 204)
+        self.assertNotIn("visit-list", self.client.get(reverse("request-metrics")).json()["endpoints"])
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_authenticate(User.objects.create_user("moderator", "password"))
+        self.assertEqual(self.client.get(reverse("request-metrics")).status_code, 403)
+
+    def test_exceeded_budget_fails_under_tests(self):
+        with self.settings(QUERY_BUDGETS={"visit-list": 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("visit-list"))
+            with self.assertRaises(QueryBudgetExceeded):
+                b"".join(self.client.get(reverse("visit-list"), {"no_pagination": "true"}).streaming_content)
+
+    def test_exceeded_budget_is_logged_otherwise(self):
+        with self.settings(QUERY_BUDGETS={"visit-list": 0}, QUERY_BUDGETS_ENFORCED=False):
+            with self.assertLogs("samara.instrumentation", "WARNING") as logs:
+                self.assertEqual(self.client.get(reverse("visit-list")).status_code, 200)
+
+        self.assertIn("GET visit-list issued", logs.output[0])
+        self.assertEqual(store.snapshot()["endpoints"]["visit-list"]["over_budget"], 1)
+
+
+class SamaraQueryBudgetTests(QueryBudgetTestCase):
+    endpoints = (
+        Endpoint("response-cache-stats"),
+        Endpoint("request-metrics"),
+    )
+
+    def test_every_get_endpoint_is_covered(self):
+        """A new GET route needs an ``Endpoint`` in its app's query budget tests (or a reason here)."""
+        not_measured = {
+            "api-root",  # the routers' browsable index
+            "employee-switch-active",  # toggles is_active, which Employee doesn't have: always a 404
+            "report-export-download",  # one row and its file, covered by ReportExportTests
+        }
+        for app in ("attendance", "authentication", "employees", "projects", "users", "visits"):
+            importlib.import_module(f"{app}.tests")
+        covered = {endpoint.name for case in QueryBudgetTestCase.__subclasses__() for endpoint in case.endpoints}
+
+        self.assertEqual(get_routes(get_resolver().url_patterns, "") - covered - not_measured, set())
+
+
+def get_routes(patterns, prefix) -> set:
+    """Names of the API routes answering GET."""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= get_routes(pattern.url_patterns, prefix + str(pattern.pattern))
+            continue
+        view = pattern.callback
+        actions = getattr(view, "actions", None)
+        answers_get = "get" in actions if actions else hasattr(getattr(view, "cls", None), "get")
+        if prefix.startswith("api/") and pattern.name and answers_get:
+            names.add(pattern.name)
+    return names
+
+
+class SeedScaleTests(TestCase):
+    def test_seeds_the_requested_volumes(self):
+        out = StringIO()
+        call_command("seed_scale", "--projects", "2", "--locations", "3", "--guards", "12", "--supervisors", "2",
+                     "--visits", "20", "--violations", "5", "--attendance-days", "2", "--password", "secret",
+                     stdout=out)
+
+        self.assertEqual(Location.objects.filter(name__startswith="scale").count(), 6)
+        self.assertEqual(SecurityGuardLocationShift.objects.count(), 12)
+        self.assertEqual(Visit.objects.count(), 20)
+        self.assertEqual(VisitReport.objects.count(), 10)
+        self.assertTrue(User.objects.get(username="scale-sup0").check_password("secret"))
+        self.assertIn("Log in as scale-admin", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("seed_scale", "--visits", "1", stdout=StringIO())
+
+
+class LoadTestTests(LiveServerTestCase):
+    serialized_rollback = True  # keeps the shifts of the data migration
+
+    def test_reports_every_endpoint(self):
+        call_command("seed_scale", "--projects", "1", "--locations", "2", "--guards", "6", "--supervisors", "1",
+                     "--visits", "8", "--violations", "2", "--attendance-days", "1", "--password", "secret",
+                     stdout=StringIO())
+        out = StringIO()
+        call_command("load_test", "--url", self.live_server_url, "--password", "secret", "--concurrency", "1",
+                     "--duration", "1", stdout=out)
+
+        report = out.getvalue()
+        for endpoint in ("moderator home", "visits (cursor)", "guard roster", "project guards", "record attendance",
+                         "create visit"):
+            self.assertIn(endpoint, report)
+        self.assertIn(", 0 failed requests", report)
@@ -3,6 +3,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 
+from .views import get_response_cache_stats, get_request_metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include([
@@ -12,6 +14,8 @@ urlpatterns = [
         path('visits/', include('visits.urls')),
         path('projects/', include('projects.urls')),
         path('attendance/', include('attendance.urls')),
+        path('cache-stats/', get_response_cache_stats, name='response-cache-stats'),
+        path('_metrics/', get_request_metrics, name='request-metrics'),
     ])),
 ]
 
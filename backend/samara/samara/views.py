@@ -0,0 +1,28 @@
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from django.utils.translation import gettext_lazy as _
+
+from users.models import User
+from .instrumentation import query_budget, store
+from .rest_framework_utils.response_cache import response_cache_stats
+
+
+@query_budget(1)
+@api_view(["GET"])
+def get_response_cache_stats(request):
+    if request.user.role != User.RoleChoices.ADMIN:
+        return Response({"detail": _("غير مسموح بعرض هذه البيانات")}, status=status.HTTP_403_FORBIDDEN)
+    return Response(response_cache_stats())
+
+
+@query_budget(1)
+@api_view(["GET", "DELETE"])
+def get_request_metrics(request):
+    """Latency, query and serialization percentiles of this worker process, by URL name; DELETE resets them."""
+    if request.user.role != User.RoleChoices.ADMIN:
+        return Response({"detail": _("غير مسموح بعرض هذه البيانات")}, status=status.HTTP_403_FORBIDDEN)
+    if request.method == "DELETE":
+        store.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(store.snapshot())
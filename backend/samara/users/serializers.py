@@ -22,6 +22,10 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'name', 'is_superuser', 'is_moderator', 'password',
                   'password2', 'url', 'is_root', 'role', 'role_arabic', "employee_profile", "employee_data"]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("employee_profile__created_by__employee_profile")
+
     def validate(self, data):
         if 'password' in data and 'password2' in data:
             if data['password'] != data['password2']:
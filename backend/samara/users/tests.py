@@ -1,3 +1,8 @@
-from django.test import TestCase
+from samara.testing import Endpoint, QueryBudgetTestCase
 
-# Create your tests here.
+
+class UserQueryBudgetTests(QueryBudgetTestCase):
+    endpoints = (
+        Endpoint("user-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("user-detail", args=lambda data: [data["users"][0].id]),
+    )
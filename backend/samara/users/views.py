@@ -11,9 +11,10 @@ from .models import User
 class UserViewSet(ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    query_budget = {"list": 3, "retrieve": 2}
 
     def get_queryset(self):
-        queryset = super(UserViewSet, self).get_queryset()
+        queryset = UserSerializer.setup_eager_loading(super(UserViewSet, self).get_queryset())
 
         search_query = self.request.query_params.get('search', None)
         role = self.request.query_params.get('role', None)
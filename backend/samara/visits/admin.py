@@ -1,6 +1,21 @@
 from django.contrib import admin
-from .models import Visit, VisitReport, Violation
+from .models import Visit, VisitReport, Violation, DailyStats, ProcessedImage, SyncedItem
 
 admin.site.register(Visit)
 admin.site.register(VisitReport)
 admin.site.register(Violation)
+admin.site.register(DailyStats)
+
+
+@admin.register(ProcessedImage)
+class ProcessedImageAdmin(admin.ModelAdmin):
+    list_display = ["source", "status", "width", "height", "size", "display_size", "thumbnail_size"]
+    list_filter = ["status"]
+    search_fields = ["source"]
+
+
+@admin.register(SyncedItem)
+class SyncedItemAdmin(admin.ModelAdmin):
+    list_display = ["key", "kind", "created_by", "created_at"]
+    list_filter = ["kind"]
+    search_fields = ["key"]
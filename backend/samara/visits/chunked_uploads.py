@@ -0,0 +1,56 @@
+import hashlib
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+READ_SIZE = 64 * 1024
+
+
+class PartFile(File):
+    """An assembled upload; FileSystemStorage moves it into place instead of copying it."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def read_chunk(stream, length):
+    """
+    Reads the whole chunk before the upload row is locked, so a slow client only holds its own
+    request. Up to 1MB stays in memory.
+    """
+    chunk = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    remaining = length
+    while remaining > 0:
+        data = stream.read(min(READ_SIZE, remaining))
+        if not data:
+            break
+        chunk.write(data)
+        remaining -= len(data)
+    chunk.seek(0)
+    return chunk
+
+
+def write_chunk(path, offset, chunk) -> int:
+    """Writes the chunk at `offset` of the part file, returns the offset after it."""
+    with open(path, "r+b") as part:
+        part.seek(offset)
+        while data := chunk.read(READ_SIZE):
+            part.write(data)
+        return part.tell()
+
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while data := file.read(READ_SIZE):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def store(upload):
+    """Moves the assembled part file into the media storage, under the upload's file field."""
+    name = upload.file.field.generate_filename(upload, upload.filename)
+    with open(upload.part_path, "rb") as part:
+        upload.file.name = default_storage.save(name, PartFile(part), max_length=upload.file.field.max_length)
+    upload.part_path.unlink(missing_ok=True)
@@ -0,0 +1,108 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+
+from attendance.models import ShiftAttendance
+from .models import DailyStats, Visit, Violation
+
+# DailyStats is kept up to date by the model signals in visits/signals.py. Writes that send no signals
+# leave it stale and have to rebuild the days they touched with rebuild_daily_stats:
+#   - bulk_create of visits, violations or shift attendance (seeding.seed rebuilds its span,
+#     copy_sqlite_to_postgres rebuilds everything with rebuild_all_daily_stats)
+#   - QuerySet.update() of the date, time, status or supervisor of those rows
+#   - fixtures, whose raw saves are skipped by the signals
+# Deleting an employee nulls Visit.employee in one UPDATE; visits/signals.py handles that one.
+VISIT_METRICS = {Visit.VisitStatus.SCHEDULED: DailyStats.Metric.SCHEDULED,
+                 Visit.VisitStatus.COMPLETED: DailyStats.Metric.COMPLETED}
+
+
+def _replace_rows(rows_filter: Q, rows: list[DailyStats]):
+    """
+    Writes the counted rows of a bucket in place and deletes the rest of it. update_or_create locks an
+    existing row, and its create falls back to updating the row a concurrent refresh of the same bucket
+    inserted first, which the unique constraints of DailyStats (NULL supervisor included) make it fail on.
+    """
+    with transaction.atomic():
+        kept = [
+            DailyStats.objects.update_or_create(date=row.date, period=row.period, supervisor_id=row.supervisor_id,
+                                                metric=row.metric, defaults={"count": row.count})[0].pk
+            for row in rows if row.count
+        ]
+        DailyStats.objects.filter(rows_filter).exclude(pk__in=kept).delete()
+
+
+def refresh_visit_stats(day: date, supervisor_id: int | None):
+    counts = (
+        Visit.objects
+        .filter(duty_date=day, employee_id=supervisor_id)
+        .order_by()
+        .values_list("period", "status")
+        .annotate(count=Count("id"))
+    )
+    rows = [DailyStats(date=day, period=period, supervisor_id=supervisor_id, metric=VISIT_METRICS[visit_status],
+                       count=count) for period, visit_status, count in counts]
+
+    _replace_rows(Q(date=day, supervisor_id=supervisor_id, metric__in=VISIT_METRICS.values()), rows)
+
+
+def refresh_violation_stats(day: date | None, supervisor_id: int | None):
+    if day is None:
+        return
+    count = Violation.objects.filter(date=day, created_by_id=supervisor_id).count()
+    _replace_rows(Q(date=day, supervisor_id=supervisor_id, metric=DailyStats.Metric.VIOLATIONS),
+                  [DailyStats(date=day, period=DailyStats.Period.DAY, supervisor_id=supervisor_id,
+                              metric=DailyStats.Metric.VIOLATIONS, count=count)])
+
+
+def refresh_attendance_stats(day: date, supervisor_id: int | None):
+    count = ShiftAttendance.objects.filter(date=day, created_by_id=supervisor_id).count()
+    _replace_rows(Q(date=day, supervisor_id=supervisor_id, metric=DailyStats.Metric.ATTENDANCE_RECORDS),
+                  [DailyStats(date=day, period=DailyStats.Period.DAY, supervisor_id=supervisor_id,
+                              metric=DailyStats.Metric.ATTENDANCE_RECORDS, count=count)])
+
+
+def rebuild_daily_stats(from_date: date, to_date: date) -> int:
+    """
+    Recomputes every DailyStats row between two dates (inclusive) from the raw tables.
+    Returns the number of rows written.
+    """
+    visits_data = (
+        Visit.objects
+        .filter(duty_date__range=(from_date, to_date))
+        .order_by()
+        .values_list("duty_date", "period", "employee", "status")
+        .annotate(count=Count("id"))
+    )
+    rows = [DailyStats(date=day, period=period, supervisor_id=employee, metric=VISIT_METRICS[visit_status],
+                       count=count) for day, period, employee, visit_status, count in visits_data]
+
+    day_metrics = (
+        (DailyStats.Metric.VIOLATIONS, Violation.objects.filter(date__range=(from_date, to_date))),
+        (DailyStats.Metric.ATTENDANCE_RECORDS, ShiftAttendance.objects.filter(date__range=(from_date, to_date))),
+    )
+    for metric, queryset in day_metrics:
+        for v in queryset.order_by().values("date", "created_by").annotate(count=Count("id")):
+            rows.append(DailyStats(date=v["date"], period=DailyStats.Period.DAY, supervisor_id=v["created_by"],
+                                   metric=metric, count=v["count"]))
+
+    rows = [row for row in rows if row.count]
+    with transaction.atomic():
+        DailyStats.objects.filter(date__range=(from_date, to_date)).delete()
+        DailyStats.objects.bulk_create(rows, batch_size=1000)
+
+    return len(rows)
+
+
+def rebuild_all_daily_stats() -> int:
+    """Rebuilds DailyStats over every day that has a visit, violation or attendance record."""
+    spans = [
+        Visit.objects.aggregate(first=Min("duty_date"), last=Max("duty_date")),
+        Violation.objects.aggregate(first=Min("date"), last=Max("date")),
+        ShiftAttendance.objects.aggregate(first=Min("date"), last=Max("date")),
+    ]
+    firsts = [span["first"] for span in spans if span["first"]]
+    if not firsts:
+        DailyStats.objects.all().delete()
+        return 0
+    return rebuild_daily_stats(min(firsts), max(span["last"] for span in spans if span["last"]))
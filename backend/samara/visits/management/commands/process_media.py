@@ -0,0 +1,43 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import FileField
+
+from visits.media import process_image
+from visits.models import ProcessedImage, VisitReport, Violation
+
+
+def uploaded_names():
+    """Names of every file uploaded to visit reports and violations."""
+    for model in (VisitReport, Violation):
+        fields = [field.attname for field in model._meta.concrete_fields if isinstance(field, FileField)]
+        for row in model.objects.values_list(*fields).iterator(chunk_size=2000):
+            yield from (name for name in row if name)
+
+
+class Command(BaseCommand):
+    help = ("Builds the display / thumbnail variants of the visit report attachments and violation images "
+            "uploaded before the media pipeline, or whose processing failed (--retry-failed).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retry-failed", action="store_true", help="Process the failed images again.")
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            ProcessedImage.objects.filter(status=ProcessedImage.Status.FAILED).delete()
+
+        done = set(ProcessedImage.objects.values_list("source", flat=True))
+        pending = [name for name in dict.fromkeys(uploaded_names()) if name not in done]
+        statuses = Counter()
+        for i, name in enumerate(pending, start=1):
+            try:
+                processed = process_image(name)
+            except OSError as e:  # e.g. missing from the storage
+                self.stderr.write(f"{name}: {e}")
+            else:
+                statuses[processed.status if processed else "skipped"] += 1
+            if i % 100 == 0:
+                self.stdout.write(f"{i}/{len(pending)}")
+
+        summary = ", ".join(f"{count} {status}" for status, count in statuses.items())
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(pending)} files" + (f": {summary}" if summary else "")))
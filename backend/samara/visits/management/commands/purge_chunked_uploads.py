@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from visits.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = ("Removes the chunked uploads not touched for CHUNKED_UPLOAD_EXPIRY_HOURS: the partial files of "
+            "unfinished ones and the files of completed ones never attached to a report.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+
+    def handle(self, *args, **options):
+        expired = ChunkedUpload.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=options["hours"]))
+        removed = 0
+        for upload in expired.exclude(status=ChunkedUpload.Status.ATTACHED).iterator():
+            upload.part_path.unlink(missing_ok=True)
+            if upload.file:
+                upload.file.delete(save=False)
+            removed += 1
+        # attached uploads only keep their row, the file belongs to the report
+        count, _ = expired.delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} unfinished uploads, {count} rows"))
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from visits.daily_stats import rebuild_daily_stats, rebuild_all_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyStats dashboard rollup from the raw visits, violations and attendance records."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="from_date", help="First day to rebuild (YYYY-MM-DD), defaults to --to.")
+        parser.add_argument("--to", dest="to_date", help="Last day to rebuild (YYYY-MM-DD), defaults to today.")
+        parser.add_argument("--days", type=int, help="Rebuild this many days ending at --to instead of --from.")
+        parser.add_argument("--all", action="store_true", help="Rebuild every day that has any records.")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            rows = rebuild_all_daily_stats()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily stats rows"))
+            return
+
+        to_date = self.parse(options["to_date"]) or datetime.today().astimezone(settings.SAUDI_TZ).date()
+        if options["days"]:
+            from_date = to_date - timedelta(days=options["days"] - 1)
+        else:
+            from_date = self.parse(options["from_date"]) or to_date
+
+        if from_date > to_date:
+            raise CommandError("--from must not be after --to")
+
+        rows = rebuild_daily_stats(from_date, to_date)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily stats rows for {from_date} → {to_date}"))
+
+    @staticmethod
+    def parse(value):
+        if value is None:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"Invalid date: {value}")
+        return parsed
@@ -0,0 +1,115 @@
+import io
+import logging
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import FileField
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from samara.background import run_after_commit
+from .models import ProcessedImage
+
+logger = logging.getLogger(__name__)
+
+# variant -> longest side in pixels
+VARIANTS = {
+    "display": getattr(settings, "MEDIA_DISPLAY_SIZE", 1600),
+    "thumbnail": getattr(settings, "MEDIA_THUMBNAIL_SIZE", 320),
+}
+QUALITY = {"display": 80, "thumbnail": 70}
+
+
+def variant_format():
+    """WebP when Pillow was built with it, JPEG otherwise (or when MEDIA_VARIANT_FORMAT says so)."""
+    wanted = getattr(settings, "MEDIA_VARIANT_FORMAT", "WEBP").upper()
+    return wanted if wanted == "JPEG" or features.check("webp") else "JPEG"
+
+
+def image_names(instance) -> list:
+    """Names of the files uploaded to an instance's FileFields."""
+    return [file.name for field in instance._meta.concrete_fields if isinstance(field, FileField)
+            and (file := getattr(instance, field.attname))]
+
+
+def stored_image_names(instance) -> set:
+    """Names of the files the stored row of an instance references, one query."""
+    fields = [field.attname for field in instance._meta.concrete_fields if isinstance(field, FileField)]
+    stored = type(instance).objects.filter(pk=instance.pk).values_list(*fields).first() or ()
+    return {name for name in stored if name}
+
+
+def encode(image, variant, image_format):
+    resized = image.copy()
+    resized.thumbnail((VARIANTS[variant], VARIANTS[variant]), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    # no exif= argument: the metadata (GPS position, device...) is left out
+    resized.save(buffer, image_format, quality=QUALITY[variant], optimize=True)
+    return buffer.getvalue()
+
+
+def process_image(name, storage=default_storage) -> ProcessedImage | None:
+    """Records the image's variants, or why there are none; None if it was already processed."""
+    if ProcessedImage.objects.filter(source=name).exists():
+        return None
+
+    processed = ProcessedImage(source=name, size=storage.size(name))
+    try:
+        with storage.open(name) as file, Image.open(file) as image:
+            image.load()
+            # apply the orientation tag before dropping it
+            image = ImageOps.exif_transpose(image).convert("RGB")
+    except UnidentifiedImageError:
+        processed.status = ProcessedImage.Status.NOT_AN_IMAGE
+        processed.save()
+        return processed
+    except (OSError, Image.DecompressionBombError):
+        logger.warning("Couldn't read the image %s", name, exc_info=True)
+        processed.status = ProcessedImage.Status.FAILED
+        processed.save()
+        return processed
+
+    image_format = variant_format()
+    stem = PurePosixPath(name).stem
+    processed.width, processed.height = image.size
+    for variant in VARIANTS:
+        content = encode(image, variant, image_format)
+        getattr(processed, variant).save(f"{stem}-{variant}.{image_format.lower()}", ContentFile(content), save=False)
+        setattr(processed, f"{variant}_size", len(content))
+    processed.status = ProcessedImage.Status.PROCESSED
+    processed.save()
+    return processed
+
+
+def process_images(names):
+    for name in names:
+        try:
+            process_image(name)
+        except Exception:
+            logger.exception("Processing %s failed", name)
+
+
+def remove_variants(names):
+    # the stored files are removed by the post_delete receiver of ProcessedImage
+    ProcessedImage.objects.filter(source__in=names).delete()
+
+
+def process_images_on_commit(names):
+    """Builds the variants of the uploaded files in the background once their row is committed."""
+    if names:
+        run_after_commit(process_images, names)
+
+
+def remove_variants_on_commit(names):
+    if names:
+        run_after_commit(remove_variants, names)
+
+
+def variants_by_source(names) -> dict:
+    """One query for the processed variants of the given files."""
+    names = [name for name in names if name]
+    if not names:
+        return {}
+    return {image.source: image for image in ProcessedImage.objects.filter(source__in=names,
+                                                                            status=ProcessedImage.Status.PROCESSED)}
@@ -0,0 +1,84 @@
+# Generated by Django 5.2 on 2026-10-18 20:30
+
+import datetime
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+
+# the values of Visit.VisitStatus -> DailyStats.Metric
+VISIT_METRICS = {"مجدولة": "scheduled", "مكتملة": "completed"}
+
+
+def visit_period(visit_date, visit_time):
+    if visit_time < datetime.time(9, 0):
+        return visit_date - datetime.timedelta(days=1), "evening"
+    if visit_time >= datetime.time(21, 0):
+        return visit_date, "evening"
+    return visit_date, "morning"
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """The dashboards only read DailyStats, so it's filled from every existing record once."""
+    DailyStats = apps.get_model("visits", "DailyStats")
+    Visit = apps.get_model("visits", "Visit")
+    Violation = apps.get_model("visits", "Violation")
+    ShiftAttendance = apps.get_model("attendance", "ShiftAttendance")
+
+    # visits have no stored duty date yet, their buckets are counted from the date and time
+    visits = Counter()
+    for visit_date, visit_time, employee, status in Visit.objects.values_list(
+            "date", "time", "employee", "status").iterator(chunk_size=BATCH_SIZE):
+        if status in VISIT_METRICS:
+            day, period = visit_period(visit_date, visit_time)
+            visits[day, period, employee, VISIT_METRICS[status]] += 1
+    rows = [DailyStats(date=day, period=period, supervisor_id=employee, metric=metric, count=count)
+            for (day, period, employee, metric), count in visits.items()]
+
+    for metric, model in (("violations", Violation), ("attendance_records", ShiftAttendance)):
+        for day, created_by, count in model.objects.order_by().values_list("date", "created_by").annotate(
+                count=Count("id")):
+            if day is not None:
+                rows.append(DailyStats(date=day, period="day", supervisor_id=created_by, metric=metric,
+                                       count=count))
+
+    DailyStats.objects.all().delete()
+    DailyStats.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_alter_securityguardattendance_status'),
+        ('employees', '0013_employee_image'),
+        ('visits', '0016_visit_notes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='التاريخ')),
+                ('period', models.CharField(choices=[('morning', 'صباحي'), ('evening', 'مسائي'), ('day', 'اليوم كامل')], max_length=10, verbose_name='الفترة')),
+                ('metric', models.CharField(choices=[('scheduled', 'زيارات مجدولة'), ('completed', 'زيارات مكتملة'), ('violations', 'مخالفات'), ('attendance_records', 'سجلات حضور')], max_length=20, verbose_name='المؤشر')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='العدد')),
+                ('supervisor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='employees.employee', verbose_name='المشرف')),
+            ],
+            options={
+                'verbose_name': 'إحصائية يومية',
+                'verbose_name_plural': 'الإحصائيات اليومية',
+                'constraints': [
+                    models.UniqueConstraint(fields=('date', 'period', 'supervisor', 'metric'),
+                                            name='daily_stats_unique'),
+                    models.UniqueConstraint(condition=models.Q(('supervisor__isnull', True)),
+                                            fields=('date', 'period', 'metric'),
+                                            name='daily_stats_unique_without_supervisor'),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+import datetime
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def visit_period(visit_date, visit_time):
+    if visit_time < datetime.time(9, 0):
+        return visit_date - datetime.timedelta(days=1), "evening"
+    if visit_time >= datetime.time(21, 0):
+        return visit_date, "evening"
+    return visit_date, "morning"
+
+
+def backfill_duty_period(apps, schema_editor):
+    Visit = apps.get_model("visits", "Visit")
+
+    batch = []
+    for visit in Visit.objects.only("id", "date", "time").iterator(chunk_size=BATCH_SIZE):
+        visit.duty_date, visit.period = visit_period(visit.date, visit.time)
+        batch.append(visit)
+        if len(batch) >= BATCH_SIZE:
+            Visit.objects.bulk_update(batch, ["duty_date", "period"])
+            batch = []
+    if batch:
+        Visit.objects.bulk_update(batch, ["duty_date", "period"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0017_dailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visit',
+            name='duty_date',
+            field=models.DateField(editable=False, null=True, verbose_name='يوم المناوبة'),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='period',
+            field=models.CharField(choices=[('morning', 'صباحي'), ('evening', 'مسائي')], editable=False,
+                                   max_length=10, null=True, verbose_name='الفترة'),
+        ),
+        migrations.RunPython(backfill_duty_period, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='visit',
+            name='duty_date',
+            field=models.DateField(editable=False, verbose_name='يوم المناوبة'),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='period',
+            field=models.CharField(choices=[('morning', 'صباحي'), ('evening', 'مسائي')], editable=False,
+                                   max_length=10, verbose_name='الفترة'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['duty_date', 'period'], name='visit_duty_period_idx'),
+        ),
+    ]
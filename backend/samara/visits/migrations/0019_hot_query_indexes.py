@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0013_employee_image'),
+        ('projects', '0003_location_is_active'),
+        ('visits', '0018_visit_duty_date_period'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['created_by', 'date'], name='violation_creator_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['date'], name='violation_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['-created_at'], name='violation_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violation',
+            index=models.Index(fields=['created_by', '-created_at'], name='violation_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['employee', 'duty_date', 'period', 'status'], name='visit_employee_duty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['employee', 'date', 'time'], name='visit_employee_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['date', 'time'], name='visit_date_time_idx'),
+        ),
+    ]
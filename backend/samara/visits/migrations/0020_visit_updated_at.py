@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0019_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='اخر تعديل'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0020_visit_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='الملف الأصلي')),
+                ('status', models.CharField(choices=[('processed', 'تمت المعالجة'), ('not_an_image', 'ليس صورة'), ('failed', 'فشلت المعالجة')], max_length=20, verbose_name='الحالة')),
+                ('width', models.PositiveIntegerField(blank=True, null=True, verbose_name='العرض')),
+                ('height', models.PositiveIntegerField(blank=True, null=True, verbose_name='الارتفاع')),
+                ('size', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='حجم الملف الأصلي (بايت)')),
+                ('display', models.FileField(blank=True, null=True, upload_to='variants/', verbose_name='نسخة العرض')),
+                ('display_size', models.PositiveIntegerField(blank=True, null=True, verbose_name='حجم نسخة العرض (بايت)')),
+                ('thumbnail', models.FileField(blank=True, null=True, upload_to='variants/', verbose_name='الصورة المصغرة')),
+                ('thumbnail_size', models.PositiveIntegerField(blank=True, null=True, verbose_name='حجم الصورة المصغرة (بايت)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ المعالجة')),
+            ],
+            options={
+                'verbose_name': 'صورة معالجة',
+                'verbose_name_plural': 'الصور المعالجة',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 21:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0021_processedimage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=100, verbose_name='اسم الملف')),
+                ('size', models.PositiveBigIntegerField(verbose_name='الحجم (بايت)')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='البايتات المستلمة')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('status', models.CharField(choices=[('uploading', 'قيد الرفع'), ('complete', 'مكتمل'), ('attached', 'مرفق بتقرير')], default='uploading', max_length=20, verbose_name='الحالة')),
+                ('file', models.FileField(blank=True, null=True, upload_to='visit_reports/', verbose_name='الملف')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ البدء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='اخر تعديل')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL, verbose_name='بواسطة')),
+            ],
+            options={
+                'verbose_name': 'رفع مجزأ',
+                'verbose_name_plural': 'الرفع المجزأ',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 21:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0022_chunkedupload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, verbose_name='مفتاح العنصر')),
+                ('kind', models.CharField(choices=[('report', 'تقرير زيارة'), ('violation', 'مخالفة'), ('attendance', 'حضور وردية')], max_length=20, verbose_name='النوع')),
+                ('result', models.JSONField(default=dict, verbose_name='النتيجة')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ المزامنة')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='synced_items', to=settings.AUTH_USER_MODEL, verbose_name='بواسطة')),
+            ],
+            options={
+                'verbose_name': 'عنصر مزامنة',
+                'verbose_name_plural': 'عناصر المزامنة',
+                'unique_together': {('created_by', 'key')},
+            },
+        ),
+    ]
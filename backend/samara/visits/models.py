@@ -1,3 +1,6 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from employees.models import Employee
@@ -5,11 +8,38 @@ from datetime import datetime, time, timedelta
 from django.db.models import Q, QuerySet
 
 
+def visit_period(visit_date: datetime.date, visit_time: time) -> tuple[datetime.date, str]:
+    """
+    The duty day and period a visit belongs to.
+
+    Morning: 09:00 (day) → 20:59 (day)
+    Evening: 21:00 (day) → 08:59 (next day)
+    """
+    if visit_time < time(9, 0):
+        return visit_date - timedelta(days=1), Visit.Period.EVENING
+    if visit_time >= time(21, 0):
+        return visit_date, Visit.Period.EVENING
+    return visit_date, Visit.Period.MORNING
+
+
+class VisitQuerySet(QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips save(), so the duty fields are filled here
+        objs = list(objs)
+        for obj in objs:
+            obj.set_duty_period()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Visit(models.Model):
     class VisitStatus(models.TextChoices):
         SCHEDULED = "مجدولة", _("مجدولة")
         COMPLETED = "مكتملة", _("مكتملة")
 
+    class Period(models.TextChoices):
+        MORNING = "morning", _("صباحي")
+        EVENING = "evening", _("مسائي")
+
     location = models.ForeignKey(
         "projects.Location",
         on_delete=models.CASCADE,
@@ -56,6 +86,14 @@ class Visit(models.Model):
         verbose_name=_("ملاحظات"),
     )
 
+    # derived from date and time on save
+    duty_date = models.DateField(editable=False, verbose_name=_("يوم المناوبة"))
+    period = models.CharField(max_length=10, choices=Period.choices, editable=False, verbose_name=_("الفترة"))
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("اخر تعديل"))
+
+    objects = VisitQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("زيارة")
         verbose_name_plural = _("الزيارات")
@@ -64,10 +102,32 @@ class Visit(models.Model):
         # unique_together = ("location", "employee", "date", "time")
 
         ordering = ['date', 'time']
+        indexes = [
+            models.Index(fields=["duty_date", "period"], name="visit_duty_period_idx"),
+            models.Index(fields=["employee", "duty_date", "period", "status"], name="visit_employee_duty_idx"),
+            models.Index(fields=["employee", "date", "time"], name="visit_employee_date_idx"),
+            models.Index(fields=["date", "time"], name="visit_date_time_idx"),
+        ]
 
     def __str__(self):
         return f"{self.location} - {self.date}"
 
+    def set_duty_period(self):
+        # date and time may still hold raw strings when assigned directly
+        self.date = self._meta.get_field("date").to_python(self.date)
+        self.time = self._meta.get_field("time").to_python(self.time)
+        self.duty_date, self.period = visit_period(self.date, self.time)
+
+    def save(self, *args, **kwargs):
+        self.set_duty_period()
+        update_fields = kwargs.get("update_fields")
+        if update_fields:
+            update_fields = {*update_fields, "updated_at"}
+            if {"date", "time"} & update_fields:
+                update_fields |= {"duty_date", "period"}
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
 
 class VisitReport(models.Model):
     class EvaluationChoices(models.TextChoices):
@@ -254,15 +314,6 @@ class VisitReport(models.Model):
     def __str__(self):
         return f"تقرير زيارة {self.visit}"
 
-    def delete(self, using=None, keep_parents=False):
-        """Delete attachments as well."""
-        for field in self._meta.fields:
-            if isinstance(field, models.FileField):
-                file = getattr(self, field.name)
-                if file:
-                    file.delete(save=False)
-        super().delete(using=using, keep_parents=keep_parents)
-
 
 class Violation(models.Model):
     class ViolationType(models.TextChoices):
@@ -364,39 +415,157 @@ class Violation(models.Model):
         verbose_name = _("مخالفة")
         verbose_name_plural = _("المخالفات")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=["created_by", "date"], name="violation_creator_date_idx"),
+            models.Index(fields=["date"], name="violation_date_idx"),
+            models.Index(fields=["-created_at"], name="violation_created_at_idx"),
+            models.Index(fields=["created_by", "-created_at"], name="violation_creator_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.violation_type} - {self.created_at.strftime('%Y-%m-%d')} - location: {self.location.id}"
 
-    def delete(self, using=None, keep_parents=False):
-        if self.violation_image:
-            self.violation_image.delete()
-        super().delete(using, keep_parents=keep_parents)
 
+class DailyStats(models.Model):
+    """Pre-aggregated dashboard counters, one row per date × period × supervisor × metric."""
 
-def filter_visits_by_period(queryset, day: datetime.date, period: str) -> QuerySet[Visit]:
-    """
-    Filters visits for a given day and period (morning or evening).
+    class Period(models.TextChoices):
+        MORNING = "morning", _("صباحي")
+        EVENING = "evening", _("مسائي")
+        DAY = "day", _("اليوم كامل")
 
-    Morning: 09:00 (day) → 20:59 (day)
-    Evening: 21:00 (day) → 08:59 (next day)
-    """
-    if period == "morning":
-        start_time = time(9, 0)  # 09:00 AM
-        end_time = time(20, 59)  # 08:59 PM
-        return queryset.filter(
-            date=day,
-            time__range=(start_time, end_time),
-        )
+    class Metric(models.TextChoices):
+        SCHEDULED = "scheduled", _("زيارات مجدولة")
+        COMPLETED = "completed", _("زيارات مكتملة")
+        VIOLATIONS = "violations", _("مخالفات")
+        ATTENDANCE_RECORDS = "attendance_records", _("سجلات حضور")
+
+    date = models.DateField(verbose_name=_("التاريخ"))
+    period = models.CharField(max_length=10, choices=Period.choices, verbose_name=_("الفترة"))
+    supervisor = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="daily_stats",
+        verbose_name=_("المشرف"),
+    )
+    metric = models.CharField(max_length=20, choices=Metric.choices, verbose_name=_("المؤشر"))
+    count = models.PositiveIntegerField(default=0, verbose_name=_("العدد"))
+
+    class Meta:
+        verbose_name = _("إحصائية يومية")
+        verbose_name_plural = _("الإحصائيات اليومية")
+        constraints = [
+            models.UniqueConstraint(fields=["date", "period", "supervisor", "metric"], name="daily_stats_unique"),
+            # NULLs never conflict in the one above: the buckets of deleted employees' visits
+            models.UniqueConstraint(fields=["date", "period", "metric"], condition=models.Q(supervisor__isnull=True),
+                                    name="daily_stats_unique_without_supervisor"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.period} - {self.metric}: {self.count}"
+
+
+class ProcessedImage(models.Model):
+    """Resized, EXIF-free variants of an uploaded image, keyed by the uploaded file's name."""
+
+    class Status(models.TextChoices):
+        PROCESSED = "processed", _("تمت المعالجة")
+        NOT_AN_IMAGE = "not_an_image", _("ليس صورة")
+        FAILED = "failed", _("فشلت المعالجة")
+
+    source = models.CharField(max_length=255, unique=True, verbose_name=_("الملف الأصلي"))
+    status = models.CharField(max_length=20, choices=Status.choices, verbose_name=_("الحالة"))
+    width = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("العرض"))
+    height = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("الارتفاع"))
+    size = models.PositiveBigIntegerField(null=True, blank=True, verbose_name=_("حجم الملف الأصلي (بايت)"))
+
+    display = models.FileField(upload_to="variants/", null=True, blank=True, verbose_name=_("نسخة العرض"))
+    display_size = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("حجم نسخة العرض (بايت)"))
+    thumbnail = models.FileField(upload_to="variants/", null=True, blank=True, verbose_name=_("الصورة المصغرة"))
+    thumbnail_size = models.PositiveIntegerField(null=True, blank=True,
+                                                 verbose_name=_("حجم الصورة المصغرة (بايت)"))
 
-    elif period == "evening":
-        start_time = time(21, 0)  # 09:00 PM (same day)
-        end_time = time(8, 59)  # 08:59 AM (next day)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("تاريخ المعالجة"))
 
-        next_day = day + timedelta(days=1)
+    class Meta:
+        verbose_name = _("صورة معالجة")
+        verbose_name_plural = _("الصور المعالجة")
+
+    def __str__(self):
+        return self.source
+
+
+class ChunkedUpload(models.Model):
+    """A file uploaded in chunks, attached to a visit report by its id once complete."""
+
+    class Status(models.TextChoices):
+        UPLOADING = "uploading", _("قيد الرفع")
+        COMPLETE = "complete", _("مكتمل")
+        ATTACHED = "attached", _("مرفق بتقرير")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=100, verbose_name=_("اسم الملف"))
+    size = models.PositiveBigIntegerField(verbose_name=_("الحجم (بايت)"))
+    offset = models.PositiveBigIntegerField(default=0, verbose_name=_("البايتات المستلمة"))
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name=_("SHA-256"))
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.UPLOADING,
+                              verbose_name=_("الحالة"))
+    file = models.FileField(upload_to="visit_reports/", null=True, blank=True, verbose_name=_("الملف"))
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                   related_name="chunked_uploads", verbose_name=_("بواسطة"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("تاريخ البدء"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("اخر تعديل"))
+
+    class Meta:
+        verbose_name = _("رفع مجزأ")
+        verbose_name_plural = _("الرفع المجزأ")
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
 
-        return queryset.filter(
-            Q(date=day, time__gte=start_time) | Q(date=next_day, time__lte=end_time)
-        )
+    @property
+    def part_path(self):
+        return settings.CHUNKED_UPLOAD_DIR / f"{self.id}.part"
 
-    return queryset.none()
+
+class SyncedItem(models.Model):
+    """An item of an offline sync batch that was applied, so replaying its key returns the same result."""
+
+    class Kind(models.TextChoices):
+        REPORT = "report", _("تقرير زيارة")
+        VIOLATION = "violation", _("مخالفة")
+        ATTENDANCE = "attendance", _("حضور وردية")
+
+    key = models.CharField(max_length=64, verbose_name=_("مفتاح العنصر"))
+    kind = models.CharField(max_length=20, choices=Kind.choices, verbose_name=_("النوع"))
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                   related_name="synced_items", verbose_name=_("بواسطة"))
+    result = models.JSONField(default=dict, verbose_name=_("النتيجة"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("تاريخ المزامنة"))
+
+    class Meta:
+        verbose_name = _("عنصر مزامنة")
+        verbose_name_plural = _("عناصر المزامنة")
+        unique_together = ("created_by", "key")
+
+    def __str__(self):
+        return f"{self.kind} {self.key}"
+
+
+def visits_period_q(day: datetime.date, period: str) -> Q | None:
+    """Builds the lookup matching visits of a given duty day and period (morning or evening)."""
+    if period in Visit.Period.values:
+        return Q(duty_date=day, period=period)
+    return None
+
+
+def filter_visits_by_period(queryset, day: datetime.date, period: str) -> QuerySet[Visit]:
+    """
+    Filters visits for a given day and period (morning or evening).
+    """
+    period_q = visits_period_q(day, period)
+    if period_q is None:
+        return queryset.none()
+    return queryset.filter(period_q)
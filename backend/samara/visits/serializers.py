@@ -3,10 +3,53 @@ from datetime import datetime, timedelta, time
 
 from employees.models import SecurityGuardLocationShift, Employee
 from users.models import User
-from .models import Visit, VisitReport, Violation
+from .media import image_names, variants_by_source
+from .models import ChunkedUpload, Visit, VisitReport, Violation
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.db.models import Count, FileField, OuterRef, Subquery
+from django.utils.text import get_valid_filename
+from django.utils.translation import gettext_lazy as _
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
 
 
+class ImageVariantsListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        # the variants of the whole list in one query, read by the child's get_images
+        self.context["image_variants"] = variants_by_source(name for item in items for name in image_names(item))
+        return super().to_representation(items)
+
+
+class ImageVariantsMixin:
+    """
+    ``get_images`` for an ``images`` field: the resized, EXIF-free variants of each uploaded image,
+    for lists and previews to load instead of the originals. Images still being processed are left out.
+    """
+
+    def get_images(self, obj):
+        variants = self.context.get("image_variants")
+        if variants is None:
+            variants = variants_by_source(image_names(obj))
+        request = self.context.get("request")
+
+        def url(file):
+            return request.build_absolute_uri(file.url) if request else file.url
+
+        images = {}
+        for field in obj._meta.concrete_fields:
+            file = getattr(obj, field.attname) if isinstance(field, FileField) else None
+            if file and file.name in variants:
+                image = variants[file.name]
+                images[field.name] = {
+                    "display": url(image.display), "thumbnail": url(image.thumbnail),
+                    "width": image.width, "height": image.height, "size": image.size,
+                    "display_size": image.display_size, "thumbnail_size": image.thumbnail_size,
+                }
+        return images
+
+
 class VisitReadSerializer(serializers.ModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name='visit-detail')
     location = serializers.SerializerMethodField(read_only=True)
@@ -20,7 +63,32 @@ class VisitReadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Visit
-        fields = '__all__'
+        # internal columns: the period filters and the ETag read them, the API never returned them
+        exclude = ["duty_date", "period", "updated_at"]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Loads everything the serializer reads per visit along with the visits themselves."""
+        guards_count = (
+            SecurityGuardLocationShift.objects
+            .filter(location=OuterRef("location"))
+            .order_by()
+            .values("location")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return (
+            queryset
+            .select_related("location__project", "employee", "report")
+            .annotate(location_guards_count=Coalesce(Subquery(guards_count), 0))
+        )
+
+    def get_supervisors_count(self):
+        # same for every row, so computed once and kept in the (shared) serializer context
+        if "supervisors_count" not in self.context:
+            self.context["supervisors_count"] = Employee.objects.filter(
+                user__role=User.RoleChoices.SUPERVISOR).count()
+        return self.context["supervisors_count"]
 
     def get_completed_at(self, obj):
         if obj.completed_at:
@@ -44,9 +112,13 @@ class VisitReadSerializer(serializers.ModelSerializer):
         return (is_today or is_last_night) and is_scheduled
 
     def get_location(self, obj: Visit):
+        guards_count = getattr(obj, "location_guards_count", None)
+        if guards_count is None:
+            guards_count = SecurityGuardLocationShift.objects.filter(location=obj.location).count()
+
         return {"name": obj.location.name, "project_name": obj.location.project.name,
-                "guards_count": SecurityGuardLocationShift.objects.filter(location=obj.location).count(),
-                "supervisors_count": Employee.objects.filter(user__role=User.RoleChoices.SUPERVISOR).count()}
+                "guards_count": guards_count,
+                "supervisors_count": self.get_supervisors_count()}
 
 
 class VisitWriteSerializer(serializers.ModelSerializer):
@@ -54,7 +126,7 @@ class VisitWriteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Visit
-        fields = '__all__'
+        exclude = ["duty_date", "updated_at"]
 
     def create(self, validated_data):
         period = validated_data.pop("period")
@@ -78,14 +150,20 @@ class VisitWriteSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class VisitReportReadSerializer(serializers.ModelSerializer):
+class VisitReportReadSerializer(ImageVariantsMixin, serializers.ModelSerializer):
     visit = serializers.SerializerMethodField()
     created_at = serializers.SerializerMethodField(read_only=True)
     has_location = serializers.SerializerMethodField(read_only=True)
+    images = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = VisitReport
         fields = '__all__'
+        list_serializer_class = ImageVariantsListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("visit__location__project", "visit__employee")
 
     def get_visit(self, obj: VisitReport):
         return {"id": obj.visit.id, "location_name": obj.visit.location.name,
@@ -100,20 +178,79 @@ class VisitReportReadSerializer(serializers.ModelSerializer):
 
 class VisitReportWriteSerializer(serializers.ModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name='visit-report-detail')
+    # attachment field -> id of a completed chunked upload, instead of the file itself
+    uploads = serializers.DictField(child=serializers.UUIDField(), write_only=True, required=False)
 
     class Meta:
         model = VisitReport
         fields = '__all__'
 
+    def validate_uploads(self, value):
+        attachment_fields = {field.name for field in VisitReport._meta.concrete_fields if isinstance(field, FileField)}
+        if set(value) - attachment_fields:
+            raise serializers.ValidationError(_("حقل مرفق غير معروف"))
+
+        uploads = ChunkedUpload.objects.filter(created_by=self.context["request"].user,
+                                               status=ChunkedUpload.Status.COMPLETE).in_bulk(value.values())
+        if len(uploads) != len(set(value.values())):
+            raise serializers.ValidationError(_("الملف المرفوع غير موجود أو لم يكتمل رفعه"))
+        return {field: uploads[pk] for field, pk in value.items()}
+
+    def attach_uploads(self, validated_data):
+        """The attachments reference the uploaded files; each upload can be attached once."""
+        uploads = validated_data.pop("uploads", {})
+        for field, upload in uploads.items():
+            validated_data[field] = upload.file.name
+        ids = {upload.pk for upload in uploads.values()}
+        if ids and ChunkedUpload.objects.filter(pk__in=ids, status=ChunkedUpload.Status.COMPLETE).update(
+                status=ChunkedUpload.Status.ATTACHED) != len(ids):
+            raise serializers.ValidationError({"uploads": [_("الملف المرفوع مرفق بتقرير آخر")]})
+
     def create(self, validated_data):
-        instance = super().create(validated_data)
+        with transaction.atomic():
+            self.attach_uploads(validated_data)
+            instance = super().create(validated_data)
         instance.visit.status = Visit.VisitStatus.COMPLETED
         instance.visit.completed_at = datetime.now().astimezone(settings.SAUDI_TZ)
         instance.visit.save()
         return instance
 
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            self.attach_uploads(validated_data)
+            return super().update(instance, validated_data)
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    max_chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ["id", "filename", "size", "sha256", "offset", "status", "file", "max_chunk_size", "created_at"]
+        read_only_fields = ["offset", "status", "file", "created_at"]
+
+    def get_max_chunk_size(self, obj):
+        return settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE
+
+    def validate_filename(self, value):
+        try:
+            return get_valid_filename(value.replace("\\", "/").rsplit("/", 1)[-1])
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError(_("اسم ملف غير صالح"))
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(_("حجم الملف غير مسموح به"))
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or set(value) - set("0123456789abcdef")):
+            raise serializers.ValidationError(_("قيمة SHA-256 غير صالحة"))
+        return value
+
 
-class ViolationReadSerializer(serializers.ModelSerializer):
+class ViolationReadSerializer(ImageVariantsMixin, serializers.ModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name='violation-detail')
     project_name = serializers.StringRelatedField(source='location.project.name', read_only=True)
     location_name = serializers.StringRelatedField(source='location.name', read_only=True)
@@ -122,11 +259,13 @@ class ViolationReadSerializer(serializers.ModelSerializer):
     created_by = serializers.StringRelatedField(source='created_by.name', read_only=True)
     updated_at = serializers.SerializerMethodField(read_only=True)
     time = serializers.TimeField(read_only=True, format='%I:%M %p')
+    images = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Violation
         fields = '__all__'
         read_only_fields = ("created_by",)
+        list_serializer_class = ImageVariantsListSerializer
 
     def get_created_at(self, obj):
         return obj.created_at.astimezone(settings.SAUDI_TZ).strftime('%Y-%m-%d %I:%M %p')
@@ -0,0 +1,148 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from attendance.models import ShiftAttendance
+from employees.models import Employee
+from .daily_stats import refresh_visit_stats, refresh_violation_stats, refresh_attendance_stats
+from .media import image_names, process_images_on_commit, remove_variants_on_commit, stored_image_names
+from .models import Visit, VisitReport, Violation
+
+# (model, fields building the stats bucket of an instance, refresh function)
+TRACKED_MODELS = {
+    Visit: (("duty_date", "employee_id"), refresh_visit_stats),
+    Violation: (("date", "created_by_id"), refresh_violation_stats),
+    ShiftAttendance: (("date", "created_by_id"), refresh_attendance_stats),
+}
+
+_deferred = local()
+
+
+@contextmanager
+def deferred_stats_refresh():
+    """
+    Refreshes every touched (day, supervisor) bucket once when the block exits instead of once per
+    saved or deleted row, for bulk operations going through the signals.
+    """
+    if getattr(_deferred, "buckets", None) is not None:  # nested
+        yield
+        return
+
+    _deferred.buckets, _deferred.report_visits = set(), set()
+    try:
+        yield
+        buckets, report_visits = _deferred.buckets, _deferred.report_visits
+    finally:
+        _deferred.buckets = _deferred.report_visits = None
+
+    for visit in Visit.objects.filter(pk__in=report_visits).values_list("duty_date", "employee_id"):
+        buckets.add((refresh_visit_stats, visit))
+    for refresh, bucket in buckets:
+        refresh(*bucket)
+
+
+def _refresh(refresh, bucket):
+    buckets = getattr(_deferred, "buckets", None)
+    if buckets is None:
+        refresh(*bucket)
+    else:
+        buckets.add((refresh, bucket))
+
+
+def _bucket(instance):
+    """The (day, supervisor id) stats bucket an instance is counted in."""
+    if isinstance(instance, Visit):
+        return instance.duty_date, instance.employee_id
+    return instance.date, instance.created_by_id
+
+
+@receiver(pre_save, sender=Visit)
+@receiver(pre_save, sender=Violation)
+@receiver(pre_save, sender=ShiftAttendance)
+def remember_stats_bucket(sender, instance, raw=False, **kwargs):
+    """Keep the bucket of the stored row, so moving a record refreshes the bucket it left."""
+    instance._previous_stats_bucket = None
+    if raw or instance.pk is None:
+        return
+
+    fields, _ = TRACKED_MODELS[sender]
+    previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    if previous:
+        instance._previous_stats_bucket = _bucket(sender(**previous))
+
+
+@receiver(post_save, sender=Visit)
+@receiver(post_save, sender=Violation)
+@receiver(post_save, sender=ShiftAttendance)
+def update_daily_stats_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    _, refresh = TRACKED_MODELS[sender]
+    buckets = {_bucket(instance), getattr(instance, "_previous_stats_bucket", None)}
+    for bucket in buckets - {None}:
+        _refresh(refresh, bucket)
+
+
+@receiver(post_delete, sender=Visit)
+@receiver(post_delete, sender=Violation)
+@receiver(post_delete, sender=ShiftAttendance)
+def update_daily_stats_on_delete(sender, instance, **kwargs):
+    _, refresh = TRACKED_MODELS[sender]
+    _refresh(refresh, _bucket(instance))
+
+
+@receiver(pre_delete, sender=Employee)
+def remember_employee_visit_days(sender, instance, **kwargs):
+    """
+    Deleting an employee nulls Visit.employee with a plain UPDATE and cascades to their DailyStats rows,
+    so the visits they leave move to the unassigned buckets of these days.
+    """
+    instance._visit_days = set(Visit.objects.filter(employee=instance).values_list("duty_date", flat=True))
+
+
+@receiver(post_delete, sender=Employee)
+def update_daily_stats_on_employee_delete(sender, instance, **kwargs):
+    for day in getattr(instance, "_visit_days", ()):
+        _refresh(refresh_visit_stats, (day, None))
+
+
+@receiver(post_save, sender=VisitReport)
+@receiver(post_delete, sender=VisitReport)
+def update_daily_stats_on_report(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    if getattr(_deferred, "report_visits", None) is not None:
+        _deferred.report_visits.add(instance.visit_id)
+        return
+    visit = Visit.objects.filter(pk=instance.visit_id).values_list("duty_date", "employee_id").first()
+    if visit:
+        refresh_visit_stats(*visit)
+
+
+@receiver(pre_save, sender=VisitReport)
+@receiver(pre_save, sender=Violation)
+def remember_image_names(sender, instance, raw=False, **kwargs):
+    """Keep the files of the stored row, so the variants of a replaced file are removed."""
+    instance._previous_image_names = set()
+    if not raw and instance.pk is not None:
+        instance._previous_image_names = stored_image_names(instance)
+
+
+@receiver(post_save, sender=VisitReport)
+@receiver(post_save, sender=Violation)
+def process_uploaded_images(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    names = image_names(instance)
+    # files that already have variants are skipped by the worker
+    process_images_on_commit(names)
+    remove_variants_on_commit(sorted(getattr(instance, "_previous_image_names", set()) - set(names)))
+
+
+@receiver(post_delete, sender=VisitReport)
+@receiver(post_delete, sender=Violation)
+def remove_image_variants(sender, instance, **kwargs):
+    remove_variants_on_commit(image_names(instance))
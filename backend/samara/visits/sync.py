@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from attendance.views import save_shift_attendance
+from .models import SyncedItem
+from .serializers import VisitReportWriteSerializer, ViolationWriteSerializer
+from .signals import deferred_stats_refresh
+
+SYNC_MAX_ITEMS = getattr(settings, "SYNC_MAX_ITEMS", 200)
+
+
+class AlreadySynced(Exception):
+    """The key was applied by a concurrent request replaying the same batch."""
+
+
+def apply_report(data, request) -> dict:
+    serializer = VisitReportWriteSerializer(data=data, context={"request": request})
+    serializer.is_valid(raise_exception=True)
+    report = serializer.save()
+    return {"id": report.id, "visit": report.visit_id}
+
+
+def apply_violation(data, request) -> dict:
+    serializer = ViolationWriteSerializer(data=data, context={"request": request})
+    serializer.is_valid(raise_exception=True)
+    return {"id": serializer.save().id}
+
+
+def apply_attendance(data, request) -> dict:
+    return {"id": save_shift_attendance(data, request.user.employee_profile).id}
+
+
+APPLY = {
+    SyncedItem.Kind.REPORT: apply_report,
+    SyncedItem.Kind.VIOLATION: apply_violation,
+    SyncedItem.Kind.ATTENDANCE: apply_attendance,
+}
+
+CONFLICTS = {
+    SyncedItem.Kind.ATTENDANCE: _("تم تسجيل حضور هذه الوردية لهذا اليوم"),
+}
+
+
+def invalid_item(item):
+    if not isinstance(item, dict):
+        return _("عنصر غير صالح")
+    key = item.get("key")
+    if not isinstance(key, str) or not 0 < len(key) <= SyncedItem._meta.get_field("key").max_length:
+        return _("مفتاح العنصر غير صالح")
+    if item.get("type") not in APPLY:
+        return _("نوع العنصر غير صالح")
+    if not isinstance(item.get("data"), dict):
+        return _("بيانات العنصر غير صالحة")
+    return None
+
+
+def apply_item(kind, key, data, request) -> tuple[int, dict]:
+    """(status, data or errors) of one item, applied in its own savepoint."""
+    try:
+        with transaction.atomic():
+            result = APPLY[kind](data, request)
+            try:
+                with transaction.atomic():
+                    SyncedItem.objects.create(key=key, kind=kind, created_by=request.user, result=result)
+            except IntegrityError:
+                raise AlreadySynced()
+        return status.HTTP_201_CREATED, result
+    except ValidationError as e:
+        return status.HTTP_400_BAD_REQUEST, e.detail
+    except Http404:
+        return status.HTTP_404_NOT_FOUND, {"detail": _("العنصر المرتبط غير موجود")}
+    except IntegrityError:
+        return status.HTTP_409_CONFLICT, {"detail": CONFLICTS.get(kind, _("العنصر مسجل بالفعل"))}
+    except (KeyError, TypeError, ValueError, DjangoValidationError):
+        return status.HTTP_400_BAD_REQUEST, {"detail": _("بيانات العنصر غير صالحة")}
+
+
+def sync_items(items, request) -> list:
+    """
+    Applies a batch of offline items in one transaction. Every item gets its own result; an item whose
+    key was applied before (by an earlier attempt of the batch) isn't applied again and gets its first
+    result back, so a device can resend its whole queue until it sees the response.
+    """
+    keys = [item["key"] for item in items if invalid_item(item) is None]
+    synced = {key: result for key, result in SyncedItem.objects.filter(
+        created_by=request.user, key__in=keys).values_list("key", "result")}
+
+    results = []
+    with transaction.atomic(), deferred_stats_refresh():
+        for item in items:
+            error = invalid_item(item)
+            if error:
+                key = item.get("key") if isinstance(item, dict) else None
+                results.append({"key": key, "status": status.HTTP_400_BAD_REQUEST, "errors": {"detail": error}})
+                continue
+
+            key, kind = item["key"], item["type"]
+            replayed = key in synced
+            if not replayed:
+                try:
+                    code, body = apply_item(kind, key, item["data"], request)
+                except AlreadySynced:
+                    synced[key] = SyncedItem.objects.get(created_by=request.user, key=key).result
+                    replayed = True
+                else:
+                    if code != status.HTTP_201_CREATED:
+                        results.append({"key": key, "type": kind, "status": code, "errors": body})
+                        continue
+                    synced[key] = body
+            results.append({"key": key, "type": kind, "status": status.HTTP_201_CREATED, "data": synced[key],
+                            "replayed": replayed})
+    return results
@@ -1,3 +1,805 @@
+import base64
+import hashlib
+import io
+import json
+import tempfile
+from datetime import date, datetime, time, timedelta
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.test import APIClient
+
+from attendance.models import ShiftAttendance
+from employees.models import Employee, SecurityGuard, SecurityGuardLocationShift, Shift
+from projects.models import Project, Location
+from samara.testing import Endpoint, QueryBudgetTestCase
+from users.models import User
+from . import media, sync
+from .models import ChunkedUpload, DailyStats, ProcessedImage, Visit, VisitReport, Violation
+from .views import VisitViewSet
+
+
+def create_employee(username, role=User.RoleChoices.SUPERVISOR):
+    user = User.objects.create_user(username, "password", role=role)
+    return Employee.objects.create(employee_id=username, name=username, phone="0500000000", national_id=username,
+                                   created_by=user, user=user)
+
+
+def read_json(response):
+    # no_pagination lists are streamed
+    return json.loads(b"".join(response.streaming_content)) if response.streaming else response.json()
+
+
+def stats_snapshot():
+    return sorted(DailyStats.objects.values_list("date", "period", "supervisor", "metric", "count"))
+
+
+class DailyStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = date(2025, 10, 1)
+        cls.supervisor = create_employee("supervisor")
+        cls.other = create_employee("other")
+        project = Project.objects.create(name="project")
+        cls.location = Location.objects.create(name="location", project=project)
+
+    def create_visit(self, **kwargs):
+        return Visit.objects.create(**{"location": self.location, "employee": self.supervisor, "date": self.day,
+                                       "time": time(10, 0), "purpose": "-", **kwargs})
+
+    def assert_matches_rebuild(self):
+        incremental = stats_snapshot()
+        call_command("rebuild_daily_stats", "--from", "2025-09-25", "--to", "2025-10-10", stdout=StringIO())
+        self.assertEqual(incremental, stats_snapshot())
+
+    def test_visit_buckets(self):
+        self.create_visit()
+        self.create_visit(time=time(23, 0))
+        self.create_visit(date=self.day + timedelta(days=1), time=time(3, 0))
+
+        counts = dict(DailyStats.objects.filter(date=self.day).values_list("period", "count"))
+        self.assertEqual(counts, {DailyStats.Period.MORNING: 1, DailyStats.Period.EVENING: 2})
+        self.assert_matches_rebuild()
+
+    def test_moving_a_visit_refreshes_both_buckets(self):
+        visit = self.create_visit()
+        visit.date = self.day + timedelta(days=2)
+        visit.employee = self.other
+        visit.save()
+
+        self.assertFalse(DailyStats.objects.filter(date=self.day).exists())
+        self.assertEqual(DailyStats.objects.get(date=visit.date).supervisor, self.other)
+        self.assert_matches_rebuild()
+
+    def test_report_completes_visit(self):
+        visit = self.create_visit()
+        VisitReport.objects.create(visit=visit, guard_presence="جيد", uniform_cleanliness="جيد",
+                                   attendance_records="جيد", shift_handover="جيد", lighting="جيد", cameras="جيد",
+                                   security_vehicles="جيد", radio_devices="جيد", other="جيد")
+        visit.status = Visit.VisitStatus.COMPLETED
+        visit.save()
+
+        self.assertEqual(DailyStats.objects.get(date=self.day).metric, DailyStats.Metric.COMPLETED)
+        visit.delete()
+        self.assertFalse(DailyStats.objects.exists())
+
+    def test_violations_and_attendance(self):
+        violation = Violation.objects.create(location=self.location, details="-", date=self.day,
+                                             violation_type=Violation.ViolationType.LATE,
+                                             severity=Violation.SeverityLevel.LOW, created_by=self.supervisor)
+        ShiftAttendance.objects.create(location=self.location, date=self.day, created_by=self.supervisor,
+                                       shift=Shift.objects.get(name=Shift.ShiftChoices.FIRST))
+        self.assert_matches_rebuild()
+
+        violation.delete()
+        self.assertEqual(list(DailyStats.objects.values_list("metric", flat=True)),
+                         [DailyStats.Metric.ATTENDANCE_RECORDS])
+
+    def test_deleting_an_employee_keeps_their_visits_counted(self):
+        self.create_visit()
+        self.create_visit(employee=self.other, time=time(23, 0))
+        Violation.objects.create(location=self.location, details="-", date=self.day,
+                                 violation_type=Violation.ViolationType.LATE,
+                                 severity=Violation.SeverityLevel.LOW, created_by=self.supervisor)
+
+        self.supervisor.delete()
+
+        self.assertEqual(DailyStats.objects.get(date=self.day, supervisor=None).metric, DailyStats.Metric.SCHEDULED)
+        self.assert_matches_rebuild()
+
+    def test_refresh_updates_the_rows_in_place(self):
+        self.create_visit()
+        row = DailyStats.objects.get()
+        self.create_visit(location=Location.objects.create(name="other", project=self.location.project))
+
+        self.assertEqual(DailyStats.objects.get().pk, row.pk)
+        self.assertEqual(DailyStats.objects.get().count, 2)
+
+    def test_buckets_without_supervisor_are_unique(self):
+        fields = {"date": self.day, "period": DailyStats.Period.DAY, "metric": DailyStats.Metric.VIOLATIONS}
+        DailyStats.objects.create(supervisor=None, count=1, **fields)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DailyStats.objects.create(supervisor=None, count=1, **fields)
+
+    def test_backfill_migration_matches_rebuild(self):
+        backfill = import_module("visits.migrations.0017_dailystats").backfill_daily_stats
+        self.create_visit()
+        self.create_visit(employee=None, date=self.day + timedelta(days=1), time=time(2, 0))
+        Violation.objects.create(location=self.location, details="-", date=self.day,
+                                 violation_type=Violation.ViolationType.LATE,
+                                 severity=Violation.SeverityLevel.LOW, created_by=self.other)
+        ShiftAttendance.objects.create(location=self.location, date=self.day, created_by=self.supervisor,
+                                       shift=Shift.objects.get(name=Shift.ShiftChoices.FIRST))
+        expected = stats_snapshot()
+
+        DailyStats.objects.all().delete()
+        backfill(apps, None)
+        self.assertEqual(stats_snapshot(), expected)
+
+        DailyStats.objects.all().delete()
+        call_command("rebuild_daily_stats", "--all", stdout=StringIO())
+        self.assertEqual(stats_snapshot(), expected)
+
+
+class VisitListQueriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = create_employee("supervisor")
+        project = Project.objects.create(name="project")
+        cls.locations = Location.objects.bulk_create(
+            [Location(name=f"location {i}", project=project) for i in range(3)]
+        )
+        guard = SecurityGuard.objects.create(name="guard", employee_id=1)
+        SecurityGuardLocationShift.objects.create(guard=guard, location=cls.locations[0],
+                                                  shift=Shift.objects.get(name=Shift.ShiftChoices.FIRST))
+
+    def add_visits(self, count):
+        Visit.objects.bulk_create(
+            [Visit(location=self.locations[i % 3], employee=self.supervisor, date=date(2025, 10, 1),
+                   time=time(10, 0), purpose="-") for i in range(count)]
+        )
+
+    def list_visits(self):
+        client = APIClient()
+        client.force_authenticate(self.supervisor.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse("visit-list"), {"no_pagination": "true", "from": "2025-10-01",
+                                                          "to": "2025-10-01"})
+            data = read_json(response)
+        self.assertEqual(response.status_code, 200)
+        return data, len(ctx.captured_queries)
+
+    def test_query_count_is_independent_of_visits(self):
+        self.add_visits(5)
+        _, small_count = self.list_visits()
+
+        self.add_visits(195)
+        data, large_count = self.list_visits()
+
+        self.assertEqual(len(data), 200)
+        self.assertEqual(small_count, large_count)
+        self.assertLessEqual(large_count, 4)
+
+        locations = {visit["location"]["name"]: visit["location"] for visit in data}
+        self.assertEqual(locations["location 0"], {"name": "location 0", "project_name": "project",
+                                                   "guards_count": 1, "supervisors_count": 1})
+        self.assertEqual(locations["location 1"]["guards_count"], 0)
+
+    def test_internal_columns_are_not_returned(self):
+        self.add_visits(1)
+        data, _ = self.list_visits()
+
+        self.assertEqual(set(data[0]) & {"duty_date", "period", "updated_at"}, set())
+
+
+class VisitPeriodTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = create_employee("supervisor")
+        project = Project.objects.create(name="project")
+        cls.location = Location.objects.create(name="location", project=project)
+
+    def test_duty_period_is_computed_on_save(self):
+        visit = Visit.objects.create(location=self.location, date=date(2025, 10, 2), time=time(8, 30), purpose="-")
+        self.assertEqual((visit.duty_date, visit.period), (date(2025, 10, 1), Visit.Period.EVENING))
+
+        visit.time = time(21, 0)
+        visit.save(update_fields=["time"])
+        visit.refresh_from_db()
+        self.assertEqual((visit.duty_date, visit.period), (date(2025, 10, 2), Visit.Period.EVENING))
+
+        [visit] = Visit.objects.bulk_create([Visit(location=self.location, date=date(2025, 10, 2), time=time(9, 0),
+                                                   purpose="-")])
+        self.assertEqual((visit.duty_date, visit.period), (date(2025, 10, 2), Visit.Period.MORNING))
+
+    def test_duty_period_from_strings(self):
+        visit = Visit.objects.create(location=self.location, date="2025-10-02", time="08:30", purpose="-")
+        self.assertEqual((visit.duty_date, visit.period), (date(2025, 10, 1), Visit.Period.EVENING))
+
+        client = APIClient()
+        client.force_authenticate(create_employee("admin", User.RoleChoices.ADMIN).user)
+        response = client.post(reverse("visit-list"), {"location": self.location.id, "employee": self.supervisor.id,
+                                                       "date": "2025-10-01", "time": "02:00", "period": "evening",
+                                                       "purpose": "-"})
+        self.assertEqual(response.status_code, 201, response.content)
+        visit = Visit.objects.get(pk=response.json()["id"])
+        self.assertEqual((visit.date, visit.duty_date, visit.period),
+                         (date(2025, 10, 2), date(2025, 10, 1), Visit.Period.EVENING))
+        self.assertEqual(set(response.json()) & {"duty_date", "period", "updated_at"}, set())
+
+    def test_list_filters_by_period(self):
+        for day, visit_time in ((1, time(23, 0)), (2, time(3, 0)), (2, time(12, 0)), (4, time(3, 0))):
+            Visit.objects.create(location=self.location, employee=self.supervisor, date=date(2025, 10, day),
+                                 time=visit_time, purpose="-")
+
+        client = APIClient()
+        client.force_authenticate(self.supervisor.user)
+        params = {"no_pagination": "true", "from": "2025-10-01", "to": "2025-10-02"}
+
+        evening = read_json(client.get(reverse("visit-list"), {**params, "period": "evening"}))
+        morning = read_json(client.get(reverse("visit-list"), {**params, "period": "morning"}))
+
+        self.assertEqual([(v["date"], v["time"]) for v in evening], [("2025-10-01", "11:00 PM"),
+                                                                     ("2025-10-02", "03:00 AM")])
+        self.assertEqual([(v["date"], v["time"]) for v in morning], [("2025-10-02", "12:00 PM")])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_employee("admin", role=User.RoleChoices.ADMIN)
+        project = Project.objects.create(name="project")
+        cls.location = Location.objects.create(name="location", project=project)
+        cls.visit = Visit.objects.create(location=cls.location, employee=cls.admin, date=date(2025, 10, 1),
+                                         time=time(10, 0), purpose="-")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin.user)
+
+    def get(self, url, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, headers=headers)
+        return response, len(ctx.captured_queries)
+
+    def test_unchanged_list_is_not_modified(self):
+        first, _ = self.get(reverse("visit-list"))
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn("Last-Modified", first)
+
+        second, queries = self.get(reverse("visit-list"), first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.content, b"")
+        self.assertEqual(queries, 1)  # the version aggregate
+
+    def test_changes_produce_a_new_etag(self):
+        first, _ = self.get(reverse("visit-detail", args=[self.visit.id]))
+
+        self.visit.purpose = "changed"
+        self.visit.save(update_fields=["purpose"])
+        self.assertEqual(self.get(reverse("visit-detail", args=[self.visit.id]), first["ETag"])[0].status_code, 200)
+
+        etag = self.get(reverse("visit-list"))[0]["ETag"]
+        self.location.name = "renamed"
+        self.location.save()
+        self.assertEqual(self.get(reverse("visit-list"), etag)[0].status_code, 200)
+
+    def test_etag_depends_on_the_day_and_employees(self):
+        etag = self.get(reverse("visit-list"))[0]["ETag"]
+
+        class Tomorrow(datetime):
+            @classmethod
+            def today(cls):
+                return datetime.today() + timedelta(days=1)
+
+        with patch("visits.views.datetime", Tomorrow):
+            self.assertEqual(self.get(reverse("visit-list"), etag)[0].status_code, 200)
+
+        create_employee("supervisor")  # counted in supervisors_count
+        self.assertEqual(self.get(reverse("visit-list"), etag)[0].status_code, 200)
+
+    def test_if_modified_since_is_ignored(self):
+        Visit.objects.create(location=self.location, employee=self.admin, date=date(2025, 10, 2), time=time(10, 0),
+                             purpose="-")
+        self.visit.delete()
+
+        response = self.client.get(reverse("visit-list"), headers={"If-Modified-Since": http_date()})
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_pk_is_not_found(self):
+        for name in ("visit-detail", "violation-detail", "security-guard-detail", "project-detail"):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(name, args=["abc"])).status_code, 404)
+
+    def test_etag_depends_on_filters(self):
+        etag = self.get(reverse("visit-list"))[0]["ETag"]
+        response, _ = self.get(reverse("visit-list") + "?page_size=5", etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_employee("admin", role=User.RoleChoices.ADMIN)
+        project = Project.objects.create(name="project")
+        location = Location.objects.create(name="location", project=project)
+        # ties on date and time, so the id has to break them
+        Visit.objects.bulk_create([Visit(location=location, employee=cls.admin, date=date(2025, 10, 1 + i % 3),
+                                         time=time(10 + i % 2, 0), purpose="-") for i in range(23)])
+        Violation.objects.bulk_create([Violation(location=location, details="-", created_by=cls.admin,
+                                                 violation_type=Violation.ViolationType.LATE,
+                                                 severity=Violation.SeverityLevel.LOW) for _ in range(17)])
+        Violation.objects.filter(id__lte=Violation.objects.order_by("id")[8].id).update(
+            created_at=Violation.objects.order_by("id").first().created_at)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin.user)
+
+    def walk(self, url):
+        pages, forward = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            forward += [item["id"] for item in pages[-1]["data"]]
+            url = pages[-1]["next"]
+
+        backward = []
+        url = pages[-1]["previous"]
+        while url:
+            page = self.client.get(url).json()
+            backward = [item["id"] for item in page["data"]] + backward
+            url = page["previous"]
+        return pages, forward, backward
+
+    def test_visits_follow_date_time_id(self):
+        expected = list(Visit.objects.order_by("date", "time", "id").values_list("id", flat=True))
+        pages, forward, backward = self.walk(reverse("visit-list") + "?cursor=&page_size=5&with_count=true")
+
+        self.assertEqual(forward, expected)
+        self.assertEqual(backward, expected[:-3])  # everything before the last page
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(pages[0]["count"], 23)
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_violations_follow_newest_first(self):
+        expected = list(Violation.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        pages, forward, backward = self.walk(reverse("violation-list") + "?cursor=&page_size=4")
+
+        self.assertEqual(forward, expected)
+        self.assertEqual(backward, expected[:-1])
+        self.assertIsNone(pages[0]["count"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(reverse("visit-list"), {"cursor": "broken"}).status_code, 404)
+        # well-formed, but not a date
+        bad_date = base64.urlsafe_b64encode(json.dumps({"v": ["2025-13-45", "10:00:00", 1], "r": False}).encode())
+        self.assertEqual(self.client.get(reverse("visit-list"), {"cursor": bad_date.decode()}).status_code, 404)
+
+    def test_no_pagination_streams_every_row(self):
+        response = self.client.get(reverse("violation-list"), {"no_pagination": "true"})
+
+        self.assertTrue(response.streaming)
+        data = read_json(response)
+        self.assertEqual([item["id"] for item in data],
+                         list(Violation.objects.order_by("-created_at").values_list("id", flat=True)))
+
+    def test_streamed_visits_match_the_paginated_ones(self):
+        with patch.object(VisitViewSet, "stream_chunk_size", 4):
+            streamed = read_json(self.client.get(reverse("visit-list"), {"no_pagination": "true"}))
+        paginated = self.client.get(reverse("visit-list"), {"page_size": 100}).json()["data"]
+
+        self.assertEqual(streamed, paginated)
+
+
+class BulkDeleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_employee("admin", role=User.RoleChoices.ADMIN)
+        cls.supervisor = create_employee("supervisor")
+        project = Project.objects.create(name="project")
+        cls.location = Location.objects.create(name="location", project=project)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = self.settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin.user)
+        # run the file cleanup inline
+        eager = self.settings(BACKGROUND_TASKS_EAGER=True)
+        eager.enable()
+        self.addCleanup(eager.disable)
+
+    def create_violation(self):
+        return Violation.objects.create(location=self.location, details="-", date=date(2025, 10, 1),
+                                        created_by=self.supervisor, severity=Violation.SeverityLevel.LOW,
+                                        violation_type=Violation.ViolationType.LATE,
+                                        violation_image=ContentFile(b"-", name="violation.jpg"))
+
+    def create_visits(self, count):
+        visits = []
+        for i in range(count):
+            visit = Visit.objects.create(location=self.location, employee=self.supervisor, date=date(2025, 10, 1),
+                                         time=time(10, i), purpose="-")
+            VisitReport.objects.create(visit=visit, **{field: VisitReport.EvaluationChoices.GOOD for field in (
+                "guard_presence", "uniform_cleanliness", "attendance_records", "shift_handover", "lighting",
+                "cameras", "security_vehicles", "radio_devices", "other")},
+                                       cameras_attachment=ContentFile(b"-", name=f"camera-{i}.jpg"))
+            visits.append(visit)
+        return visits
+
+    def bulk_delete(self, url, ids):
+        # the request's queries only, the background steps run once it's committed
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as context:
+            response = self.client.delete(url, ids, format="json")
+        return response, len(context)
+
+    def test_deletes_visits_reports_and_attachments(self):
+        visits = self.create_visits(13)
+        attachments = [Path(visit.report.cameras_attachment.path) for visit in visits]
+
+        response, few_queries = self.bulk_delete(reverse("visit-bulk-delete"), [visit.id for visit in visits[:2]])
+        self.assertEqual(response.json(), {"deleted": 2})
+        response, many_queries = self.bulk_delete(reverse("visit-bulk-delete"),
+                                                  {"ids": [visit.id for visit in visits[2:12]]})
+        self.assertEqual(response.json(), {"deleted": 10})
+
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(list(Visit.objects.values_list("id", flat=True)), [visits[12].id])
+        self.assertEqual(VisitReport.objects.count(), 1)
+        self.assertEqual([path.exists() for path in attachments], [False] * 12 + [True])
+        self.assertEqual([row[-1] for row in stats_snapshot()], [1])
+
+    def test_files_are_removed_after_commit(self):
+        violation = self.create_violation()
+        image = Path(violation.violation_image.path)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.delete(reverse("violation-bulk-delete"), [violation.id], format="json")
+        self.assertTrue(image.exists())
+        for callback in callbacks:
+            callback()
+        self.assertFalse(image.exists())
+
+    def test_employee_delete_cascades(self):
+        image = Path(self.create_violation().violation_image.path)
+
+        response, _ = self.bulk_delete(reverse("multiple-delete"), [self.supervisor.id])
+        self.assertEqual(response.json(), {"deleted": 1})
+        self.assertFalse(Employee.objects.filter(pk=self.supervisor.pk).exists())
+        self.assertFalse(Violation.objects.exists())
+        self.assertFalse(image.exists())
+        self.assertEqual(stats_snapshot(), [])
+
+    def test_invalid_ids(self):
+        response = self.client.delete(reverse("violation-bulk-delete"), {"ids": ["x"]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+def jpeg_photo(width=2000, height=1500):
+    """A phone-like photo: EXIF with the camera and a 90° orientation tag."""
+    exif = Image.Exif()
+    exif[0x010F] = "Phone maker"  # Make
+    exif[0x0112] = 6  # Orientation: rotate 90° clockwise
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "navy").save(buffer, "JPEG", exif=exif, quality=95)
+    return buffer.getvalue()
+
+
+class MediaPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_employee("admin", role=User.RoleChoices.ADMIN)
+        cls.location = Location.objects.create(name="location", project=Project.objects.create(name="project"))
+
+    def setUp(self):
+        media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(media_dir.cleanup)
+        media_root = self.settings(MEDIA_ROOT=media_dir.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        # run the background steps inline
+        eager = self.settings(BACKGROUND_TASKS_EAGER=True)
+        eager.enable()
+        self.addCleanup(eager.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin.user)
+
+    def create_violation(self, content=None, name="photo.jpg"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Violation.objects.create(location=self.location, details="-", created_by=self.admin,
+                                            violation_type=Violation.ViolationType.LATE,
+                                            severity=Violation.SeverityLevel.LOW,
+                                            violation_image=ContentFile(content or jpeg_photo(), name=name))
+
+    def test_variants_are_resized_and_exif_free(self):
+        violation = self.create_violation()
+        processed = ProcessedImage.objects.get(source=violation.violation_image.name)
+
+        self.assertEqual(processed.status, ProcessedImage.Status.PROCESSED)
+        self.assertEqual((processed.width, processed.height), (1500, 2000))  # orientation applied
+        self.assertEqual(processed.size, violation.violation_image.size)
+        for variant, longest_side in media.VARIANTS.items():
+            with Image.open(getattr(processed, variant).path) as image:
+                self.assertEqual(max(image.size), longest_side)
+                self.assertEqual(dict(image.getexif()), {})
+        self.assertLess(processed.thumbnail_size, processed.size / 10)
+
+    def test_list_returns_the_variants(self):
+        for _ in range(3):
+            self.create_violation()
+        self.create_violation(b"%PDF-1.4", name="scan.pdf")
+
+        with CaptureQueriesContext(connection) as context:
+            data = self.client.get(reverse("violation-list")).json()["data"]
+        self.assertEqual(sum("processedimage" in query["sql"] for query in context.captured_queries), 1)
+
+        images = [item["images"] for item in data]
+        self.assertEqual(images[0], {})  # the pdf
+        for item in images[1:]:
+            self.assertTrue(item["violation_image"]["thumbnail"].startswith("http://testserver/media/variants/"))
+            self.assertEqual(item["violation_image"]["width"], 1500)
+
+        detail = self.client.get(reverse("violation-detail", args=[data[1]["id"]])).json()
+        self.assertEqual(detail["images"], images[1])
+
+    def test_new_variants_change_the_etag(self):
+        violation = self.create_violation()
+        ProcessedImage.objects.all().delete()
+        url = reverse("violation-detail", args=[violation.id])
+        etag = self.client.get(url)["ETag"]
+
+        media.process_image(violation.violation_image.name)
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("violation_image", response.json()["images"])
+
+    def test_deleting_removes_the_variants(self):
+        violation = self.create_violation()
+        processed = ProcessedImage.objects.get()
+        paths = [Path(processed.display.path), Path(processed.thumbnail.path)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            violation.delete()
+        self.assertFalse(ProcessedImage.objects.exists())
+        self.assertFalse(any(path.exists() for path in paths))
+
+    def test_replacing_removes_the_old_variants(self):
+        violation = self.create_violation()
+        old = ProcessedImage.objects.get()
+        paths = [Path(old.display.path), Path(old.thumbnail.path)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            violation.violation_image = ContentFile(jpeg_photo(), name="replaced.jpg")
+            violation.save()
+        self.assertEqual(list(ProcessedImage.objects.values_list("source", flat=True)),
+                         [violation.violation_image.name])
+        self.assertFalse(any(path.exists() for path in paths))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            violation.details = "unrelated"
+            violation.save()
+        self.assertEqual(ProcessedImage.objects.count(), 1)
+
+    def test_backfill(self):
+        violation = self.create_violation()
+        ProcessedImage.objects.all().delete()
+
+        output = StringIO()
+        call_command("process_media", stdout=output)
+        self.assertIn("Processed 1 files: 1 processed", output.getvalue())
+        self.assertTrue(ProcessedImage.objects.filter(source=violation.violation_image.name).exists())
+
+
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = create_employee("supervisor")
+        location = Location.objects.create(name="location", project=Project.objects.create(name="project"))
+        cls.visit = Visit.objects.create(location=location, employee=cls.supervisor, date=date(2025, 10, 1),
+                                         time=time(10, 0), purpose="-")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = self.settings(MEDIA_ROOT=f"{directory.name}/media", CHUNKED_UPLOAD_MAX_CHUNK_SIZE=4,
+                                  CHUNKED_UPLOAD_DIR=Path(directory.name) / "chunked")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.supervisor.user)
+
+    def start(self, content, **extra):
+        response = self.client.post(reverse("chunked-upload-list"),
+                                    {"filename": "../camera photo.jpg", "size": len(content), **extra})
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def put(self, upload_id, offset, data):
+        return self.client.put(reverse("chunked-upload-chunk", args=[upload_id]), data,
+                               content_type="application/octet-stream", headers={"Upload-Offset": str(offset)})
+
+    def create_report(self, uploads):
+        fields = ("guard_presence", "uniform_cleanliness", "attendance_records", "shift_handover", "lighting",
+                  "cameras", "security_vehicles", "radio_devices", "other")
+        return self.client.post(reverse("visit-report-list"), {
+            "visit": self.visit.id, "uploads": uploads,
+            **{field: VisitReport.EvaluationChoices.GOOD for field in fields},
+        }, format="json")
+
+    def test_resume_and_attach(self):
+        content = b"0123456789"
+        upload_id = self.start(content, sha256=hashlib.sha256(content).hexdigest())
+
+        self.assertEqual(self.put(upload_id, 0, content[:4]).json()["offset"], 4)
+        # the chunk at 4 was lost: the next one is refused and the client resumes from the offset
+        response = self.put(upload_id, 8, content[8:])
+        self.assertEqual((response.status_code, response.json()["offset"]), (409, 4))
+        self.assertEqual(self.client.get(reverse("chunked-upload-detail", args=[upload_id])).json()["offset"], 4)
+        self.assertEqual(self.put(upload_id, 4, content[4:8]).json()["offset"], 8)
+        self.assertEqual(self.put(upload_id, 4, content[4:8]).json()["offset"], 8)  # retried
+        self.assertEqual(self.put(upload_id, 8, content[8:]).json()["offset"], 10)
+
+        response = self.client.post(reverse("chunked-upload-finalize", args=[upload_id]))
+        self.assertEqual(response.json()["status"], ChunkedUpload.Status.COMPLETE)
+        self.assertFalse(any(settings.CHUNKED_UPLOAD_DIR.iterdir()))
+
+        response = self.create_report({"cameras_attachment": upload_id})
+        self.assertEqual(response.status_code, 201)
+        report = VisitReport.objects.get()
+        self.assertTrue(report.cameras_attachment.name.startswith("visit_reports/camera_photo"))
+        with report.cameras_attachment.open("rb") as file:
+            self.assertEqual(file.read(), content)
+        self.assertEqual(ChunkedUpload.objects.get().status, ChunkedUpload.Status.ATTACHED)
+
+        # an upload is attached once
+        report.delete()
+        self.assertEqual(self.create_report({"cameras_attachment": upload_id}).status_code, 400)
+
+    def test_checksum_mismatch_restarts(self):
+        upload_id = self.start(b"abc", sha256="0" * 64)
+        self.put(upload_id, 0, b"abc")
+        response = self.client.post(reverse("chunked-upload-finalize", args=[upload_id]))
+        self.assertEqual((response.status_code, response.json()["offset"]), (409, 0))
+
+    def test_limits(self):
+        upload_id = self.start(b"0123456789")
+        self.assertEqual(self.put(upload_id, 0, b"01234").status_code, 413)
+        self.assertEqual(self.put(upload_id, 8, b"890").status_code, 400)
+        response = self.client.post(reverse("chunked-upload-finalize", args=[upload_id]))
+        self.assertEqual(response.status_code, 409)
+
+        other = APIClient()
+        other.force_authenticate(create_employee("other").user)
+        self.assertEqual(other.get(reverse("chunked-upload-detail", args=[upload_id])).status_code, 404)
+        self.assertEqual(self.create_report({"cameras_attachment": upload_id}).status_code, 400)
+
+    def test_purge(self):
+        upload_id = self.start(b"0123456789")
+        ChunkedUpload.objects.update(updated_at=timezone.now() - timedelta(days=3))
+        call_command("purge_chunked_uploads", stdout=StringIO())
+        self.assertFalse(ChunkedUpload.objects.filter(pk=upload_id).exists())
+        self.assertFalse(any(settings.CHUNKED_UPLOAD_DIR.iterdir()))
+
+
+class OfflineSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = create_employee("supervisor")
+        cls.location = Location.objects.create(name="location", project=Project.objects.create(name="project"))
+        cls.visit = Visit.objects.create(location=cls.location, employee=cls.supervisor, date=date(2025, 10, 1),
+                                         time=time(10, 0), purpose="-")
+        cls.guard = SecurityGuard.objects.create(name="guard", employee_id=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.supervisor.user)
+
+    def batch(self):
+        report = {field: VisitReport.EvaluationChoices.GOOD for field in (
+            "guard_presence", "uniform_cleanliness", "attendance_records", "shift_handover", "lighting", "cameras",
+            "security_vehicles", "radio_devices", "other")}
+        violation = {"location": self.location.id, "security_guard": self.guard.id, "date": "2025-10-01",
+                     "violation_type": Violation.ViolationType.LATE, "severity": Violation.SeverityLevel.LOW,
+                     "details": "-"}
+        attendance = {"location": self.location.id, "shift": Shift.ShiftChoices.FIRST, "date": "2025-10-01",
+                      "records": {str(self.guard.id): {"status": "حاضر"}}}
+        return [
+            {"key": "report-1", "type": "report", "data": {**report, "visit": self.visit.id}},
+            {"key": "violation-1", "type": "violation", "data": violation},
+            {"key": "violation-2", "type": "violation", "data": {**violation, "severity": "?"}},
+            {"key": "attendance-1", "type": "attendance", "data": attendance},
+            {"key": "attendance-2", "type": "attendance", "data": attendance},
+            {"key": "unknown-1", "type": "unknown", "data": {}},
+        ]
+
+    def sync(self, items):
+        response = self.client.post(reverse("sync-offline-items"), {"items": items}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return [(result["key"], result["status"], result.get("replayed")) for result in response.json()["results"]]
+
+    def test_batch_is_applied_with_a_result_per_item(self):
+        self.assertEqual(self.sync(self.batch()), [
+            ("report-1", 201, False),
+            ("violation-1", 201, False),
+            ("violation-2", 400, None),
+            ("attendance-1", 201, False),
+            ("attendance-2", 409, None),  # the same shift
+            ("unknown-1", 400, None),
+        ])
+        self.visit.refresh_from_db()
+        self.assertEqual(self.visit.status, Visit.VisitStatus.COMPLETED)
+        self.assertEqual((Violation.objects.count(), ShiftAttendance.objects.count()), (1, 1))
+
+        incremental = stats_snapshot()
+        call_command("rebuild_daily_stats", "--from", "2025-10-01", "--to", "2025-10-01", stdout=StringIO())
+        self.assertEqual(incremental, stats_snapshot())
+
+    def test_replay_does_not_apply_twice(self):
+        first = self.client.post(reverse("sync-offline-items"), {"items": self.batch()}, format="json").json()
+        replay = self.client.post(reverse("sync-offline-items"), {"items": self.batch()}, format="json").json()
+
+        self.assertEqual([result.get("replayed") for result in replay["results"]],
+                         [True, True, None, True, None, None])
+        self.assertEqual(replay["results"][0]["data"], first["results"][0]["data"])
+        self.assertEqual((VisitReport.objects.count(), Violation.objects.count()), (1, 1))
+
+    def test_duplicate_keys_in_a_batch(self):
+        violation = self.batch()[1]
+        self.assertEqual(self.sync([violation, violation]), [("violation-1", 201, False), ("violation-1", 201, True)])
+        self.assertEqual(Violation.objects.count(), 1)
+
+    def test_malformed_attendance_records(self):
+        attendance = self.batch()[3]
+        items = [{**attendance, "key": f"attendance-{i}", "data": {**attendance["data"], "records": records}}
+                 for i, records in enumerate(([{"status": "حاضر"}], "حاضر"))]
+        self.assertEqual(self.sync(items), [("attendance-0", 400, None), ("attendance-1", 400, None)])
+
+    def test_batch_limit(self):
+        with patch.object(sync, "SYNC_MAX_ITEMS", 2):
+            response = self.client.post(reverse("sync-offline-items"), {"items": self.batch()}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+def create_upload(data):
+    return [ChunkedUpload.objects.create(filename="report.pdf", size=10, created_by=data["admin"]).id]
+
 
-# Create your tests here.
+class VisitQueryBudgetTests(QueryBudgetTestCase):
+    endpoints = (
+        Endpoint("visit-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("visit-list", params=lambda data: {"no_pagination": "true"}),
+        Endpoint("visit-list", params=lambda data: {"cursor": "", "page_size": 500, "with_count": "true"}),
+        Endpoint("visit-detail", args=lambda data: [data["visits"][0].id],
+                 user=lambda data: data["visits"][0].employee.user),
+        Endpoint("visit-form-data", params=lambda data: {"id": data["visits"][0].id}),
+        Endpoint("visit-report-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("visit-report-detail", args=lambda data: [data["reports"][0].id]),
+        Endpoint("violation-list", params=lambda data: {"page_size": 1000}),
+        Endpoint("violation-list", params=lambda data: {"no_pagination": "true"}),
+        Endpoint("violation-detail", args=lambda data: [data["violations"][0].id]),
+        Endpoint("chunked-upload-detail", args=create_upload),
+    )
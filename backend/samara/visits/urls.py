@@ -1,13 +1,16 @@
 from rest_framework.routers import DefaultRouter
-from .views import VisitViewSet, VisitReportViewSet, ViolationViewSet, get_visit_form_data
+from .views import VisitViewSet, VisitReportViewSet, ViolationViewSet, ChunkedUploadViewSet, get_visit_form_data, \
+    sync_offline_items
 from django.urls import include, path
 
 router = DefaultRouter()
 router.register(r'visits', VisitViewSet, basename='visit')
 router.register(r'visit-reports', VisitReportViewSet, basename='visit-report')
 router.register(r'violations', ViolationViewSet, basename='violation')
+router.register(r'uploads', ChunkedUploadViewSet, basename='chunked-upload')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('get-visit-form-data/', get_visit_form_data),
+    path('get-visit-form-data/', get_visit_form_data, name='visit-form-data'),
+    path('sync/', sync_offline_items, name='sync-offline-items'),
 ]
@@ -1,26 +1,36 @@
 from django.utils.timezone import make_aware
-from rest_framework import status
+from django.db import transaction
+from rest_framework import mixins, status
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.decorators import action, api_view
 
-from .models import Visit, VisitReport, Violation
-from .serializers import VisitReadSerializer, VisitWriteSerializer, \
+from . import chunked_uploads, sync
+from .models import ChunkedUpload, Visit, VisitReport, Violation
+from .serializers import VisitReadSerializer, VisitWriteSerializer, ChunkedUploadSerializer, \
     VisitReportReadSerializer, VisitReportWriteSerializer, ViolationReadSerializer, ViolationWriteSerializer
 
-from datetime import datetime, time, timedelta
+from datetime import datetime, timedelta
 from django.conf import settings
-from django.db.models import Q
 from django.db.models.functions import TruncDate
 from django.utils.translation import gettext_lazy as _
+from samara.rest_framework_utils.bulk_delete import BulkDeleteMixin
+from samara.rest_framework_utils.conditional_get import ConditionalGetMixin
+from samara.rest_framework_utils.streaming import StreamingListMixin
+from samara.instrumentation import query_budget
+from samara.rest_framework_utils.response_cache import PROJECTS, LOCATIONS, GUARDS, LOCATION_SHIFTS, EMPLOYEES, \
+    IMAGES
 from users.models import User
 
 
-class VisitViewSet(ModelViewSet):
+class VisitViewSet(BulkDeleteMixin, ConditionalGetMixin, StreamingListMixin, ModelViewSet):
     queryset = Visit.objects.all()
+    etag_namespaces = (PROJECTS, LOCATIONS, LOCATION_SHIFTS, EMPLOYEES)
+    keyset_ordering = ("date", "time", "id")
+    query_budget = {"list": 5, "retrieve": 6}
 
     def get_queryset(self):
-        queryset = Visit.objects.all()
+        queryset = VisitReadSerializer.setup_eager_loading(Visit.objects.all())
 
         from_date = self.request.query_params.get('from', None)
         to_date = self.request.query_params.get('to', None)
@@ -32,27 +42,8 @@ class VisitViewSet(ModelViewSet):
             from_date = datetime.strptime(from_date, '%Y-%m-%d').date()
             to_date = datetime.strptime(to_date, '%Y-%m-%d').date()
 
-            if period == "morning":
-                start_time = time(9, 0)
-                end_time = time(20, 59)
-                queryset = queryset.filter(
-                    date__range=[from_date, to_date],
-                    time__range=[start_time, end_time])
-
-            elif period == "evening":
-                evening_start = time(21, 0)
-                evening_end = time(8, 59)
-
-                late_evening = Q(
-                    date__range=(from_date, to_date),
-                    time__gte=evening_start,
-                )
-                early_morning = Q(
-                    date__range=[from_date + timedelta(days=1), to_date + timedelta(days=1)],
-                    time__lte=evening_end,
-                )
-                queryset = queryset.filter(late_evening | early_morning)
-
+            if period in Visit.Period.values:
+                queryset = queryset.filter(duty_date__range=(from_date, to_date), period=period)
             else:
                 queryset = queryset.filter(date__range=(from_date, to_date))
 
@@ -63,6 +54,10 @@ class VisitViewSet(ModelViewSet):
 
         return queryset
 
+    def get_etag_extra(self):
+        # "opened" depends on the current day
+        return (datetime.today().astimezone(settings.SAUDI_TZ).date(),)
+
     def retrieve(self, request, pk=None):
         today = datetime.today().astimezone(settings.SAUDI_TZ).date()
         yesterday = today - timedelta(days=1)
@@ -91,6 +86,10 @@ class VisitViewSet(ModelViewSet):
 
 class VisitReportViewSet(ModelViewSet):
     queryset = VisitReport.objects.all()
+    query_budget = {"list": 3, "retrieve": 2}
+
+    def get_queryset(self):
+        return VisitReportReadSerializer.setup_eager_loading(super().get_queryset())
 
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
@@ -98,8 +97,11 @@ class VisitReportViewSet(ModelViewSet):
         return VisitReportReadSerializer
 
 
-class ViolationViewSet(ModelViewSet):
+class ViolationViewSet(BulkDeleteMixin, ConditionalGetMixin, StreamingListMixin, ModelViewSet):
     queryset = Violation.objects.all()
+    etag_namespaces = (PROJECTS, LOCATIONS, GUARDS, EMPLOYEES, IMAGES)
+    keyset_ordering = ("-created_at", "-id")
+    query_budget = {"list": 4, "retrieve": 3}
 
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
@@ -107,7 +109,7 @@ class ViolationViewSet(ModelViewSet):
         return ViolationReadSerializer
 
     def get_queryset(self):
-        queryset = Violation.objects.all()
+        queryset = Violation.objects.select_related("location__project", "security_guard", "created_by")
 
         from_date = self.request.query_params.get('from', None)
         to_date = self.request.query_params.get('to', None)
@@ -144,6 +146,103 @@ class ViolationViewSet(ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ChunkedUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, GenericViewSet):
+    """
+    Resumable attachment uploads: ``POST`` the file name and size, ``PUT`` the bytes to ``chunk/``
+    with their position in the ``Upload-Offset`` header, then ``POST finalize/``. ``GET`` returns
+    the offset to resume from, so a retry only resends what is missing. The upload's id is then
+    passed to the visit report's ``uploads`` instead of the file.
+    """
+    serializer_class = ChunkedUploadSerializer
+    query_budget = {"retrieve": 3}
+
+    def get_queryset(self):
+        return ChunkedUpload.objects.filter(created_by=self.request.user)
+
+    def perform_create(self, serializer):
+        upload = serializer.save(created_by=self.request.user)
+        upload.part_path.parent.mkdir(parents=True, exist_ok=True)
+        upload.part_path.touch()
+
+    def conflict(self, upload, detail):
+        return Response({"detail": detail, "offset": upload.offset, "status": upload.status},
+                        status=status.HTTP_409_CONFLICT)
+
+    @action(detail=True, methods=["put"])
+    def chunk(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            offset = int(request.headers.get("Upload-Offset", request.query_params.get("offset", "")))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response({"detail": _("يجب إرسال موضع الجزء (Upload-Offset)")}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not 0 < length <= settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            return Response({"detail": _("حجم الجزء غير مسموح به")},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if offset < 0 or offset + length > upload.size:
+            return Response({"detail": _("الجزء يتجاوز حجم الملف")}, status=status.HTTP_400_BAD_REQUEST)
+        if upload.status != ChunkedUpload.Status.UPLOADING:
+            return self.conflict(upload, _("اكتمل رفع الملف"))
+
+        # read before locking the row: a slow client doesn't hold up the other chunks
+        chunk = chunked_uploads.read_chunk(request.stream, length)
+        with chunk, transaction.atomic():
+            upload = self.get_queryset().select_for_update().get(pk=upload.pk)
+            if upload.status != ChunkedUpload.Status.UPLOADING:
+                return self.conflict(upload, _("اكتمل رفع الملف"))
+            if offset > upload.offset:
+                return self.conflict(upload, _("أجزاء سابقة لم تصل بعد"))
+
+            # a chunk sent again (its response was lost) just rewrites the same bytes
+            end = chunked_uploads.write_chunk(upload.part_path, offset, chunk)
+            upload.offset = max(upload.offset, end)
+            upload.save(update_fields=["offset", "updated_at"])
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=["post"])
+    def finalize(self, request, pk=None):
+        with transaction.atomic():
+            upload = self.get_queryset().select_for_update().filter(pk=pk).first()
+            if upload is None:
+                return Response({"detail": _("الملف المرفوع غير موجود")}, status=status.HTTP_404_NOT_FOUND)
+            if upload.status != ChunkedUpload.Status.UPLOADING:  # finalized already
+                return Response(self.get_serializer(upload).data)
+            if upload.offset != upload.size:
+                return self.conflict(upload, _("لم يكتمل رفع الملف"))
+
+            if upload.sha256 and chunked_uploads.sha256(upload.part_path) != upload.sha256:
+                # corrupted on the way: start over
+                upload.part_path.write_bytes(b"")
+                upload.offset = 0
+                upload.save(update_fields=["offset", "updated_at"])
+                return self.conflict(upload, _("الملف المرفوع لا يطابق قيمة SHA-256، يجب إعادة رفعه"))
+
+            chunked_uploads.store(upload)
+            upload.status = ChunkedUpload.Status.COMPLETE
+            upload.save(update_fields=["file", "status", "updated_at"])
+        return Response(self.get_serializer(upload).data)
+
+
+@api_view(["POST"])
+def sync_offline_items(request):
+    """
+    ``{"items": [{"key": <client generated id>, "type": "report" | "violation" | "attendance", "data": {...}}]}``:
+    a device's queued items, applied in one request. Returns a result per item; replaying the batch is safe.
+    """
+    if not hasattr(request.user, "employee_profile"):
+        return Response({"detail": _("المزامنة متاحة للموظفين فقط")}, status=status.HTTP_403_FORBIDDEN)
+
+    items = request.data.get("items") if isinstance(request.data, dict) else None
+    if not isinstance(items, list):
+        return Response({"detail": _("يجب إرسال قائمة العناصر")}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > sync.SYNC_MAX_ITEMS:
+        return Response({"detail": _("عدد العناصر أكبر من المسموح به")}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"results": sync.sync_items(items, request)})
+
+
+@query_budget(5)
 @api_view(["GET"])
 def get_visit_form_data(request):
     visit_id = request.query_params.get("id", None)